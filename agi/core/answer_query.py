@@ -0,0 +1,253 @@
+# agi/core/answer_query.py
+"""Cursor-based read path over sovereign_model.sqlite (v0.1d).
+Keyset pagination (never OFFSET) over sovereign_answers and assistant_messages with filters, and
+streaming export to JSONL or a columnar format. Memory stays bounded by one page whatever the
+size of the table.
+
+Usage:
+    python -m agi.core.answer_query answers --since 2025-01-01 --violations -o out.jsonl
+    python -m agi.core.answer_query answers --mode explained --format columnar -o out.col.jsonl.gz
+    python -m agi.core.answer_query messages --answer-id <id> --format parquet -o msgs.parquet
+
+Formats: jsonl (one row per line), columnar (gzip JSONL, one column-major row group per line),
+parquet (needs pyarrow). "-" writes jsonl to stdout.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import gzip
+import json
+import sqlite3
+import sys
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+from .receipt import DB_PATH, flush_sink
+
+try:  # optional: parquet export
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - optional dependency
+    pa = None
+    pq = None
+
+DEFAULT_PAGE = 500
+ANSWER_COLUMNS = ("answer_id", "receipt_id", "question", "raw_answer", "explained_answer", "created_at", "audit_receipt")
+MESSAGE_COLUMNS = ("id", "answer_id", "receipt_id", "role", "message", "created_at")
+
+@dataclass
+class AnswerFilter:
+    since: Optional[str] = None        # created_at >= since (ISO-8601 prefix, e.g. "2025-01-01")
+    until: Optional[str] = None        # created_at < until
+    receipt_id: Optional[str] = None
+    mode: Optional[str] = None         # audit receipt mode: raw | explained | discussion
+    violations: Optional[bool] = None  # True: only answers with validator violations; False: only clean ones
+
+@dataclass
+class MessageFilter:
+    since: Optional[str] = None
+    until: Optional[str] = None
+    answer_id: Optional[str] = None
+    receipt_id: Optional[str] = None
+    role: Optional[str] = None
+
+def encode_cursor(key: Sequence[Any]) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor: str) -> List[Any]:
+    return json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+
+def _connect() -> sqlite3.Connection:
+    flush_sink()  # include everything already handed to the receipt sink
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _answer_where(f: AnswerFilter) -> Tuple[List[str], List[Any]]:
+    where: List[str] = []
+    params: List[Any] = []
+    if f.since:
+        where.append("created_at >= ?"); params.append(f.since)
+    if f.until:
+        where.append("created_at < ?"); params.append(f.until)
+    if f.receipt_id:
+        where.append("receipt_id = ?"); params.append(f.receipt_id)
+    if f.mode:
+        where.append("json_extract(audit_receipt, '$.mode') = ?"); params.append(f.mode)
+    if f.violations is not None:
+        op = ">" if f.violations else "="
+        where.append(f"COALESCE(json_array_length(audit_receipt, '$.validator.violations'), 0) {op} 0")
+    return where, params
+
+def page_answers(f: Optional[AnswerFilter] = None, limit: int = DEFAULT_PAGE, cursor: Optional[str] = None,
+                 conn: Optional[sqlite3.Connection] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page ordered by (created_at, rowid); returns (rows, next_cursor or None at the end)."""
+    where, params = _answer_where(f or AnswerFilter())
+    if cursor:
+        where.append("(created_at, rowid) > (?, ?)"); params.extend(decode_cursor(cursor))
+    sql = f"SELECT rowid AS _rowid, {', '.join(ANSWER_COLUMNS)} FROM sovereign_answers"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY created_at, rowid LIMIT ?"
+    own = conn is None
+    conn = conn or _connect()
+    try:
+        rows = conn.execute(sql, params + [limit]).fetchall()
+    finally:
+        if own:
+            conn.close()
+    out = []
+    for r in rows:
+        d = dict(r)
+        d.pop("_rowid")
+        d["audit_receipt"] = json.loads(d["audit_receipt"]) if d["audit_receipt"] else None
+        out.append(d)
+    next_cursor = encode_cursor((rows[-1]["created_at"], rows[-1]["_rowid"])) if len(rows) == limit else None
+    return out, next_cursor
+
+def page_messages(f: Optional[MessageFilter] = None, limit: int = DEFAULT_PAGE, cursor: Optional[str] = None,
+                  conn: Optional[sqlite3.Connection] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """One page ordered by id (insertion order); returns (rows, next_cursor or None at the end)."""
+    f = f or MessageFilter()
+    where: List[str] = []
+    params: List[Any] = []
+    for col, val in (("answer_id", f.answer_id), ("receipt_id", f.receipt_id), ("role", f.role)):
+        if val:
+            where.append(f"{col} = ?"); params.append(val)
+    if f.since:
+        where.append("created_at >= ?"); params.append(f.since)
+    if f.until:
+        where.append("created_at < ?"); params.append(f.until)
+    if cursor:
+        where.append("id > ?"); params.append(decode_cursor(cursor)[0])
+    sql = f"SELECT {', '.join(MESSAGE_COLUMNS)} FROM assistant_messages"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id LIMIT ?"
+    own = conn is None
+    conn = conn or _connect()
+    try:
+        rows = [dict(r) for r in conn.execute(sql, params + [limit]).fetchall()]
+    finally:
+        if own:
+            conn.close()
+    return rows, (encode_cursor((rows[-1]["id"],)) if len(rows) == limit else None)
+
+def iter_answers(f: Optional[AnswerFilter] = None, page_size: int = DEFAULT_PAGE, cursor: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    conn = _connect()
+    try:
+        while True:
+            rows, cursor = page_answers(f, page_size, cursor, conn)
+            yield from rows
+            if cursor is None:
+                return
+    finally:
+        conn.close()
+
+def iter_messages(f: Optional[MessageFilter] = None, page_size: int = DEFAULT_PAGE, cursor: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    conn = _connect()
+    try:
+        while True:
+            rows, cursor = page_messages(f, page_size, cursor, conn)
+            yield from rows
+            if cursor is None:
+                return
+    finally:
+        conn.close()
+
+def _batches(rows: Iterator[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def export_jsonl(rows: Iterator[Dict[str, Any]], out: TextIO) -> int:
+    n = 0
+    for row in rows:
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        n += 1
+    return n
+
+def export_columnar(rows: Iterator[Dict[str, Any]], path: str, columns: Sequence[str], group_size: int = DEFAULT_PAGE) -> int:
+    """gzip JSONL where each line is a row group {"n": rows, "columns": {name: [values...]}}:
+    column-major, so repetitive columns compress well, and readable a group at a time."""
+    n = 0
+    with gzip.open(path, "wt", encoding="utf-8") as out:
+        out.write(json.dumps({"format": "sovereign-columnar", "version": 1, "columns": list(columns)}) + "\n")
+        for batch in _batches(rows, group_size):
+            cols = {c: [r.get(c) for r in batch] for c in columns}
+            out.write(json.dumps({"n": len(batch), "columns": cols}, ensure_ascii=False, separators=(",", ":")) + "\n")
+            n += len(batch)
+    return n
+
+def export_parquet(rows: Iterator[Dict[str, Any]], path: str, columns: Sequence[str], group_size: int = DEFAULT_PAGE) -> int:
+    if pa is None:
+        raise RuntimeError("parquet export needs pyarrow (pip install pyarrow); use --format columnar instead")
+    n = 0
+    writer = None
+    try:
+        for batch in _batches(rows, group_size):
+            # Nested audit receipts are stored as JSON text so the schema stays flat and stable.
+            data = {c: [json.dumps(r[c], ensure_ascii=False) if isinstance(r.get(c), (dict, list)) else r.get(c) for r in batch] for c in columns}
+            table = pa.table(data)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema, compression="zstd")
+            writer.write_table(table.cast(writer.schema))
+            n += len(batch)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Query / export the sovereign answer database")
+    sub = ap.add_subparsers(dest="table", required=True)
+    for name in ("answers", "messages"):
+        p = sub.add_parser(name)
+        p.add_argument("--since", help="created_at >= (ISO-8601, e.g. 2025-01-01)")
+        p.add_argument("--until", help="created_at < (ISO-8601)")
+        p.add_argument("--receipt-id")
+        p.add_argument("--format", choices=("jsonl", "columnar", "parquet"), default="jsonl")
+        p.add_argument("-o", "--output", default="-", help="output path ('-' = stdout, jsonl only)")
+        p.add_argument("--page-size", type=int, default=DEFAULT_PAGE)
+        if name == "answers":
+            p.add_argument("--mode", choices=("raw", "explained", "discussion"))
+            g = p.add_mutually_exclusive_group()
+            g.add_argument("--violations", action="store_true", default=None, help="only answers with policy violations")
+            g.add_argument("--clean", dest="violations", action="store_false", help="only answers without violations")
+        else:
+            p.add_argument("--answer-id")
+            p.add_argument("--role", choices=("user", "assistant"))
+    args = ap.parse_args(argv)
+
+    if args.table == "answers":
+        rows = iter_answers(AnswerFilter(args.since, args.until, args.receipt_id, args.mode, args.violations), args.page_size)
+        columns: Sequence[str] = ANSWER_COLUMNS
+    else:
+        rows = iter_messages(MessageFilter(args.since, args.until, args.answer_id, args.receipt_id, args.role), args.page_size)
+        columns = MESSAGE_COLUMNS
+
+    if args.format == "jsonl":
+        if args.output == "-":
+            n = export_jsonl(rows, sys.stdout)
+        else:
+            with open(args.output, "w", encoding="utf-8") as out:
+                n = export_jsonl(rows, out)
+    elif args.output == "-":
+        ap.error(f"--format {args.format} needs -o PATH")
+    elif args.format == "parquet" and pa is None:
+        ap.error("--format parquet needs pyarrow (pip install pyarrow); use --format columnar instead")
+    elif args.format == "columnar":
+        n = export_columnar(rows, args.output, columns, args.page_size)
+    else:
+        n = export_parquet(rows, args.output, columns, args.page_size)
+    print(f"[QUERY] exported {n} {args.table} rows", file=sys.stderr)
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,83 @@
+# agi/core/answer_search.py
+"""Search over stored sovereign answers (v0.1d).
+Ranked full-text search via the sovereign_answers_fts index, and an exact "already answered?"
+lookup on the normalized question hash. Both are index lookups, not table or receipt-file scans.
+"""
+from __future__ import annotations
+
+import sqlite3
+from typing import Any, Dict, List, Optional
+
+from .receipt import DB_PATH, flush_sink, question_hash
+
+# bm25 column weights: question, raw_answer, explained_answer
+BM25_WEIGHTS = (4.0, 1.0, 1.0)
+
+def _connect() -> sqlite3.Connection:
+    flush_sink()  # read-your-writes when the sink runs in async durability mode
+    conn = sqlite3.connect(DB_PATH)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _fts_query(query: str) -> str:
+    # Each whitespace token becomes a quoted phrase: user text never reaches FTS5 query syntax.
+    return " ".join('"' + tok.replace('"', '""') + '"' for tok in query.split())
+
+def _has_fts(conn: sqlite3.Connection) -> bool:
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sovereign_answers_fts'").fetchone() is not None
+
+def search_answers(query: str, limit: int = 20, offset: int = 0, raw_query: bool = False) -> List[Dict[str, Any]]:
+    """Answers matching every term of `query`, best bm25 rank first.
+    `raw_query=True` passes FTS5 syntax through (OR, NEAR, prefix*, column filters)."""
+    match = query if raw_query else _fts_query(query)
+    if not match:
+        return []
+    conn = _connect()
+    try:
+        if _has_fts(conn):
+            w = ", ".join(str(x) for x in BM25_WEIGHTS)
+            rows = conn.execute(
+                f"""
+                SELECT a.answer_id, a.receipt_id, a.question, a.created_at,
+                       bm25(sovereign_answers_fts, {w}) AS rank,
+                       snippet(sovereign_answers_fts, -1, '[', ']', '...', 16) AS snippet
+                FROM sovereign_answers_fts
+                JOIN sovereign_answers a ON a.rowid = sovereign_answers_fts.rowid
+                WHERE sovereign_answers_fts MATCH ?
+                ORDER BY rank
+                LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset),
+            ).fetchall()
+        else:  # no FTS5 in this SQLite build: unranked substring scan
+            terms = query.split()
+            where = " AND ".join("(question || ' ' || raw_answer || ' ' || COALESCE(explained_answer, '')) LIKE ?" for _ in terms)
+            rows = conn.execute(
+                f"""
+                SELECT answer_id, receipt_id, question, created_at, NULL AS rank, NULL AS snippet
+                FROM sovereign_answers WHERE {where}
+                ORDER BY created_at DESC LIMIT ? OFFSET ?
+                """,
+                [f"%{t}%" for t in terms] + [limit, offset],
+            ).fetchall()
+    finally:
+        conn.close()
+    return [dict(r) for r in rows]
+
+def find_prior_answer(question: str) -> Optional[Dict[str, Any]]:
+    """Most recent stored answer to the same question after normalization, or None."""
+    conn = _connect()
+    try:
+        row = conn.execute(
+            """
+            SELECT answer_id, receipt_id, question, raw_answer, explained_answer, created_at
+            FROM sovereign_answers
+            WHERE question_hash = ?
+            ORDER BY created_at DESC
+            LIMIT 1
+            """,
+            (question_hash(question),),
+        ).fetchone()
+    finally:
+        conn.close()
+    return dict(row) if row is not None else None
@@ -1,9 +1,12 @@
 # agi/core/assistant_channel.py
 from __future__ import annotations
-from typing import Dict, Any, List
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
 import sqlite3
-from .receipt import store_assistant_message, DB_PATH
-from .model_runner import run_model_for_task
+import threading
+import time
+from .receipt import store_assistant_message, flush_sink, DB_PATH
+from .model_runner import run_model_for_task, model_context_window
 
 ASSISTANT_SYSTEM_PROMPT = (
     "You are the Sovereign assistant channel.\n"
@@ -13,10 +16,64 @@ ASSISTANT_SYSTEM_PROMPT = (
     "- If you detect a serious error or contradiction, say so and request a re-run.\n"
 )
 
+THREAD_CACHE_SIZE = 256   # threads kept in memory (LRU)
+REPLY_TOKEN_RESERVE = 1024  # matches generate() max_tokens default
+
 def get_assistant_system_prompt() -> str:
     return ASSISTANT_SYSTEM_PROMPT
 
-def list_thread_messages(answer_id: str) -> List[Dict[str, Any]]:
+def _prompt_tokens(text: str) -> int:
+    # Budgeting must not under-count, so take the larger of the runner's two heuristics. Rounding
+    # chars up keeps the count subadditive: a joined prompt never costs more than its parts.
+    return max((len(text) + 3) // 4, len(text.split()))
+
+def _truncate_to_tokens(text: str, budget: int) -> str:
+    """Longest word-boundary prefix that _prompt_tokens() counts within `budget`."""
+    words = text.split(" ")
+    lo, hi = 0, len(words)
+    while lo < hi:  # token count only grows with the prefix, so binary-search the cut
+        mid = (lo + hi + 1) // 2
+        if _prompt_tokens(" ".join(words[:mid])) <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo]) if lo else text[: budget * 4]  # one oversized word: cut by chars
+
+class ThreadCache:
+    """In-memory copy of recent threads. Loaded from SQLite once, then appended in place as this
+    process stores messages. Other processes may write the same thread (or retention may archive
+    it), so _cached_thread() checks the stored row count on every hit and reloads on a mismatch."""
+
+    def __init__(self, max_threads: int = THREAD_CACHE_SIZE):
+        self.max_threads = max_threads
+        self._threads: "OrderedDict[str, List[Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, answer_id: str) -> Optional[List[Dict[str, Any]]]:
+        with self._lock:
+            thread = self._threads.get(answer_id)
+            if thread is None:
+                return None
+            self._threads.move_to_end(answer_id)
+            return list(thread)
+
+    def put(self, answer_id: str, thread: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._threads[answer_id] = thread
+            self._threads.move_to_end(answer_id)
+            while len(self._threads) > self.max_threads:
+                self._threads.popitem(last=False)
+
+    def append(self, answer_id: str, msg: Dict[str, Any]) -> None:
+        with self._lock:
+            thread = self._threads.get(answer_id)
+            if thread is not None:  # not cached: the next read loads it from SQLite, including msg
+                thread.append(msg)
+
+_THREADS = ThreadCache()
+
+def _load_thread(answer_id: str) -> List[Dict[str, Any]]:
+    flush_sink()  # read-your-writes when the sink runs in async durability mode
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
     cur.execute(
@@ -30,24 +87,95 @@ def list_thread_messages(answer_id: str) -> List[Dict[str, Any]]:
     )
     rows = cur.fetchall()
     conn.close()
-    return [{"role": role, "message": msg, "created_at": created_at} for (role, msg, created_at) in rows]
+    return [{"role": role, "message": msg, "created_at": created_at, "tokens": _prompt_tokens(msg)} for (role, msg, created_at) in rows]
+
+def _stored_count(answer_id: str) -> int:
+    # Index-only count (idx_assistant_messages_answer_id); far cheaper than reloading the thread.
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM assistant_messages WHERE answer_id = ?", (answer_id,)).fetchone()[0]
+    finally:
+        conn.close()
+
+def _cached_thread(answer_id: str) -> List[Dict[str, Any]]:
+    thread = _THREADS.get(answer_id)
+    if thread is None or len(thread) != _stored_count(answer_id):
+        thread = _load_thread(answer_id)
+        _THREADS.put(answer_id, list(thread))
+    return thread
+
+def list_thread_messages(answer_id: str) -> List[Dict[str, Any]]:
+    thread = _cached_thread(answer_id)
+    return [{"role": m["role"], "message": m["message"], "created_at": m["created_at"]} for m in thread]
+
+def _append(answer_id: str, receipt_id: str, role: str, message: str) -> None:
+    store_assistant_message(answer_id, receipt_id, role, message)
+    now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
+    _THREADS.append(answer_id, {"role": role, "message": message, "created_at": now, "tokens": _prompt_tokens(message)})
 
 def append_user_message(answer_id: str, receipt_id: str, message: str) -> None:
-    store_assistant_message(answer_id, receipt_id, "user", message)
+    _append(answer_id, receipt_id, "user", message)
 
 def append_assistant_message(answer_id: str, receipt_id: str, message: str) -> None:
-    store_assistant_message(answer_id, receipt_id, "assistant", message)
-
-def build_assistant_prompt(system_prompt: str, sovereign_answer: str, thread: List[Dict[str, Any]], new_user_message: str) -> str:
-    lines: List[str] = [system_prompt, "\nSOVEREIGN ANSWER:\n", sovereign_answer, "\nTHREAD:\n"]
-    for msg in thread:
-        lines.append(f"{msg['role'].upper()}: {msg['message']}\n")
-    lines.append(f"USER: {new_user_message}\nASSISTANT:")
-    return "".join(lines)
-
-def generate_assistant_reply(answer_id: str, receipt_id: str, sovereign_answer: str, new_user_message: str) -> str:
-    thread = list_thread_messages(answer_id)
-    prompt = build_assistant_prompt(get_assistant_system_prompt(), sovereign_answer, thread, new_user_message)
-    reply = run_model_for_task(task_type="discussion", prompt=prompt)
+    _append(answer_id, receipt_id, "assistant", message)
+
+def _omission_marker(count: int) -> str:
+    return f"[{count} earlier message(s) omitted to fit the context window]\n"
+
+def _window_thread(thread: List[Dict[str, Any]], budget: int) -> List[str]:
+    """Newest turns verbatim while they fit; the first turn that does not fit is truncated to the
+    remaining budget, and everything older collapses into a single omission marker. Prefixes and
+    the marker are charged before truncating, so the returned lines never cost more than `budget`."""
+    kept: List[str] = []
+    for i in range(len(thread) - 1, -1, -1):
+        msg = thread[i]
+        prefix = f"{msg['role'].upper()}: "
+        cost = msg.get("tokens")
+        cost = (cost if cost is not None else _prompt_tokens(msg["message"])) + _prompt_tokens(prefix) + 1  # + newline
+        if cost <= budget:
+            kept.append(f"{prefix}{msg['message']}\n")
+            budget -= cost
+            continue
+        omitted = i + 1
+        room = budget - _prompt_tokens(prefix) - _prompt_tokens(" [...]\n") - (_prompt_tokens(_omission_marker(i)) if i else 0)
+        if room >= 8:
+            kept.append(f"{prefix}{_truncate_to_tokens(msg['message'], room)} [...]\n")
+            omitted = i
+        if omitted and _prompt_tokens(_omission_marker(omitted)) <= budget:  # reserved above when truncating
+            kept.append(_omission_marker(omitted))
+        break
+    kept.reverse()
+    return kept
+
+def build_assistant_prompt(
+    system_prompt: str,
+    sovereign_answer: str,
+    thread: List[Dict[str, Any]],
+    new_user_message: str,
+    max_prompt_tokens: Optional[int] = None,
+) -> str:
+    """System prompt, sovereign answer and the new message are always kept whole; with
+    `max_prompt_tokens` the thread is windowed to whatever budget remains."""
+    head: List[str] = [system_prompt, "\nSOVEREIGN ANSWER:\n", sovereign_answer, "\nTHREAD:\n"]
+    tail = f"USER: {new_user_message}\nASSISTANT:"
+    if max_prompt_tokens is None:
+        body = [f"{msg['role'].upper()}: {msg['message']}\n" for msg in thread]
+    else:
+        fixed = sum(_prompt_tokens(p) for p in head) + _prompt_tokens(tail)
+        body = _window_thread(thread, max(max_prompt_tokens - fixed, 0))
+    return "".join(head + body + [tail])
+
+def generate_assistant_reply(
+    answer_id: str,
+    receipt_id: str,
+    sovereign_answer: str,
+    new_user_message: str,
+    on_chunk: Optional[Callable[[str], None]] = None,
+) -> str:
+    thread = _cached_thread(answer_id)
+    budget = model_context_window("discussion") - REPLY_TOKEN_RESERVE
+    prompt = build_assistant_prompt(get_assistant_system_prompt(), sovereign_answer, thread, new_user_message, max_prompt_tokens=budget)
+    result = run_model_for_task(task_type="discussion", prompt=prompt, on_chunk=on_chunk)
+    reply = result.get("text", "")
     append_assistant_message(answer_id, receipt_id, reply)
     return reply
@@ -1,15 +1,28 @@
 # agi/core/drift_detector.py
 from __future__ import annotations
-import hashlib, sqlite3
+import functools, hashlib, os, sqlite3, threading
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 
 DB_PATH = Path(__file__).resolve().parent / "drift_store.sqlite"
 FILES_TO_TRACK = [
     "SOVEREIGN_MODEL_POLICY.md",
     "agi/core/model_stack.yaml",
+    "agi/core/policy_rules.yaml",
 ]
 
+# (size, mtime_ns, inode): a file is only re-hashed when this changes
+StatKey = Tuple[int, int, int]
+
+_LOCK = threading.Lock()
+_HASHES: Dict[str, Tuple[StatKey, str]] = {}
+_BASELINE: Dict[str, str] = {}
+_BASELINE_STAT: Optional[StatKey] = None
+_WATCHER: Optional["DriftWatcher"] = None
+
+def _stat_key(st: os.stat_result) -> StatKey:
+    return (st.st_size, st.st_mtime_ns, st.st_ino)
+
 def sha256_file(path: Path) -> str:
     h = hashlib.sha256()
     with path.open("rb") as f:
@@ -17,6 +30,45 @@ def sha256_file(path: Path) -> str:
             h.update(chunk)
     return h.hexdigest()
 
+def hash_file_cached(path: Path) -> Optional[str]:
+    """sha256 of `path`, served from the in-process cache while its stat is unchanged. None if missing."""
+    try:
+        key = _stat_key(path.stat())
+    except FileNotFoundError:
+        return None
+    sp = str(path)
+    with _LOCK:
+        hit = _HASHES.get(sp)
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    h = sha256_file(path)
+    with _LOCK:
+        _HASHES[sp] = (key, h)
+    return h
+
+def _baseline_hashes() -> Dict[str, str]:
+    # Recorded hashes, reloaded only when drift_store.sqlite itself changes (e.g. another process re-baselined).
+    global _BASELINE, _BASELINE_STAT
+    key = _stat_key(DB_PATH.stat()) if DB_PATH.exists() else None
+    with _LOCK:
+        if key is not None and key == _BASELINE_STAT:
+            return _BASELINE
+    conn = sqlite3.connect(DB_PATH)
+    try:
+        rows = conn.execute("SELECT path, hash FROM file_hashes").fetchall()
+    except sqlite3.OperationalError:  # no baseline recorded yet: nothing to drift from
+        rows = []
+    finally:
+        conn.close()
+    with _LOCK:
+        _BASELINE = {p: h for p, h in rows}
+        _BASELINE_STAT = key
+        return _BASELINE
+
+@functools.lru_cache(maxsize=8)
+def _tracked_paths(root: Path) -> Tuple[Path, ...]:
+    return tuple((root / rel).resolve() for rel in FILES_TO_TRACK)
+
 def init_db() -> None:
     conn = sqlite3.connect(DB_PATH)
     cur = conn.cursor()
@@ -32,14 +84,14 @@ def init_db() -> None:
     conn.commit(); conn.close()
 
 def record_hashes(root: Path) -> None:
+    global _BASELINE_STAT
     from datetime import datetime
     conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
     now = datetime.utcnow().isoformat() + "Z"
-    for rel in FILES_TO_TRACK:
-        p = (root / rel).resolve()
-        if not p.exists():
+    for p in _tracked_paths(root):
+        h = hash_file_cached(p)
+        if h is None:
             continue
-        h = sha256_file(p)
         cur.execute(
             """
             INSERT INTO file_hashes (path, hash, updated_at)
@@ -49,22 +101,66 @@ def record_hashes(root: Path) -> None:
             (str(p), h, now),
         )
     conn.commit(); conn.close()
+    with _LOCK:
+        _BASELINE_STAT = None  # force reload on next check
 
-def detect_drift(root: Path) -> List[Dict]:
-    conn = sqlite3.connect(DB_PATH); cur = conn.cursor()
+def compute_drift(root: Path) -> List[Dict]:
+    """Stat-gated drift check: touches the disk for a stat per tracked file unless something changed."""
+    baseline = _baseline_hashes()
     drifts: List[Dict] = []
-    for rel in FILES_TO_TRACK:
-        p = (root / rel).resolve()
-        if not p.exists():
+    for p in _tracked_paths(root):
+        current = hash_file_cached(p)
+        if current is None:
             continue
-        current = sha256_file(p)
-        cur.execute("SELECT hash FROM file_hashes WHERE path = ?", (str(p),))
-        row = cur.fetchone()
-        if row and row[0] != current:
-            drifts.append({"path": str(p), "old_hash": row[0], "new_hash": current})
-    conn.close()
+        old = baseline.get(str(p))
+        if old and old != current:
+            drifts.append({"path": str(p), "old_hash": old, "new_hash": current})
     return drifts
 
+def detect_drift(root: Path) -> List[Dict]:
+    watcher = _WATCHER
+    if watcher is not None and watcher.root == root and watcher.is_alive():
+        return watcher.snapshot()
+    return compute_drift(root)
+
+class DriftWatcher(threading.Thread):
+    """Optional background refresher: keeps drift state current so detect_drift() is a list copy.
+    State can lag a file edit by at most `interval_s`.
+    """
+
+    def __init__(self, root: Path, interval_s: float = 1.0):
+        super().__init__(name="drift-watcher", daemon=True)
+        self.root = root
+        self.interval_s = interval_s
+        self._stop_event = threading.Event()
+        self._state: List[Dict] = compute_drift(root)
+
+    def snapshot(self) -> List[Dict]:
+        return list(self._state)
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            try:
+                self._state = compute_drift(self.root)
+            except Exception as e:  # keep last known state, report and retry next tick
+                print(f"[DRIFT] watcher refresh failed: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+def start_watcher(root: Path, interval_s: float = 1.0) -> DriftWatcher:
+    global _WATCHER
+    stop_watcher()
+    _WATCHER = DriftWatcher(root, interval_s)
+    _WATCHER.start()
+    return _WATCHER
+
+def stop_watcher() -> None:
+    global _WATCHER
+    if _WATCHER is not None:
+        _WATCHER.stop()
+        _WATCHER = None
+
 def baseline(root: Path) -> None:
     init_db(); record_hashes(root)
     print(f"[DRIFT] Baseline recorded for {len(FILES_TO_TRACK)} files under {root}")
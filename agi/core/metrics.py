@@ -0,0 +1,192 @@
+# agi/core/metrics.py
+"""Model call metrics aggregated from ModelReceipt telemetry (v0.1d).
+Every generate() outcome is recorded per (provider, model_id, task_type): request/error counters,
+a latency histogram, rolling latency and tokens/sec quantiles, token and spend totals.
+Exposed in Prometheus text exposition format over a local HTTP endpoint and/or a snapshot file
+(node_exporter textfile-collector style).
+"""
+from __future__ import annotations
+
+import math
+import os
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Tuple
+
+LATENCY_BUCKETS_MS: Tuple[float, ...] = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000)
+QUANTILES: Tuple[float, ...] = (0.5, 0.9, 0.99)
+WINDOW = 1024  # recent samples kept per series for quantiles
+
+LabelKey = Tuple[str, str, str]  # (provider, model_id, task_type)
+
+@dataclass
+class _Series:
+    requests: Dict[str, int] = field(default_factory=dict)  # status -> count
+    cache_hits: int = 0
+    latency_buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS_MS))
+    latency_sum_ms: float = 0.0
+    latency_count: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+    latency_window: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+    tps_window: Deque[float] = field(default_factory=lambda: deque(maxlen=WINDOW))
+
+def _quantile(samples: List[float], q: float) -> float:
+    if not samples:
+        return float("nan")
+    ordered = sorted(samples)
+    return ordered[min(int(q * len(ordered)), len(ordered) - 1)]
+
+def _num(v: float) -> str:
+    return "NaN" if math.isnan(v) else f"{v:.3f}"
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(key: LabelKey, **extra: str) -> str:
+    pairs = [("provider", key[0]), ("model_id", key[1]), ("task_type", key[2])] + list(extra.items())
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in pairs) + "}"
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._series: Dict[LabelKey, _Series] = {}
+
+    def record(self, task_type: str, receipt: Any) -> None:
+        key: LabelKey = (str(receipt.provider), str(receipt.model_id), task_type)
+        latency = float(receipt.latency_ms)
+        tps = getattr(receipt, "tokens_per_sec", None)
+        if tps is None and receipt.status == "success" and latency > 0 and not getattr(receipt, "cache_hit", False):
+            tps = receipt.output_tokens / (latency / 1000)  # blocking call: prefill + decode
+        with self._lock:
+            s = self._series.setdefault(key, _Series())
+            s.requests[receipt.status] = s.requests.get(receipt.status, 0) + 1
+            s.cache_hits += bool(getattr(receipt, "cache_hit", False))
+            for i, bound in enumerate(LATENCY_BUCKETS_MS):
+                if latency <= bound:
+                    s.latency_buckets[i] += 1
+            s.latency_sum_ms += latency
+            s.latency_count += 1
+            s.input_tokens += receipt.input_tokens
+            s.output_tokens += receipt.output_tokens
+            s.cost_usd += receipt.cost_usd
+            s.latency_window.append(latency)
+            if tps is not None:
+                s.tps_window.append(float(tps))
+
+    def snapshot(self) -> Dict[LabelKey, Dict[str, Any]]:
+        with self._lock:
+            out: Dict[LabelKey, Dict[str, Any]] = {}
+            for key, s in self._series.items():
+                total = sum(s.requests.values())
+                lat, tps = list(s.latency_window), list(s.tps_window)
+                out[key] = {
+                    "requests": dict(s.requests),
+                    "error_rate": (total - s.requests.get("success", 0)) / total if total else 0.0,
+                    "cache_hits": s.cache_hits,
+                    "latency_buckets": list(s.latency_buckets),
+                    "latency_sum_ms": s.latency_sum_ms,
+                    "latency_count": s.latency_count,
+                    "latency_ms": {q: _quantile(lat, q) for q in QUANTILES},
+                    "tokens_per_sec": {q: _quantile(tps, q) for q in QUANTILES},
+                    "input_tokens": s.input_tokens,
+                    "output_tokens": s.output_tokens,
+                    "cost_usd": s.cost_usd,
+                }
+            return out
+
+    def render_prometheus(self) -> str:
+        snap = self.snapshot()
+        lines: List[str] = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        family("sovereign_model_requests_total", "counter", "generate() calls by outcome status.")
+        for key, d in snap.items():
+            for status, n in sorted(d["requests"].items()):
+                lines.append(f"sovereign_model_requests_total{_labels(key, status=status)} {n}")
+        family("sovereign_model_cache_hits_total", "counter", "generate() calls served from the response cache.")
+        for key, d in snap.items():
+            lines.append(f"sovereign_model_cache_hits_total{_labels(key)} {d['cache_hits']}")
+        family("sovereign_model_error_ratio", "gauge", "Share of non-success generate() outcomes.")
+        for key, d in snap.items():
+            lines.append(f"sovereign_model_error_ratio{_labels(key)} {d['error_rate']:.6f}")
+        family("sovereign_model_latency_ms", "histogram", "End-to-end generate() latency in milliseconds.")
+        for key, d in snap.items():
+            for bound, n in zip(LATENCY_BUCKETS_MS, d["latency_buckets"]):
+                lines.append(f"sovereign_model_latency_ms_bucket{_labels(key, le=f'{bound:g}')} {n}")
+            lines.append(f"sovereign_model_latency_ms_bucket{_labels(key, le='+Inf')} {d['latency_count']}")
+            lines.append(f"sovereign_model_latency_ms_sum{_labels(key)} {d['latency_sum_ms']:.3f}")
+            lines.append(f"sovereign_model_latency_ms_count{_labels(key)} {d['latency_count']}")
+        family("sovereign_model_latency_window_ms", "summary", f"Latency quantiles over the last {WINDOW} calls.")
+        for key, d in snap.items():
+            for q, v in d["latency_ms"].items():
+                lines.append(f"sovereign_model_latency_window_ms{_labels(key, quantile=f'{q:g}')} {_num(v)}")
+        family("sovereign_model_tokens_per_second", "summary", f"Output tokens/sec quantiles over the last {WINDOW} calls.")
+        for key, d in snap.items():
+            for q, v in d["tokens_per_sec"].items():
+                lines.append(f"sovereign_model_tokens_per_second{_labels(key, quantile=f'{q:g}')} {_num(v)}")
+        family("sovereign_model_tokens_total", "counter", "Input/output tokens consumed.")
+        for key, d in snap.items():
+            lines.append(f"sovereign_model_tokens_total{_labels(key, direction='input')} {d['input_tokens']}")
+            lines.append(f"sovereign_model_tokens_total{_labels(key, direction='output')} {d['output_tokens']}")
+        family("sovereign_model_cost_usd_total", "counter", "Estimated spend in USD.")
+        for key, d in snap.items():
+            lines.append(f"sovereign_model_cost_usd_total{_labels(key)} {d['cost_usd']:.6f}")
+        return "\n".join(lines) + "\n"
+
+    def write_snapshot(self, path: Path) -> None:
+        """Atomically replace `path` with the current exposition text."""
+        tmp = path.with_suffix(path.suffix + ".tmp")
+        tmp.write_text(self.render_prometheus(), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+REGISTRY = MetricsRegistry()
+
+def record(task_type: str, receipt: Any) -> None:
+    REGISTRY.record(task_type, receipt)
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:  # noqa: N802
+        if self.path.rstrip("/") not in ("/metrics", ""):
+            self.send_error(404)
+            return
+        body = REGISTRY.render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args: Any) -> None:
+        pass
+
+def serve(port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve /metrics from a daemon thread; returns the server (call .shutdown() to stop)."""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+def start_snapshot_writer(path: Path, interval_s: float = 15.0) -> threading.Event:
+    """Rewrite `path` every `interval_s`; set the returned event to stop."""
+    stop = threading.Event()
+
+    def loop() -> None:
+        while not stop.wait(interval_s):
+            try:
+                REGISTRY.write_snapshot(path)
+            except OSError as e:
+                print(f"[METRICS] snapshot write failed: {e}")
+
+    threading.Thread(target=loop, name="metrics-snapshot", daemon=True).start()
+    return stop
@@ -0,0 +1,160 @@
+# agi/core/model_health.py
+"""Live health table for routing candidates (v0.1d).
+Each model key keeps a rolling window of recent call outcomes (latency, success) and a circuit
+breaker: after `failure_threshold` consecutive failures the key is skipped for `cooldown_s`, then a
+single probe call is let through (half-open) and its outcome closes or re-opens the breaker.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+@dataclass
+class HealthConfig:
+    window: int = 50               # recent calls kept per model key
+    min_samples: int = 5           # below this, rolling stats do not demote a candidate
+    max_error_rate: float = 0.5    # rolling error rate above which a candidate is demoted
+    slow_ms: Optional[float] = 20000.0  # rolling p50 above which a candidate is demoted (None = off)
+    failure_threshold: int = 3     # consecutive failures that open the breaker
+    cooldown_s: float = 30.0       # how long an open breaker skips the key
+
+def config_from_dict(raw: Optional[Dict[str, Any]]) -> HealthConfig:
+    raw = raw or {}
+    base = HealthConfig()
+    slow = raw.get("slow_ms", base.slow_ms)
+    return HealthConfig(
+        window=int(raw.get("window", base.window)),
+        min_samples=int(raw.get("min_samples", base.min_samples)),
+        max_error_rate=float(raw.get("max_error_rate", base.max_error_rate)),
+        slow_ms=float(slow) if slow is not None else None,
+        failure_threshold=int(raw.get("failure_threshold", base.failure_threshold)),
+        cooldown_s=float(raw.get("cooldown_s", base.cooldown_s)),
+    )
+
+@dataclass
+class _KeyHealth:
+    samples: Deque[Tuple[float, bool]] = field(default_factory=deque)  # (latency_ms, ok)
+    consecutive_failures: int = 0
+    opened_at: Optional[float] = None  # breaker open since (monotonic)
+    probe_at: Optional[float] = None   # half-open probe in flight since (stale after a cool-down)
+
+class HealthTable:
+    def __init__(self, cfg: Optional[HealthConfig] = None):
+        self.cfg = cfg or HealthConfig()
+        self._keys: Dict[str, _KeyHealth] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, cfg: HealthConfig) -> None:
+        with self._lock:
+            if cfg.window != self.cfg.window:
+                for st in self._keys.values():
+                    st.samples = deque(st.samples, maxlen=cfg.window)
+            self.cfg = cfg
+
+    def _state(self, key: str) -> _KeyHealth:
+        st = self._keys.get(key)
+        if st is None:
+            st = self._keys[key] = _KeyHealth(samples=deque(maxlen=self.cfg.window))
+        return st
+
+    def record(self, key: str, latency_ms: float, ok: bool) -> None:
+        with self._lock:
+            st = self._state(key)
+            st.samples.append((float(latency_ms), ok))
+            st.probe_at = None
+            if ok:
+                st.consecutive_failures = 0
+                st.opened_at = None
+            else:
+                st.consecutive_failures += 1
+                if st.opened_at is not None or st.consecutive_failures >= self.cfg.failure_threshold:
+                    st.opened_at = time.monotonic()  # failed probe re-opens for a full cool-down
+
+    def _open(self, st: Optional[_KeyHealth], now: float) -> bool:
+        if st is None or st.opened_at is None:
+            return False
+        if now - st.opened_at < self.cfg.cooldown_s:
+            return True
+        return st.probe_at is not None and now - st.probe_at < self.cfg.cooldown_s
+
+    def available(self, key: str) -> bool:
+        """False while the key's breaker is open (or its half-open probe is already taken)."""
+        with self._lock:
+            return not self._open(self._keys.get(key), time.monotonic())
+
+    def acquire(self, key: str) -> bool:
+        """Claim the key for one call; after a cool-down only one caller at a time gets the probe."""
+        with self._lock:
+            st = self._keys.get(key)
+            now = time.monotonic()
+            if self._open(st, now):
+                return False
+            if st is not None and st.opened_at is not None:
+                st.probe_at = now
+            return True
+
+    def release(self, key: str) -> None:
+        """Give back a claim without an outcome (the call was cancelled), freeing a half-open probe."""
+        with self._lock:
+            st = self._keys.get(key)
+            if st is not None:
+                st.probe_at = None
+
+    def _stats(self, st: _KeyHealth) -> Tuple[int, float, float]:
+        n = len(st.samples)
+        if not n:
+            return 0, 0.0, float("nan")
+        errors = sum(1 for _, ok in st.samples if not ok)
+        lat = sorted(l for l, ok in st.samples if ok)
+        p50 = lat[len(lat) // 2] if lat else float("nan")
+        return n, errors / n, p50
+
+    def degraded(self, key: str) -> bool:
+        with self._lock:
+            st = self._keys.get(key)
+            if st is None:
+                return False
+            n, err, p50 = self._stats(st)
+        if n < self.cfg.min_samples:
+            return False
+        return err > self.cfg.max_error_rate or (self.cfg.slow_ms is not None and p50 > self.cfg.slow_ms)
+
+    def latency_quantile(self, key: str, q: float) -> Optional[float]:
+        """Observed latency quantile of successful calls, or None below `min_samples`."""
+        with self._lock:
+            st = self._keys.get(key)
+            lat = sorted(l for l, ok in st.samples if ok) if st is not None else []
+        if len(lat) < self.cfg.min_samples:
+            return None
+        return lat[min(int(q * len(lat)), len(lat) - 1)]
+
+    def rank(self, keys: List[str]) -> Tuple[List[str], List[str]]:
+        """(usable keys in preference order, keys skipped by an open breaker).
+        Config order is kept; degraded keys move behind healthy ones."""
+        usable = [k for k in keys if self.available(k)]
+        skipped = [k for k in keys if k not in usable]
+        usable.sort(key=self.degraded)  # stable: config order within each group
+        return usable, skipped
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            out: Dict[str, Dict[str, Any]] = {}
+            for key, st in self._keys.items():
+                n, err, p50 = self._stats(st)
+                out[key] = {
+                    "samples": n,
+                    "error_rate": err,
+                    "p50_ms": p50,
+                    "consecutive_failures": st.consecutive_failures,
+                    "breaker": "closed" if st.opened_at is None else ("half-open" if st.probe_at is not None else "open"),
+                }
+            return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._keys.clear()
+
+HEALTH = HealthTable()
@@ -5,22 +5,26 @@ Provides forensic metadata (latency, token estimates, cost) for every model invo
 from __future__ import annotations
 
 from pathlib import Path
-from typing import Any, Dict, Literal, Tuple, Optional
-import requests, yaml, time, os
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Literal, Tuple, Optional
+import yaml, time, os, json, asyncio, contextlib, functools, queue, threading, weakref
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass, asdict
 
-# Optional Anthrop ic import (remote provider)
-try:
-    import anthropic  # type: ignore
-except Exception:  # pragma: no cover
-    anthropic = None  # fallback
+from .transport import anthropic, get_transport
+from .response_cache import cache_key, get_cache, stack_fingerprint
+from .drift_detector import hash_file_cached
+from . import metrics
+from .model_health import HEALTH, config_from_dict as health_config
 
 ROOT_DIR = Path(__file__).resolve().parent
 STACK_PATH = ROOT_DIR / "model_stack.yaml"
-_StackCache: Dict[str, Any] | None = None
 
 Sensitivity = Literal["normal", "high"]
 Provider = Literal["ollama", "cloud-llm", "anthropic"]
+ProviderSlot = Callable[[str], ContextManager[Any]]  # entered around one provider attempt
+
+def _no_slot(provider: str) -> ContextManager[Any]:
+    return contextlib.nullcontext()
 
 @dataclass
 class ModelReceipt:
@@ -31,9 +35,23 @@ class ModelReceipt:
     output_tokens: int
     latency_ms: int
     cost_usd: float
-    status: str  # success|error
+    status: str  # success|error|aborted
     raw_output: str
     error_msg: Optional[str] = None
+    transport: Optional[Dict[str, Any]] = None  # pool / connection reuse stats
+    # Streaming telemetry (None for blocking calls): prefill vs decode split
+    ttft_ms: Optional[int] = None
+    tokens_per_sec: Optional[float] = None
+    chunk_count: Optional[int] = None
+    # Response cache: hits are replayed output, never silently passed off as fresh calls
+    cache_hit: bool = False
+    cache_key: Optional[str] = None
+    cached_at: Optional[float] = None
+    # Routing: the model key that served the call, plus candidates tried / skipped by breakers
+    model_key: Optional[str] = None
+    routing: Optional[Dict[str, Any]] = None
+    # Hedged calls: delay used, whether the backup fired, which attempt won and the duplicated work
+    hedge: Optional[Dict[str, Any]] = None
 
 PRICING_PER_MILLION = {
     # Example pricing (update as needed)
@@ -45,29 +63,139 @@ PRICING_PER_MILLION = {
 class ModelRunnerError(Exception):
     pass
 
-def load_model_stack() -> Dict[str, Any]:
-    global _StackCache
-    if _StackCache is None:
-        if not STACK_PATH.exists():
-            raise ModelRunnerError(f"model_stack.yaml not found at {STACK_PATH}")
-        with STACK_PATH.open("r", encoding="utf-8") as f:
-            _StackCache = yaml.safe_load(f) or {}
-    return _StackCache
+LOCAL_PROVIDERS = {"ollama"}
+SENSITIVITIES: Tuple[Sensitivity, ...] = ("normal", "high")
 
-def resolve_model_key(task_type: str, sensitivity: Sensitivity) -> Tuple[str, Dict[str, Any]]:
-    stack = load_model_stack()
-    routing = stack.get("routing_rules", {})
+Candidates = Tuple[Tuple[str, Dict[str, Any]], ...]
+
+@dataclass(frozen=True)
+class CompiledStack:
+    """model_stack.yaml plus its routing flattened to (task_type, sensitivity) -> candidates.
+    Entries are a candidate tuple, or an error message for a rule naming an undefined model key
+    (raised on lookup, as before, so one bad rule does not break every other task)."""
+    raw: Dict[str, Any]
+    file_hash: Optional[str]
+    routes: Dict[Tuple[str, str], Any]
+    defaults: Dict[str, Any]
+
+def _candidate_keys(routing: Dict[str, Any], models: Dict[str, Any], keys: Any, sensitivity: str) -> List[str]:
     default_key = routing.get("default", "local_small")
-    key = routing.get("by_task_type", {}).get(task_type, default_key)
+    keys = [keys] if isinstance(keys, str) else list(keys)
     if sensitivity == "high":
         ov = routing.get("overrides", {}).get("high_sensitivity", {})
-        if not ov.get("allow_remote", True) and key == "remote_tier":
-            key = ov.get("fallback", default_key)
-    models = stack.get("models", {})
-    cfg = models.get(key)
-    if not cfg:
-        raise ModelRunnerError(f"Model key '{key}' not defined for task '{task_type}'")
-    return key, cfg
+        if not ov.get("allow_remote", True):
+            keys = [k for k in keys if (models.get(k) or {}).get("provider", "ollama") in LOCAL_PROVIDERS]
+            if not keys:
+                keys = [ov.get("fallback", default_key)]
+    return keys
+
+def _compile_entry(models: Dict[str, Any], keys: List[str], task_type: str) -> Any:
+    out: List[Tuple[str, Dict[str, Any]]] = []
+    for key in keys:
+        cfg = models.get(key)
+        if not cfg:
+            return f"Model key '{key}' not defined for task '{task_type}'"
+        out.append((key, cfg))
+    return tuple(out)
+
+def compile_stack(raw: Dict[str, Any], file_hash: Optional[str] = None) -> CompiledStack:
+    routing = raw.get("routing_rules", {})
+    models = raw.get("models", {})
+    default_key = routing.get("default", "local_small")
+    routes: Dict[Tuple[str, str], Any] = {}
+    defaults: Dict[str, Any] = {}
+    for sensitivity in SENSITIVITIES:
+        for task_type, keys in (routing.get("by_task_type") or {}).items():
+            routes[(task_type, sensitivity)] = _compile_entry(models, _candidate_keys(routing, models, keys, sensitivity), task_type)
+        defaults[sensitivity] = _compile_entry(models, _candidate_keys(routing, models, default_key, sensitivity), "<default>")
+    return CompiledStack(raw=raw, file_hash=file_hash, routes=routes, defaults=defaults)
+
+_STACK: Optional[CompiledStack] = None
+_STACK_REJECTED: Optional[str] = None  # hash of a version that failed to load (not retried)
+_STACK_LOCK = threading.Lock()
+
+def compiled_stack() -> CompiledStack:
+    """Current compiled stack. A stat check per call (via the drift detector's hash cache); the file
+    is re-read and recompiled only when its content hash changes, then swapped in atomically. A
+    reload that fails to parse keeps serving the previous table."""
+    global _STACK, _STACK_REJECTED
+    current = hash_file_cached(STACK_PATH)
+    stack = _STACK
+    if stack is not None and current in (stack.file_hash, _STACK_REJECTED):
+        return stack
+    with _STACK_LOCK:
+        if _STACK is not None and current in (_STACK.file_hash, _STACK_REJECTED):
+            return _STACK
+        if current is None:
+            if _STACK is None:
+                raise ModelRunnerError(f"model_stack.yaml not found at {STACK_PATH}")
+            print(f"[MODEL_STACK] {STACK_PATH} missing; keeping previous routing table")
+            return _STACK
+        try:
+            with STACK_PATH.open("r", encoding="utf-8") as f:
+                raw = yaml.safe_load(f) or {}
+            new = compile_stack(raw, current)
+        except Exception as e:
+            if _STACK is None:
+                raise ModelRunnerError(f"Invalid model_stack.yaml: {e}") from e
+            print(f"[MODEL_STACK] reload failed, keeping previous routing table: {e}")
+            _STACK_REJECTED = current
+            return _STACK
+        _STACK = new
+        return new
+
+def load_model_stack() -> Dict[str, Any]:
+    return compiled_stack().raw
+
+def resolve_candidates(task_type: str, sensitivity: Sensitivity) -> List[Tuple[str, Dict[str, Any]]]:
+    """Eligible model keys for a task, in routing-rule order (O(1) lookup in the compiled table).
+    `by_task_type` values may be a single key or an ordered list; under high sensitivity with
+    allow_remote false, non-local providers are dropped and the override's fallback is used if
+    nothing local remains."""
+    stack = compiled_stack()
+    entry = stack.routes.get((task_type, sensitivity))
+    if entry is None:
+        entry = stack.defaults.get(sensitivity, stack.defaults["normal"])
+    if isinstance(entry, str):
+        raise ModelRunnerError(entry)
+    return list(entry)
+
+def resolve_model_key(task_type: str, sensitivity: Sensitivity) -> Tuple[str, Dict[str, Any]]:
+    """Primary (first) candidate for a task, ignoring live health."""
+    return resolve_candidates(task_type, sensitivity)[0]
+
+_HEALTH_RAW: Any = None
+
+def _health() -> Any:
+    global _HEALTH_RAW
+    raw = load_model_stack().get("health")
+    if raw is not _HEALTH_RAW:
+        HEALTH.configure(health_config(raw))
+        _HEALTH_RAW = raw
+    return HEALTH
+
+def route(task_type: str, sensitivity: Sensitivity) -> Tuple[List[Tuple[str, Dict[str, Any]]], List[str]]:
+    """Candidates ranked by live health (breaker-open keys removed), and the keys that were skipped."""
+    candidates = resolve_candidates(task_type, sensitivity)
+    usable, skipped = _health().rank([k for k, _ in candidates])
+    by_key = dict(candidates)
+    return [(k, by_key[k]) for k in usable], skipped
+
+def _no_route_receipt(task_type: str, sensitivity: Sensitivity, routing: Dict[str, Any]) -> ModelReceipt:
+    key, cfg = resolve_model_key(task_type, sensitivity)
+    return ModelReceipt(
+        timestamp=time.time(), model_id=cfg.get("id"), provider=cfg.get("provider", "ollama"),
+        input_tokens=0, output_tokens=0, latency_ms=0, cost_usd=0.0, status="error", raw_output="",
+        error_msg=f"No available model for task '{task_type}': circuit open for {', '.join(routing['skipped'])}",
+        model_key=key, routing=routing,
+    )
+
+DEFAULT_CONTEXT_WINDOW = 4096
+
+def model_context_window(task_type: str, sensitivity: Sensitivity = "normal") -> int:
+    """Smallest context limit (tokens) among the task's candidates, since failover or hedging may
+    hand the prompt to any of them; `context_window` in model_stack.yaml."""
+    return min(int(cfg.get("context_window", DEFAULT_CONTEXT_WINDOW)) for _, cfg in resolve_candidates(task_type, sensitivity))
 
 def _estimate_tokens(text: str) -> int:
     # Rough heuristic: 1 token ? 4 chars or split by spaces; choose smaller for safety
@@ -82,36 +210,127 @@ def _calc_cost(model_id: str, input_toks: int, output_toks: int) -> float:
     cost = (input_toks / 1_000_000 * pricing["input"]) + (output_toks / 1_000_000 * pricing["output"])
     return round(cost, 6)
 
-def call_ollama(model_id: str, prompt: str, **kwargs: Any) -> str:
-    url = "http://localhost:11434/api/generate"
+def _transport_cfg(provider: str) -> Dict[str, Any]:
+    return (load_model_stack().get("transport") or {}).get(provider) or {}
+
+def call_ollama(model_id: str, prompt: str, timeout_s: Optional[float] = None, **kwargs: Any) -> Dict[str, Any]:
+    transport = get_transport("ollama", _transport_cfg("ollama"))
     payload = {"model": model_id, "prompt": prompt, "stream": False}
     payload.update(kwargs)
-    resp = requests.post(url, json=payload, timeout=120)
+    resp, stats = transport.post("/api/generate", payload, timeout_s=timeout_s)
     if resp.status_code != 200:
         raise ModelRunnerError(f"Ollama HTTP {resp.status_code}: {resp.text}")
     data = resp.json()
-    return (data.get("response") or data.get("output") or "").strip()
+    return {"text": (data.get("response") or data.get("output") or "").strip(), "transport": stats}
 
-def call_anthropic(model_id: str, prompt: str, system: str, max_tokens: int = 1024, temperature: float = 0.0) -> Dict[str, Any]:
+def call_anthropic(model_id: str, prompt: str, system: str, max_tokens: int = 1024, temperature: float = 0.0, timeout_s: Optional[float] = None) -> Dict[str, Any]:
     if anthropic is None:
         raise ModelRunnerError("Anthropic library not available")
     api_key = os.getenv("ANTHROPIC_API_KEY")
     if not api_key:
         raise ModelRunnerError("ANTHROPIC_API_KEY missing from environment")
-    client = anthropic.Anthropic(api_key=api_key)
+    transport = get_transport("anthropic", _transport_cfg("anthropic"))
+    client, stats = transport.client(api_key)
     resp = client.messages.create(
         model=model_id,
         max_tokens=max_tokens,
         temperature=temperature,
         system=system,
         messages=[{"role": "user", "content": prompt}],
+        timeout=timeout_s or transport.cfg.timeout_s,
     )
     return {
         "text": resp.content[0].text if resp.content else "",
         "input_tokens": getattr(resp.usage, "input_tokens", 0),
         "output_tokens": getattr(resp.usage, "output_tokens", 0),
+        "transport": stats,
     }
 
+def stream_ollama(model_id: str, prompt: str, meta: Dict[str, Any], timeout_s: Optional[float] = None, **kwargs: Any) -> Iterator[str]:
+    """Yield text pieces from Ollama's NDJSON stream; token counts / transport stats land in `meta`."""
+    transport = get_transport("ollama", _transport_cfg("ollama"))
+    payload = {"model": model_id, "prompt": prompt, "stream": True}
+    payload.update(kwargs)
+    resp, meta["transport"] = transport.post("/api/generate", payload, timeout_s=timeout_s, stream=True)
+    meta["closer"] = resp.close  # lets StreamingGeneration.cancel() unblock a pending read
+    try:
+        if resp.status_code != 200:
+            raise ModelRunnerError(f"Ollama HTTP {resp.status_code}: {resp.text}")
+        for line in resp.iter_lines():
+            if not line:
+                continue
+            data = json.loads(line)
+            if data.get("error"):
+                raise ModelRunnerError(f"Ollama stream error: {data['error']}")
+            piece = data.get("response") or ""
+            if piece:
+                yield piece
+            if data.get("done"):
+                meta["input_tokens"] = data.get("prompt_eval_count")
+                meta["output_tokens"] = data.get("eval_count")
+                break
+    finally:
+        resp.close()
+
+def stream_anthropic(model_id: str, prompt: str, system: str, meta: Dict[str, Any], max_tokens: int = 1024, temperature: float = 0.0, timeout_s: Optional[float] = None) -> Iterator[str]:
+    if anthropic is None:
+        raise ModelRunnerError("Anthropic library not available")
+    api_key = os.getenv("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise ModelRunnerError("ANTHROPIC_API_KEY missing from environment")
+    transport = get_transport("anthropic", _transport_cfg("anthropic"))
+    client, meta["transport"] = transport.client(api_key)
+    with client.messages.stream(
+        model=model_id,
+        max_tokens=max_tokens,
+        temperature=temperature,
+        system=system,
+        messages=[{"role": "user", "content": prompt}],
+        timeout=timeout_s or transport.cfg.timeout_s,
+    ) as stream:
+        meta["closer"] = stream.close
+        for piece in stream.text_stream:
+            yield piece
+        final = stream.get_final_message()
+        meta["input_tokens"] = getattr(final.usage, "input_tokens", 0)
+        meta["output_tokens"] = getattr(final.usage, "output_tokens", 0)
+
+def _cache_lookup(provider: str, model_id: str, prompt: str, system_prompt: Optional[str], max_tokens: int, temperature: float) -> Tuple[Any, Optional[str], Optional[Dict[str, Any]]]:
+    """Only temperature-0 calls are deterministic enough to cache."""
+    if temperature != 0.0:
+        return None, None, None
+    cache = get_cache(load_model_stack().get("cache"))
+    if cache is None:
+        return None, None, None
+    key = cache_key(provider, model_id, prompt, system_prompt, {"max_tokens": max_tokens, "temperature": temperature})
+    return cache, key, cache.get(key, stack_fingerprint())
+
+def _cache_store(cache: Any, key: Optional[str], receipt: ModelReceipt) -> None:
+    if cache is None or key is None or receipt.status != "success" or not receipt.raw_output:
+        return
+    cache.put(key, stack_fingerprint(), {
+        "raw_output": receipt.raw_output,
+        "input_tokens": receipt.input_tokens,
+        "output_tokens": receipt.output_tokens,
+        "cached_at": receipt.timestamp,
+    })
+
+def _cached_receipt(start: float, model_id: str, provider: str, key: str, hit: Dict[str, Any]) -> ModelReceipt:
+    return ModelReceipt(
+        timestamp=time.time(),
+        model_id=model_id,
+        provider=provider,
+        input_tokens=hit["input_tokens"],
+        output_tokens=hit["output_tokens"],
+        latency_ms=int((time.time() - start) * 1000),
+        cost_usd=0.0,
+        status="success",
+        raw_output=hit["raw_output"],
+        cache_hit=True,
+        cache_key=key,
+        cached_at=hit.get("cached_at"),
+    )
+
 def generate(
     task_type: str,
     prompt: str,
@@ -119,14 +338,181 @@ def generate(
     system_prompt: Optional[str] = None,
     max_tokens: int = 1024,
     temperature: float = 0.0,
+    timeout_s: Optional[float] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    stop_when: Optional[Callable[[str], bool]] = None,
+    hedge: Optional[bool] = None,
+    provider_slot: Optional[ProviderSlot] = None,
+) -> ModelReceipt:
+    """Blocking model call. With `on_chunk` / `stop_when` the call streams: each piece is checked by
+    `stop_when` (True closes the stream, receipt status "aborted") and otherwise passed to `on_chunk`.
+    `hedge` (default: the stack's hedging.enabled) races a backup candidate against a slow primary;
+    it applies to non-streaming calls only: streamed chunks cannot be taken back, and `stop_when` is
+    usually a stateful scanner that cannot be fed two racing streams. Callers that only need
+    validation of the final text (e.g. run_specialist without on_chunk) should leave both unset so
+    they keep hedging.
+    `provider_slot(provider)`, if given, is entered around every provider attempt (failover and
+    hedges included); generate_async uses it to hold that provider's concurrency slot.
+    """
+    if on_chunk is not None or stop_when is not None:
+        stream = StreamingGeneration(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s, slot=provider_slot)
+        for piece in stream:
+            if stop_when is not None and stop_when(piece):
+                stream.close()
+                break
+            if on_chunk is not None:
+                on_chunk(piece)
+        return stream.receipt  # type: ignore[return-value]
+    hcfg = load_model_stack().get("hedging") or {}
+    if hedge if hedge is not None else hcfg.get("enabled", False):
+        ranked, skipped = route(task_type, sensitivity)
+        if len(ranked) >= 2:
+            return _generate_hedged(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s, ranked, skipped, hcfg, provider_slot)
+    return _generate_blocking(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s, provider_slot)
+
+DEFAULT_HEDGE_PERCENTILE = 0.95
+DEFAULT_HEDGE_DELAY_MS = 2000.0
+
+def _drain(stream: "StreamingGeneration", done: "queue.Queue[str]", tag: str) -> None:
+    try:
+        for _ in stream:
+            if stream.cancelled:
+                stream.close()
+                break
+    finally:
+        done.put(tag)
+
+def _generate_hedged(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    timeout_s: Optional[float],
+    ranked: List[Tuple[str, Dict[str, Any]]],
+    skipped: List[str],
+    hcfg: Dict[str, Any],
+    provider_slot: Optional[ProviderSlot] = None,
+) -> ModelReceipt:
+    """Primary on ranked[0]; if it has not succeeded within its observed latency percentile (or fails
+    first), the same prompt goes to ranked[1]. First success wins and the other stream is cancelled.
+    Both candidates already passed sensitivity filtering, so a hedge never reaches a barred remote."""
+    pct = float(hcfg.get("percentile", DEFAULT_HEDGE_PERCENTILE))
+    observed = _health().latency_quantile(ranked[0][0], pct)
+    delay_ms = observed if observed is not None else float(hcfg.get("default_delay_ms", DEFAULT_HEDGE_DELAY_MS))
+    done: "queue.Queue[str]" = queue.Queue()
+    streams: Dict[str, StreamingGeneration] = {}
+    launched_at: Dict[str, float] = {}
+
+    def launch(tag: str, candidate: Tuple[str, Dict[str, Any]]) -> None:
+        streams[tag] = StreamingGeneration(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s,
+                                           candidates=[candidate], slot=provider_slot)
+        launched_at[tag] = time.time()
+        threading.Thread(target=_drain, args=(streams[tag], done, tag), name=f"hedge-{tag}", daemon=True).start()
+
+    launch("primary", ranked[0])
+    winner: Optional[str] = None
+    finished: List[str] = []
+    try:
+        first = done.get(timeout=delay_ms / 1000)
+        finished.append(first)
+        if streams[first].receipt.status == "success":  # type: ignore[union-attr]
+            winner = first
+    except queue.Empty:
+        pass
+    if winner is None:
+        launch("secondary", ranked[1])
+        while winner is None and len(finished) < 2:
+            tag = done.get()
+            finished.append(tag)
+            if streams[tag].receipt.status == "success":  # type: ignore[union-attr]
+                winner = tag
+    decided_at = time.time()
+    chosen = winner or finished[-1]
+    receipt: ModelReceipt = streams[chosen].receipt  # type: ignore[assignment]
+    hedge: Dict[str, Any] = {"delay_ms": round(delay_ms, 1), "percentile": pct, "observed": observed is not None,
+                             "fired": "secondary" in streams, "winner": winner, "overhead_ms": 0}
+    attempts: List[Dict[str, Any]] = []
+    for tag, stream in streams.items():
+        r = stream.receipt
+        if tag not in finished:
+            stream.cancel()
+        if tag != chosen and hedge["fired"]:
+            # duplicated work: both attempts in flight, from the backup's launch until the race was decided
+            ended = launched_at[tag] + r.latency_ms / 1000 if r is not None else decided_at
+            hedge["overhead_ms"] = max(0, int((min(decided_at, ended) - launched_at["secondary"]) * 1000))
+        attempts.append({"model_key": stream._candidates[0][0], "role": tag,  # type: ignore[index]
+                         "status": r.status if r is not None else "cancelled",
+                         "latency_ms": r.latency_ms if r is not None else int((decided_at - launched_at[tag]) * 1000),
+                         "error": r.error_msg if r is not None else None})
+    receipt.routing = {"skipped": skipped, "attempts": attempts}
+    receipt.hedge = hedge
+    return receipt
+
+def _observe(task_type: str, receipt: ModelReceipt) -> None:
+    """Single metrics sink, called once per model attempt on every path (blocking, streamed, hedged,
+    cached), so a failover records the failed candidate under its own labels as well as the winner."""
+    metrics.record(task_type, receipt)
+
+def _generate_blocking(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    timeout_s: Optional[float],
+    provider_slot: Optional[ProviderSlot] = None,
+) -> ModelReceipt:
+    """Try ranked candidates in turn until one succeeds; every attempt feeds the health table."""
+    ranked, skipped = route(task_type, sensitivity)
+    routing: Dict[str, Any] = {"skipped": skipped, "attempts": []}
+    receipt: Optional[ModelReceipt] = None
+    for key, cfg in ranked:
+        if not HEALTH.acquire(key):  # another caller took the half-open probe
+            skipped.append(key)
+            continue
+        with (provider_slot or _no_slot)(cfg.get("provider", "ollama")):
+            receipt = _call_model(key, cfg, prompt, system_prompt, max_tokens, temperature, timeout_s)
+        if receipt.cache_hit:
+            HEALTH.release(key)  # no provider call to judge
+        else:
+            HEALTH.record(key, receipt.latency_ms, receipt.status == "success")
+        routing["attempts"].append({"model_key": key, "status": receipt.status, "latency_ms": receipt.latency_ms, "error": receipt.error_msg})
+        _observe(task_type, receipt)
+        if receipt.status == "success":
+            break
+    if receipt is None:
+        receipt = _no_route_receipt(task_type, sensitivity, routing)
+        _observe(task_type, receipt)
+        return receipt
+    receipt.routing = routing
+    return receipt
+
+def _call_model(
+    key: str,
+    cfg: Dict[str, Any],
+    prompt: str,
+    system_prompt: Optional[str],
+    max_tokens: int,
+    temperature: float,
+    timeout_s: Optional[float],
 ) -> ModelReceipt:
     start = time.time()
-    key, cfg = resolve_model_key(task_type, sensitivity)
     provider: Provider = cfg.get("provider", "ollama")  # type: ignore
     model_id = cfg.get("id")
+    transport_stats: Optional[Dict[str, Any]] = None
+    cache, ckey, hit = _cache_lookup(provider, model_id, prompt, system_prompt, max_tokens, temperature)
+    if hit is not None:
+        receipt = _cached_receipt(start, model_id, provider, ckey, hit)  # type: ignore[arg-type]
+        receipt.model_key = key
+        return receipt
     try:
         if provider == "ollama":
-            output = call_ollama(model_id=model_id, prompt=prompt)
+            data = call_ollama(model_id=model_id, prompt=prompt, timeout_s=timeout_s)
+            output = data["text"]
+            transport_stats = data["transport"]
             in_toks = _estimate_tokens(prompt)
             out_toks = _estimate_tokens(output)
         elif provider == "cloud-llm":
@@ -136,15 +522,16 @@ def generate(
             out_toks = _estimate_tokens(output)
         elif provider == "anthropic":
             system = system_prompt or "You are a helpful assistant."  # required for anthropic
-            data = call_anthropic(model_id=model_id, prompt=prompt, system=system, max_tokens=max_tokens, temperature=temperature)
+            data = call_anthropic(model_id=model_id, prompt=prompt, system=system, max_tokens=max_tokens, temperature=temperature, timeout_s=timeout_s)
             output = data["text"]
+            transport_stats = data["transport"]
             in_toks = data["input_tokens"]
             out_toks = data["output_tokens"]
         else:
             raise ModelRunnerError(f"Unsupported provider '{provider}'")
         latency_ms = int((time.time() - start) * 1000)
         cost = _calc_cost(model_id, in_toks, out_toks)
-        return ModelReceipt(
+        receipt = ModelReceipt(
             timestamp=time.time(),
             model_id=model_id,
             provider=provider,
@@ -154,7 +541,12 @@ def generate(
             cost_usd=cost,
             status="success",
             raw_output=output,
+            transport=transport_stats,
+            cache_key=ckey,
+            model_key=key,
         )
+        _cache_store(cache, ckey, receipt)
+        return receipt
     except Exception as e:  # Capture failure receipt
         latency_ms = int((time.time() - start) * 1000)
         return ModelReceipt(
@@ -168,8 +560,195 @@ def generate(
             status="error",
             raw_output="",
             error_msg=str(e),
+            transport=transport_stats,
+            model_key=key,
         )
 
+def _quiet_close(closer: Callable[[], None]) -> None:
+    try:
+        closer()
+    except Exception:
+        pass
+
+class StreamingGeneration:
+    """Iterable of text chunks for one model call.
+    `receipt` is populated once the stream is exhausted, fails, or is closed early (status "aborted").
+    """
+
+    def __init__(self, task_type: str, prompt: str, sensitivity: Sensitivity, system_prompt: Optional[str], max_tokens: int, temperature: float, timeout_s: Optional[float],
+                 candidates: Optional[List[Tuple[str, Dict[str, Any]]]] = None, slot: Optional[ProviderSlot] = None):
+        self.task_type = task_type
+        self.prompt = prompt
+        self.sensitivity = sensitivity
+        self.system_prompt = system_prompt
+        self.max_tokens = max_tokens
+        self.temperature = temperature
+        self.timeout_s = timeout_s
+        self.receipt: Optional[ModelReceipt] = None
+        self._chunks: List[str] = []
+        self._candidates = candidates  # pinned candidates (hedging) instead of live routing
+        self._slot: ProviderSlot = slot or _no_slot  # entered around each provider attempt
+        self._meta: Dict[str, Any] = {}
+        self.cancelled = False
+        self._gen = self._run()
+
+    def __iter__(self) -> Iterator[str]:
+        return self._gen
+
+    @property
+    def text(self) -> str:
+        return "".join(self._chunks)
+
+    def close(self) -> None:
+        """Stop the provider stream (e.g. validator early-abort); the receipt is finalised as aborted."""
+        self._gen.close()
+        if self.receipt is None:  # closed before the first chunk was requested
+            key, cfg = resolve_model_key(self.task_type, self.sensitivity)
+            self.receipt = ModelReceipt(
+                timestamp=time.time(), model_id=cfg.get("id"), provider=cfg.get("provider", "ollama"),
+                input_tokens=0, output_tokens=0, latency_ms=0, cost_usd=0.0, status="aborted",
+                raw_output="", chunk_count=0, model_key=key,
+            )
+            if not self.cancelled:
+                _observe(self.task_type, self.receipt)
+
+    def cancel(self) -> None:
+        """Thread-safe, non-blocking abort for a stream consumed elsewhere: the provider response is
+        closed off-thread (closing can wait on the pending read) and the consuming thread finalises
+        the receipt as aborted."""
+        self.cancelled = True
+        closer = self._meta.get("closer")
+        if closer is not None:
+            threading.Thread(target=_quiet_close, args=(closer,), name="stream-cancel", daemon=True).start()
+
+    def _provider_stream(self, provider: str, model_id: str, meta: Dict[str, Any]) -> Iterator[str]:
+        if provider == "ollama":
+            return stream_ollama(model_id=model_id, prompt=self.prompt, meta=meta, timeout_s=self.timeout_s)
+        if provider == "cloud-llm":
+            # Placeholder remote stub: one chunk
+            return iter([f"[REMOTE_STUB:{model_id}] {self.prompt[:180]}"])
+        if provider == "anthropic":
+            system = self.system_prompt or "You are a helpful assistant."  # required for anthropic
+            return stream_anthropic(model_id=model_id, prompt=self.prompt, system=system, meta=meta,
+                                    max_tokens=self.max_tokens, temperature=self.temperature, timeout_s=self.timeout_s)
+        raise ModelRunnerError(f"Unsupported provider '{provider}'")
+
+    def _run(self) -> Iterator[str]:
+        # Failover to the next candidate only while nothing has been yielded yet.
+        routing: Dict[str, Any] = {"skipped": [], "attempts": []}
+        att: Optional[Dict[str, Any]] = None
+        route_error: Optional[str] = None
+        try:
+            if self._candidates is not None:
+                ranked = self._candidates
+            else:
+                ranked, routing["skipped"] = route(self.task_type, self.sensitivity)
+            for key, cfg in ranked:
+                if not HEALTH.acquire(key):  # another caller took the half-open probe
+                    routing["skipped"].append(key)
+                    continue
+                provider, model_id = cfg.get("provider", "ollama"), cfg.get("id")
+                att = {"key": key, "provider": provider, "model_id": model_id, "start": time.time(), "first_at": None,
+                       "meta": {}, "status": "success", "error_msg": None, "cache": None, "ckey": None}
+                self._meta = att["meta"]
+                att["cache"], att["ckey"], hit = _cache_lookup(provider, model_id, self.prompt, self.system_prompt, self.max_tokens, self.temperature)
+                if hit is not None:
+                    self.receipt = _cached_receipt(att["start"], model_id, provider, att["ckey"], hit)
+                    self.receipt.chunk_count = 1
+                    self.receipt.model_key, self.receipt.routing = key, routing
+                    self._chunks.append(hit["raw_output"])
+                    HEALTH.release(key)  # no provider call to judge
+                    yield hit["raw_output"]
+                    return
+                with self._slot(provider):
+                    try:
+                        for piece in self._provider_stream(provider, model_id, att["meta"]):
+                            if att["first_at"] is None:
+                                att["first_at"] = time.time()
+                            self._chunks.append(piece)
+                            yield piece
+                    except GeneratorExit:
+                        raise
+                    except Exception as e:  # Capture failure receipt
+                        att["status"], att["error_msg"] = "error", str(e)
+                if self.cancelled:  # hedge loser: no outcome to judge the model by
+                    att["status"], att["error_msg"] = "aborted", None
+                    HEALTH.release(key)
+                    break
+                latency_ms = int((time.time() - att["start"]) * 1000)
+                HEALTH.record(key, latency_ms, att["status"] == "success")
+                routing["attempts"].append({"model_key": key, "status": att["status"], "latency_ms": latency_ms, "error": att["error_msg"]})
+                if att["status"] == "success" or att["first_at"] is not None:
+                    break
+                _observe(self.task_type, self._attempt_receipt(att, routing))  # failing over: count this attempt now
+                att["observed"] = True
+        except GeneratorExit:
+            if att is not None and self.receipt is None:  # a cache hit already gave its claim back
+                att["status"] = "aborted"
+                HEALTH.release(att["key"])
+            raise
+        except Exception as e:  # routing itself failed (e.g. undefined model key)
+            route_error = str(e)
+        finally:
+            if self.receipt is None:
+                if att is not None:
+                    self._finalise(att, routing)
+                elif route_error is not None:
+                    self.receipt = ModelReceipt(
+                        timestamp=time.time(), model_id=None, provider="ollama", input_tokens=0, output_tokens=0,  # type: ignore[arg-type]
+                        latency_ms=0, cost_usd=0.0, status="error", raw_output="", error_msg=route_error, routing=routing,
+                    )
+                else:
+                    self.receipt = _no_route_receipt(self.task_type, self.sensitivity, routing)
+            # A cancelled hedge is not an outcome; a failed-over last attempt was counted in the loop.
+            if not self.cancelled and not (att is not None and att.get("observed")):
+                _observe(self.task_type, self.receipt)  # type: ignore[arg-type]
+
+    def _finalise(self, att: Dict[str, Any], routing: Dict[str, Any]) -> None:
+        self.receipt = self._attempt_receipt(att, routing)
+        _cache_store(att["cache"], att["ckey"], self.receipt)
+
+    def _attempt_receipt(self, att: Dict[str, Any], routing: Dict[str, Any]) -> ModelReceipt:
+        end = time.time()
+        status, meta, first_at, model_id = att["status"], att["meta"], att["first_at"], att["model_id"]
+        output = self.text
+        in_toks = out_toks = 0
+        if status != "error":  # aborted streams still consumed (and may bill) the partial output
+            in_toks = meta.get("input_tokens") or _estimate_tokens(self.prompt)
+            out_toks = meta.get("output_tokens") or _estimate_tokens(output)
+        decode_s = end - first_at if first_at is not None else 0.0
+        return ModelReceipt(
+            timestamp=end,
+            model_id=model_id,
+            provider=att["provider"],
+            input_tokens=in_toks,
+            output_tokens=out_toks,
+            latency_ms=int((end - att["start"]) * 1000),
+            cost_usd=_calc_cost(model_id, in_toks, out_toks),
+            status=status,
+            raw_output=output.strip() if status == "success" else output,
+            error_msg=att["error_msg"],
+            transport=meta.get("transport"),
+            ttft_ms=int((first_at - att["start"]) * 1000) if first_at is not None else None,
+            tokens_per_sec=round(out_toks / decode_s, 2) if decode_s > 0 and out_toks else None,
+            chunk_count=len(self._chunks),
+            cache_key=att["ckey"],
+            model_key=att["key"],
+            routing=routing,
+        )
+
+def generate_stream(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.0,
+    timeout_s: Optional[float] = None,
+) -> StreamingGeneration:
+    """Streaming generate(): iterate for chunks, then read `.receipt` (ttft_ms, tokens_per_sec, chunk_count)."""
+    return StreamingGeneration(task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s)
+
 def generate_dict(*args: Any, **kwargs: Any) -> Dict[str, Any]:
     """Helper returning receipt as dict plus convenience 'text'."""
     receipt = generate(*args, **kwargs)
@@ -177,10 +756,125 @@ def generate_dict(*args: Any, **kwargs: Any) -> Dict[str, Any]:
     data["text"] = receipt.raw_output
     return data
 
+DEFAULT_MAX_CONCURRENCY = 8
+_ASYNC_LIMITS: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Semaphore]]" = weakref.WeakKeyDictionary()
+_ASYNC_EXECUTOR: Optional[ThreadPoolExecutor] = None
+_ASYNC_LOCK = threading.Lock()
+
+def _max_concurrency(provider: str) -> int:
+    return int(_transport_cfg(provider).get("max_concurrency", DEFAULT_MAX_CONCURRENCY))
+
+def _provider_semaphore(provider: str) -> asyncio.Semaphore:
+    # Semaphores are bound to the running loop, so keep one set per loop.
+    per_loop = _ASYNC_LIMITS.setdefault(asyncio.get_running_loop(), {})
+    sem = per_loop.get(provider)
+    if sem is None:
+        sem = per_loop[provider] = asyncio.Semaphore(_max_concurrency(provider))
+    return sem
+
+class _AsyncProviderSlots:
+    """Per-attempt provider slots for one generate_async() call running on a worker thread.
+    The caller takes the first candidate's slot on the loop before dispatching (so queued calls do
+    not tie up executor threads); the first attempt on that provider uses it. Any other attempt,
+    a failover or a hedge to a different provider, blocks its worker thread until that provider's
+    own semaphore grants a slot, and every slot is released when its attempt ends."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._held: Optional[Tuple[str, asyncio.Semaphore]] = None
+
+    async def hold(self, provider: str) -> None:
+        sem = _provider_semaphore(provider)
+        await sem.acquire()
+        self._held = (provider, sem)
+
+    def release_held(self) -> None:
+        with self._lock:
+            held, self._held = self._held, None
+        if held is not None:
+            self._loop.call_soon_threadsafe(held[1].release)
+
+    async def _acquire(self, provider: str) -> asyncio.Semaphore:
+        sem = _provider_semaphore(provider)
+        await sem.acquire()
+        return sem
+
+    @contextlib.contextmanager
+    def __call__(self, provider: str) -> Iterator[None]:
+        with self._lock:
+            held, self._held = self._held, None
+        if held is not None and held[0] == provider:
+            sem = held[1]
+        else:
+            if held is not None:  # routed elsewhere: the pre-taken slot is not ours to keep
+                self._loop.call_soon_threadsafe(held[1].release)
+            sem = asyncio.run_coroutine_threadsafe(self._acquire(provider), self._loop).result()
+        try:
+            yield
+        finally:
+            self._loop.call_soon_threadsafe(sem.release)
+
+def _async_executor() -> ThreadPoolExecutor:
+    # Blocking provider calls run here; sized to the sum of per-provider limits so the
+    # semaphores (not the default executor) are what bound in-flight calls.
+    global _ASYNC_EXECUTOR
+    with _ASYNC_LOCK:
+        if _ASYNC_EXECUTOR is None:
+            providers = {cfg.get("provider", "ollama") for cfg in (load_model_stack().get("models") or {}).values()}
+            workers = max(4, sum(_max_concurrency(p) for p in providers))
+            _ASYNC_EXECUTOR = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="model-runner")
+        return _ASYNC_EXECUTOR
+
+async def generate_async(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    system_prompt: Optional[str] = None,
+    max_tokens: int = 1024,
+    temperature: float = 0.0,
+    timeout_s: Optional[float] = None,
+    on_chunk: Optional[Callable[[str], None]] = None,
+    stop_when: Optional[Callable[[str], bool]] = None,
+) -> ModelReceipt:
+    """Async counterpart of generate(); at most `max_concurrency` attempts in flight per provider,
+    counted per attempt, so failover and hedges are limited by the provider they actually call.
+    `on_chunk` / `stop_when` behave as in generate() and run on the worker thread."""
+    loop = asyncio.get_running_loop()
+    slots = _AsyncProviderSlots(loop)
+    try:
+        ranked, _ = route(task_type, sensitivity)
+    except ModelRunnerError:
+        ranked = []  # generate() reports the routing error
+    if ranked:
+        await slots.hold(ranked[0][1].get("provider", "ollama"))
+    call = functools.partial(generate, task_type, prompt, sensitivity, system_prompt, max_tokens, temperature, timeout_s,
+                             on_chunk=on_chunk, stop_when=stop_when, provider_slot=slots)
+    try:
+        return await loop.run_in_executor(_async_executor(), call)
+    finally:
+        slots.release_held()  # no attempt used it (cache hit, breaker skip) or the call was cancelled
+
 # Backwards compatibility function used by specialist
-def run_model_for_task(task_type: str, prompt: str, sensitivity: Sensitivity = "normal") -> Dict[str, Any]:
-    rec = generate(task_type=task_type, prompt=prompt, sensitivity=sensitivity)
-    return {"model_key": task_type, "model_id": rec.model_id, "provider": rec.provider, "text": rec.raw_output, "receipt": asdict(rec), "sensitivity": sensitivity}
+def run_model_for_task(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    on_chunk: Optional[Callable[[str], None]] = None,
+    stop_when: Optional[Callable[[str], bool]] = None,
+) -> Dict[str, Any]:
+    rec = generate(task_type=task_type, prompt=prompt, sensitivity=sensitivity, on_chunk=on_chunk, stop_when=stop_when)
+    return {"model_key": rec.model_key or task_type, "model_id": rec.model_id, "provider": rec.provider, "text": rec.raw_output, "receipt": asdict(rec), "sensitivity": sensitivity}
+
+async def run_model_for_task_async(
+    task_type: str,
+    prompt: str,
+    sensitivity: Sensitivity = "normal",
+    on_chunk: Optional[Callable[[str], None]] = None,
+    stop_when: Optional[Callable[[str], bool]] = None,
+) -> Dict[str, Any]:
+    rec = await generate_async(task_type=task_type, prompt=prompt, sensitivity=sensitivity, on_chunk=on_chunk, stop_when=stop_when)
+    return {"model_key": rec.model_key or task_type, "model_id": rec.model_id, "provider": rec.provider, "text": rec.raw_output, "receipt": asdict(rec), "sensitivity": sensitivity}
 
 if __name__ == "__main__":  # quick manual test
     r = generate("governance", "List three principles of sovereign property analysis.")
@@ -0,0 +1,193 @@
+# agi/core/policy_engine.py
+"""Compiled multi-pattern policy scanner for the validator (v0.1d).
+Rule sets are compiled once per policy file version, and every hit comes back with its rule code
+and offsets. StreamScanner applies the same rules to streamed
+chunks so a hard refusal can stop generation early.
+"""
+from __future__ import annotations
+
+import re
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import yaml
+
+from .drift_detector import hash_file_cached
+
+POLICY_RULES_PATH = Path(__file__).resolve().parent / "policy_rules.yaml"
+
+# Used when policy_rules.yaml is absent (matches the v0.1b validator lists).
+DEFAULT_VERSION = "builtin"
+DEFAULT_RULE_SETS: Dict[str, Dict[str, Any]] = {
+    "HARD_REFUSAL": {
+        "action": "block",
+        "patterns": [
+            r"\bmake\s+a\s+bomb\b",
+            r"\bcredit\s+card\s+fraud\b",
+            r"\bhack\s+.*server\b",
+            r"\bkill\b",
+            r"\bmanufacture\s+drugs\b",
+        ],
+    },
+    "PROFESSIONAL_MISREPRESENTATION": {
+        "action": "flag",
+        "patterns": [r"\bi am a (doctor|lawyer|attorney|certified|surgeon)\b"],
+    },
+    "UNCERTAINTY": {
+        "action": "qualifier",
+        "patterns": ["maybe", "possibly", "unclear", "unknown"],
+    },
+}
+
+@dataclass(frozen=True)
+class Rule:
+    code: str
+    pattern: str
+    action: str
+
+@dataclass(frozen=True)
+class Hit:
+    code: str
+    pattern: str
+    action: str
+    start: int
+    end: int
+
+# re.IGNORECASE matches these to "i"/"s", but str.lower() leaves them unchanged.
+_UNFOLDED = frozenset("\u0131\u017f")
+
+def _literal_lead(pattern: str) -> Tuple[str, bool]:
+    """(literal every match must start with, pattern is exactly that literal); ("", False) if unknown.
+    Only a plain run of lowercase letters, digits and spaces (after an optional leading \\b) counts."""
+    body = pattern[2:] if pattern.startswith(r"\b") else pattern
+    depth, i = 0, 0
+    while i < len(pattern):  # a top-level alternation means there is no common prefix
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":  # skip the class, including a leading ']' and escapes inside it
+            i += 2 if pattern[i + 1:i + 2] == "]" else 1
+            while i < len(pattern) and pattern[i] != "]":
+                i += 2 if pattern[i] == "\\" else 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return "", False
+        i += 1
+    n = 0
+    while n < len(body) and (body[n].islower() or body[n].isdigit() or body[n] == " ") and body[n].isascii():
+        n += 1
+    if n < len(body) and body[n] in "?*{":
+        n -= 1  # the last character is optional/repeated
+    lead = body[:n]
+    if not lead.strip():
+        return "", False
+    return lead, n == len(body) and body is pattern
+
+class PolicyEngine:
+    def __init__(self, rule_sets: Dict[str, Dict[str, Any]], version: str = DEFAULT_VERSION):
+        self.version = version
+        self.rules: List[Rule] = [
+            Rule(code=code, pattern=pat, action=spec.get("action", "flag"))
+            for code, spec in rule_sets.items()
+            for pat in spec.get("patterns", [])
+        ]
+        self.rule_order = {(r.code, r.pattern): i for i, r in enumerate(self.rules)}
+        # One compiled regex per rule; a combined alternation would need lookaheads to report
+        # overlapping hits of different rules, and that costs more than the separate passes.
+        self._compiled = [re.compile(r.pattern, re.IGNORECASE) for r in self.rules]
+        self._leads = [_literal_lead(r.pattern) for r in self.rules]
+
+    def scan(self, text: str, pos: int = 0) -> List[Hit]:
+        """Every rule hit in `text` (from `pos`), in offset order."""
+        hits: List[Hit] = []
+        # When lower() maps every character to exactly one (offsets kept) and the text has none of
+        # the characters re.IGNORECASE folds onto ASCII but lower() does not, str.find on the lowered
+        # text finds exactly the case-insensitive occurrences of a rule's leading literal: pure
+        # literals never touch the regex engine, and other rules start matching at the literal's
+        # first occurrence (or are skipped).
+        lowered: Optional[str] = text.lower()
+        if not text.isascii() and (len(lowered) != len(text) or _UNFOLDED.intersection(text)):
+            lowered = None
+        for r, rx, (lead, pure) in zip(self.rules, self._compiled, self._leads):
+            if lowered is not None and lead:
+                at = lowered.find(lead, pos)
+                if at < 0:
+                    continue
+                if pure:
+                    while at >= 0:
+                        hits.append(Hit(code=r.code, pattern=r.pattern, action=r.action, start=at, end=at + len(lead)))
+                        at = lowered.find(lead, at + len(lead))
+                    continue
+                matches = rx.finditer(text, at)
+            else:
+                matches = rx.finditer(text, pos)
+            for m in matches:
+                hits.append(Hit(code=r.code, pattern=r.pattern, action=r.action, start=m.start(), end=m.end()))
+        hits.sort(key=lambda h: h.start)
+        return hits
+
+    def stream_scanner(self, lookback: int = 256) -> "StreamScanner":
+        return StreamScanner(self, lookback=lookback)
+
+class StreamScanner:
+    """Incremental scanner over streamed chunks.
+    Each feed re-scans only the new text plus `lookback` chars, and only accepts hits followed by at
+    least one more character (so `\\bkill\\b` does not fire on a partial "kill|ing"). Matches longer
+    than the lookback may be missed here; the validator's full scan of the final text stays authoritative.
+    """
+
+    def __init__(self, engine: PolicyEngine, lookback: int = 256):
+        self.engine = engine
+        self.lookback = lookback
+        self.text = ""
+        self.hits: List[Hit] = []
+        self._seen: Set[Tuple[str, str, int]] = set()
+        self._scanned_to = 0
+
+    @property
+    def blocked(self) -> bool:
+        return any(h.action == "block" for h in self.hits)
+
+    def feed(self, chunk: str) -> bool:
+        """Add a chunk; True once a blocking rule has fired (use as a stop_when predicate)."""
+        self.text += chunk
+        start = max(0, self._scanned_to - self.lookback)
+        for h in self.engine.scan(self.text, start):
+            if h.end >= len(self.text):
+                continue  # undecided until the next character arrives
+            key = (h.code, h.pattern, h.start)
+            if key not in self._seen:
+                self._seen.add(key)
+                self.hits.append(h)
+        self._scanned_to = len(self.text)
+        return self.blocked
+
+def load_rules(path: Path = POLICY_RULES_PATH) -> Tuple[str, Dict[str, Dict[str, Any]]]:
+    if not path.exists():
+        return DEFAULT_VERSION, DEFAULT_RULE_SETS
+    with path.open("r", encoding="utf-8") as f:
+        raw = yaml.safe_load(f) or {}
+    return str(raw.get("version", "unversioned")), raw.get("rule_sets") or {}
+
+_ENGINE: Optional[PolicyEngine] = None
+_ENGINE_HASH: Optional[str] = None
+_ENGINE_LOCK = threading.Lock()
+
+def get_engine(path: Path = POLICY_RULES_PATH) -> PolicyEngine:
+    """Process-wide engine, recompiled only when the policy file's content changes."""
+    global _ENGINE, _ENGINE_HASH
+    current = hash_file_cached(path)
+    with _ENGINE_LOCK:
+        if _ENGINE is None or current != _ENGINE_HASH:
+            version, rule_sets = load_rules(path)
+            _ENGINE, _ENGINE_HASH = PolicyEngine(rule_sets, version), current
+        return _ENGINE
+
+# Compile at import so the first request does not pay for it.
+get_engine()
@@ -1,16 +1,24 @@
 # agi/core/receipt.py
 from __future__ import annotations
 
+import atexit
+import hashlib
 import json
+import os
+import queue
+import re
 import sqlite3
+import threading
 import time
+import unicodedata
 from dataclasses import dataclass, asdict
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Tuple
+
+from .receipt_log import get_log
 
 DB_PATH = Path(__file__).resolve().parent / "sovereign_model.sqlite"
-RECEIPTS_DIR = Path(__file__).resolve().parent / "receipts"
-RECEIPTS_DIR.mkdir(exist_ok=True)
+RECEIPTS_DIR = Path(__file__).resolve().parent / "receipts"  # legacy one-file-per-receipt layout
 
 @dataclass
 class SovereignReceipt:
@@ -29,12 +37,26 @@ class SovereignReceipt:
     drift_details: Optional[List[Dict]] = None
     timestamp: int = int(time.time())
 
+_NON_WORD = re.compile(r"[^\w]+")
+
+def normalize_question(question: str) -> str:
+    """Case, accents-as-composed, punctuation and whitespace folded so trivially different phrasings
+    of the same question hash alike."""
+    text = unicodedata.normalize("NFKC", question).casefold()
+    return " ".join(_NON_WORD.sub(" ", text).split())
+
+def question_hash(question: str) -> str:
+    return hashlib.sha256(normalize_question(question).encode("utf-8")).hexdigest()
+
 def _column_exists(cur: sqlite3.Cursor, table: str, column: str) -> bool:
     cur.execute(f"PRAGMA table_info({table})")
     return any(row[1] == column for row in cur.fetchall())
 
 def init_db() -> None:
     conn = sqlite3.connect(DB_PATH)
+    # Only takes effect on a new (empty) database; existing files are converted by `retention vacuum --convert`.
+    conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+    conn.execute("PRAGMA journal_mode=WAL")  # persistent on the file; readers no longer block the sink
     cur = conn.cursor()
     # Base table
     cur.execute(
@@ -64,16 +86,250 @@ def init_db() -> None:
         )
         """
     )
+    # Thread reads are WHERE answer_id = ? ORDER BY id
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_assistant_messages_answer_id ON assistant_messages(answer_id, id)")
     # Migration: ensure audit_receipt column exists (older schema compatibility)
     if not _column_exists(cur, "sovereign_answers", "audit_receipt"):
         cur.execute("ALTER TABLE sovereign_answers ADD COLUMN audit_receipt TEXT")
+    # Migration: normalized question hash for "already answered?" lookups
+    if not _column_exists(cur, "sovereign_answers", "question_hash"):
+        cur.execute("ALTER TABLE sovereign_answers ADD COLUMN question_hash TEXT")
+    rows = cur.execute("SELECT rowid, question FROM sovereign_answers WHERE question_hash IS NULL").fetchall()
+    cur.executemany("UPDATE sovereign_answers SET question_hash = ? WHERE rowid = ?", [(question_hash(q), rid) for rid, q in rows])
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sovereign_answers_question_hash ON sovereign_answers(question_hash, created_at)")
+    # Keyset pagination / time-range reads (answer_query) walk (created_at, rowid)
+    cur.execute("CREATE INDEX IF NOT EXISTS idx_sovereign_answers_created_at ON sovereign_answers(created_at)")
+    _init_fts(cur)
     conn.commit()
     conn.close()
 
-def write_receipt_json(receipt: SovereignReceipt) -> Path:
+def _init_fts(cur: sqlite3.Cursor) -> None:
+    """External-content FTS5 index over the answer text, kept in sync by triggers.
+    Skipped (search falls back to LIKE) when this SQLite build lacks FTS5."""
+    exists = cur.execute("SELECT 1 FROM sqlite_master WHERE name = 'sovereign_answers_fts'").fetchone()
+    try:
+        cur.execute(
+            """
+            CREATE VIRTUAL TABLE IF NOT EXISTS sovereign_answers_fts USING fts5(
+                question, raw_answer, explained_answer,
+                content='sovereign_answers', content_rowid='rowid', tokenize='porter unicode61'
+            )
+            """
+        )
+    except sqlite3.OperationalError as e:
+        print(f"[RECEIPT] FTS5 unavailable, answer search will scan: {e}")
+        return
+    cur.executescript(
+        """
+        CREATE TRIGGER IF NOT EXISTS sovereign_answers_fts_ai AFTER INSERT ON sovereign_answers BEGIN
+            INSERT INTO sovereign_answers_fts(rowid, question, raw_answer, explained_answer)
+            VALUES (new.rowid, new.question, new.raw_answer, new.explained_answer);
+        END;
+        CREATE TRIGGER IF NOT EXISTS sovereign_answers_fts_ad AFTER DELETE ON sovereign_answers BEGIN
+            INSERT INTO sovereign_answers_fts(sovereign_answers_fts, rowid, question, raw_answer, explained_answer)
+            VALUES ('delete', old.rowid, old.question, old.raw_answer, old.explained_answer);
+        END;
+        CREATE TRIGGER IF NOT EXISTS sovereign_answers_fts_au AFTER UPDATE OF question, raw_answer, explained_answer ON sovereign_answers BEGIN
+            INSERT INTO sovereign_answers_fts(sovereign_answers_fts, rowid, question, raw_answer, explained_answer)
+            VALUES ('delete', old.rowid, old.question, old.raw_answer, old.explained_answer);
+            INSERT INTO sovereign_answers_fts(rowid, question, raw_answer, explained_answer)
+            VALUES (new.rowid, new.question, new.raw_answer, new.explained_answer);
+        END;
+        """
+    )
+    if not exists:  # index rows written before the FTS table existed
+        cur.execute("INSERT INTO sovereign_answers_fts(sovereign_answers_fts) VALUES ('rebuild')")
+
+@dataclass(frozen=True)
+class SinkConfig:
+    durability: str = "commit"   # "commit": store_* returns once its batch is committed | "async": once queued
+    synchronous: str = "NORMAL"  # PRAGMA synchronous under WAL: NORMAL (fsync at checkpoint) | FULL (every commit)
+    batch_size: int = 64         # max statements per group commit
+    flush_interval_ms: int = 20  # how long the writer may linger to fill a batch while writes keep arriving
+
+def sink_config_from_env() -> SinkConfig:
+    return SinkConfig(
+        durability=os.getenv("SOVEREIGN_RECEIPT_DURABILITY", "commit"),
+        synchronous=os.getenv("SOVEREIGN_RECEIPT_SYNCHRONOUS", "NORMAL"),
+        batch_size=int(os.getenv("SOVEREIGN_RECEIPT_BATCH", "64")),
+        flush_interval_ms=int(os.getenv("SOVEREIGN_RECEIPT_FLUSH_MS", "20")),
+    )
+
+class _Write:
+    __slots__ = ("sql", "params", "done", "error")
+
+    def __init__(self, sql: Optional[str], params: Tuple[Any, ...], wait: bool):
+        self.sql = sql  # None marks a flush barrier
+        self.params = params
+        self.done = threading.Event() if wait else None
+        self.error: Optional[BaseException] = None
+
+class ReceiptSink:
+    """Single long-lived WAL connection owned by a background writer thread.
+    Writes are queued and group-committed: one transaction per batch instead of connect/commit/close per row.
+    """
+
+    def __init__(self, db_path: Path = DB_PATH, cfg: Optional[SinkConfig] = None):
+        self.db_path = db_path
+        self.cfg = cfg or sink_config_from_env()
+        self._queue: "queue.Queue[Optional[_Write]]" = queue.Queue()
+        self._ready = threading.Event()
+        self._error: Optional[BaseException] = None  # why the writer stopped (or never started)
+        self._thread = threading.Thread(target=self._writer, name="receipt-sink", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._error is not None:
+            raise self._error
+
+    def submit(self, sql: str, params: Tuple[Any, ...], durable: Optional[bool] = None) -> None:
+        wait = self.cfg.durability == "commit" if durable is None else durable
+        item = _Write(sql, params, wait)
+        self._put(item)
+        if item.done is not None:
+            self._wait(item)
+            if item.error is not None:
+                raise item.error
+
+    def flush(self) -> None:
+        """Block until everything queued so far is committed."""
+        item = _Write(None, (), True)
+        self._put(item)
+        self._wait(item)
+
+    def close(self) -> None:
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+
+    def _stopped(self) -> sqlite3.OperationalError:
+        err = sqlite3.OperationalError(f"receipt sink for {self.db_path} is not running")
+        err.__cause__ = self._error
+        return err
+
+    def _put(self, item: _Write) -> None:
+        if not self._thread.is_alive():
+            raise self._stopped()
+        self._queue.put(item)
+
+    def _wait(self, item: _Write) -> None:
+        # Poll so a writer that dies mid-batch fails its waiters instead of hanging them.
+        while not item.done.wait(0.5):  # type: ignore[union-attr]
+            if not self._thread.is_alive():
+                raise self._stopped()
+
+    def _writer(self) -> None:
+        try:
+            conn = sqlite3.connect(self.db_path, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(f"PRAGMA synchronous={self.cfg.synchronous}")
+        except BaseException as e:
+            self._error = e
+            self._ready.set()
+            return
+        self._ready.set()
+        try:
+            self._drain(conn)
+        except BaseException as e:
+            self._error = e
+            print(f"[RECEIPT_SINK] writer stopped: {e}")
+        finally:
+            conn.close()
+
+    def _drain(self, conn: sqlite3.Connection) -> None:
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch: List[_Write] = [first]
+            deadline = time.monotonic() + self.cfg.flush_interval_ms / 1000
+            while len(batch) < self.cfg.batch_size and batch[-1].sql is not None:
+                try:
+                    nxt = self._queue.get_nowait()
+                except queue.Empty:
+                    # An idle queue commits at once; only while a burst is still arriving does the
+                    # writer linger (up to flush_interval_ms) to fill the batch.
+                    remaining = deadline - time.monotonic()
+                    if len(batch) == 1 or remaining <= 0:
+                        break
+                    try:
+                        nxt = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if nxt is None:
+                    stop = True
+                    break
+                batch.append(nxt)
+            self._commit(conn, batch)
+
+    def _commit(self, conn: sqlite3.Connection, batch: List[_Write]) -> None:
+        try:
+            conn.execute("BEGIN")
+            for w in batch:
+                if w.sql is not None:
+                    conn.execute(w.sql, w.params)
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            # Retry one by one so a single bad row does not fail its neighbours.
+            for w in batch:
+                if w.sql is None:
+                    continue
+                try:
+                    conn.execute(w.sql, w.params)
+                except Exception as row_err:
+                    w.error = row_err
+                    if w.done is None:
+                        print(f"[RECEIPT_SINK] dropped async write: {row_err}")
+        for w in batch:
+            if w.done is not None:
+                w.done.set()
+
+_SINK: Optional[ReceiptSink] = None
+_SINK_LOCK = threading.Lock()
+
+def get_sink() -> ReceiptSink:
+    global _SINK
+    with _SINK_LOCK:
+        if _SINK is None:
+            _SINK = ReceiptSink()
+            atexit.register(_SINK.close)
+        return _SINK
+
+def flush_sink(db_path: Path = DB_PATH) -> None:
+    """Read-your-writes barrier for readers of `db_path`: commit whatever this process has queued
+    for it. Starts no writer thread when nothing was ever written through a sink."""
+    with _SINK_LOCK:
+        sink = _SINK
+    if sink is not None and Path(sink.db_path) == Path(db_path) and sink._thread.is_alive():
+        sink.flush()
+
+def write_receipt(receipt: SovereignReceipt, extra: Optional[Dict[str, Any]] = None) -> str:
+    """Append the receipt (plus any enrichment) to the segmented receipt log; returns its locator."""
+    data = asdict(receipt)
+    if extra:
+        data.update(extra)
+    return get_log().append(data)
+
+def read_receipt(ref: str) -> Optional[Dict[str, Any]]:
+    """Receipt by id or locator from the receipt log, falling back to a not-yet-migrated legacy file."""
+    data = get_log().get(ref)
+    if data is None:
+        legacy = RECEIPTS_DIR / f"{Path(ref).stem.split(':')[-1]}.json"
+        if legacy.exists():
+            data = json.loads(legacy.read_text(encoding="utf-8"))
+    return data
+
+def write_receipt_json(receipt: SovereignReceipt, extra: Optional[Dict[str, Any]] = None) -> Path:
+    """Legacy layout: one pretty-printed file per receipt. Prefer write_receipt()."""
+    data = asdict(receipt)
+    if extra:
+        data.update(extra)
+    RECEIPTS_DIR.mkdir(exist_ok=True)
     path = RECEIPTS_DIR / f"{receipt.receipt_id}.json"
     with path.open("w", encoding="utf-8") as f:
-        json.dump(asdict(receipt), f, indent=2, ensure_ascii=False)
+        json.dump(data, f, indent=2, ensure_ascii=False)
     return path
 
 def store_answer_and_receipt(
@@ -83,15 +339,23 @@ def store_answer_and_receipt(
     explained_answer: Optional[str] = None,
     audit_receipt: Optional[Dict[str, Any]] = None,
 ) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
     audit_json = json.dumps(audit_receipt, ensure_ascii=False) if audit_receipt is not None else None
-    cur.execute(
+    # Upsert rather than INSERT OR REPLACE: REPLACE deletes the row without firing delete triggers,
+    # which would leave stale FTS entries behind.
+    get_sink().submit(
         """
-        INSERT OR REPLACE INTO sovereign_answers
-            (answer_id, receipt_id, question, raw_answer, explained_answer, audit_receipt, created_at)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO sovereign_answers
+            (answer_id, receipt_id, question, raw_answer, explained_answer, audit_receipt, created_at, question_hash)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(answer_id) DO UPDATE SET
+            receipt_id = excluded.receipt_id,
+            question = excluded.question,
+            raw_answer = excluded.raw_answer,
+            explained_answer = excluded.explained_answer,
+            audit_receipt = excluded.audit_receipt,
+            created_at = excluded.created_at,
+            question_hash = excluded.question_hash
         """,
         (
             receipt.answer_id,
@@ -101,16 +365,13 @@ def store_answer_and_receipt(
             explained_answer,
             audit_json,
             now,
+            question_hash(question),
         ),
     )
-    conn.commit()
-    conn.close()
 
 def store_assistant_message(answer_id: str, receipt_id: str, role: str, message: str) -> None:
-    conn = sqlite3.connect(DB_PATH)
-    cur = conn.cursor()
     now = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
-    cur.execute(
+    get_sink().submit(
         """
         INSERT INTO assistant_messages
             (answer_id, receipt_id, role, message, created_at)
@@ -118,5 +379,3 @@ def store_assistant_message(answer_id: str, receipt_id: str, role: str, message:
         """,
         (answer_id, receipt_id, role, message, now),
     )
-    conn.commit()
-    conn.close()
@@ -0,0 +1,256 @@
+# agi/core/receipt_ledger.py
+"""Hash-chained receipt ledger with Merkle checkpoints (v0.1d).
+Every receipt appended to the receipt log gets a ledger entry:
+    leaf  = sha256(0x00 || canonical JSON of the receipt)
+    chain = sha256(0x02 || previous chain || leaf)          (genesis previous = 32 zero bytes)
+Every `checkpoint_every` entries the unsealed leaves are sealed into a Merkle checkpoint
+(node = sha256(0x01 || left || right), an odd node is carried up), itself hash-linked to the
+previous checkpoint. verify() re-reads only receipts after the last sealed checkpoint (full=True
+audits everything); prove() returns a Merkle inclusion proof checkable with verify_proof().
+
+Files (next to the receipt log segments):
+    chain.tsv          seq, receipt_id, segment, offset, leaf hex, chain hex   (one line per receipt)
+    checkpoints.jsonl  one sealed checkpoint per line
+"""
+from __future__ import annotations
+
+import bisect
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    from .receipt_log import ReceiptLog
+
+GENESIS = b"\x00" * 32
+Position = Tuple[int, int]  # (segment, offset) in the receipt log
+
+def canonical(record: Dict[str, Any]) -> bytes:
+    return json.dumps(record, ensure_ascii=False, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+def leaf_hash(record: Dict[str, Any]) -> bytes:
+    return hashlib.sha256(b"\x00" + canonical(record)).digest()
+
+def chain_hash(prev: bytes, leaf: bytes) -> bytes:
+    return hashlib.sha256(b"\x02" + prev + leaf).digest()
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    level = list(leaves)
+    while len(level) > 1:
+        level = [_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+    return level[0] if level else hashlib.sha256(b"").digest()
+
+def merkle_path(leaves: List[bytes], index: int) -> List[Tuple[str, str]]:
+    """Sibling hashes from leaf to root as (side, hex); side is where the sibling sits."""
+    path: List[Tuple[str, str]] = []
+    level = list(leaves)
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(("L" if sibling < index else "R", level[sibling].hex()))
+        level = [_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+        index //= 2
+    return path
+
+def verify_proof(proof: Dict[str, Any], record: Optional[Dict[str, Any]] = None) -> bool:
+    """Check an inclusion proof from prove(); with `record`, also check it is the proven receipt."""
+    node = bytes.fromhex(proof["leaf"])
+    if record is not None and leaf_hash(record) != node:
+        return False
+    for side, sibling in proof["path"]:
+        node = _node(bytes.fromhex(sibling), node) if side == "L" else _node(node, bytes.fromhex(sibling))
+    return node.hex() == proof["checkpoint"]["merkle_root"]
+
+def _checkpoint_hash(cp: Dict[str, Any]) -> str:
+    body = {k: v for k, v in cp.items() if k != "checkpoint_hash"}
+    return hashlib.sha256(canonical(body)).hexdigest()
+
+class ReceiptLedger:
+    """Chain + checkpoint state for one receipt log directory. Mutations run under the log's
+    exclusive lock (ReceiptLog.append / ReceiptLog.exclusive)."""
+
+    def __init__(self, root: Path, checkpoint_every: int = 1024):
+        self.root = root
+        self.checkpoint_every = checkpoint_every
+        self.chain_path = root / "chain.tsv"
+        self.checkpoints_path = root / "checkpoints.jsonl"
+        self._seq_of: Dict[str, int] = {}
+        self._line_offsets: List[int] = []  # seq -> byte offset of its line in chain.tsv
+        self._unsealed: List[Tuple[int, bytes]] = []  # (seq, leaf) after the last checkpoint
+        self.head: bytes = GENESIS
+        self.last_pos: Optional[Position] = None
+        self.checkpoints: List[Dict[str, Any]] = []
+        self._chain_read = 0
+        self._cp_read = 0
+        self.refresh()
+
+    @property
+    def size(self) -> int:
+        return len(self._line_offsets)
+
+    # -- loading ----------------------------------------------------------------------------------
+    def refresh(self) -> None:
+        """Load chain lines / checkpoints appended since the last refresh (possibly by another process)."""
+        if self.checkpoints_path.exists() and self.checkpoints_path.stat().st_size > self._cp_read:
+            with self.checkpoints_path.open("rb") as f:
+                f.seek(self._cp_read)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1
+            for line in data[:complete].splitlines():
+                self.checkpoints.append(json.loads(line))
+            self._cp_read += complete
+            sealed = self.sealed_through
+            self._unsealed = [(s, leaf) for s, leaf in self._unsealed if s >= sealed]
+        if self.chain_path.exists() and self.chain_path.stat().st_size > self._chain_read:
+            with self.chain_path.open("rb") as f:
+                f.seek(self._chain_read)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1
+            pos = self._chain_read
+            for line in data[:complete].splitlines(keepends=True):
+                seq, rid, seg, off, leaf, chain = line.decode("utf-8").rstrip("\n").split("\t")
+                self._seq_of[rid] = int(seq)
+                self._line_offsets.append(pos)
+                if int(seq) >= self.sealed_through:
+                    self._unsealed.append((int(seq), bytes.fromhex(leaf)))
+                self.head, self.last_pos = bytes.fromhex(chain), (int(seg), int(off))
+                pos += len(line)
+            self._chain_read = pos
+
+    @property
+    def sealed_through(self) -> int:
+        """Number of entries covered by sealed checkpoints."""
+        return self.checkpoints[-1]["seq_end"] if self.checkpoints else 0
+
+    def _read_lines(self, start: int, end: int) -> List[List[str]]:
+        if start >= end:
+            return []
+        with self.chain_path.open("rb") as f:
+            f.seek(self._line_offsets[start])
+            stop = self._line_offsets[end] if end < len(self._line_offsets) else self._chain_read
+            data = f.read(stop - self._line_offsets[start])
+        return [line.split("\t") for line in data.decode("utf-8").splitlines()]
+
+    # -- mutation (caller holds the log's exclusive lock) -----------------------------------------
+    def _truncate_torn(self, path: Path, read: int) -> None:
+        if path.exists() and path.stat().st_size > read:
+            with path.open("r+b") as f:
+                f.truncate(read)
+
+    def append_locked(self, rid: str, pos: Position, record: Dict[str, Any], fsync: bool = False) -> None:
+        self.refresh()
+        self._truncate_torn(self.chain_path, self._chain_read)
+        leaf = leaf_hash(record)
+        seq = self.size
+        chained = chain_hash(self.head, leaf)
+        line = f"{seq}\t{rid}\t{pos[0]}\t{pos[1]}\t{leaf.hex()}\t{chained.hex()}\n".encode("utf-8")
+        with self.chain_path.open("ab") as f:
+            f.write(line)
+            f.flush()
+            if fsync:
+                os.fsync(f.fileno())
+        self._seq_of[rid] = seq
+        self._line_offsets.append(self._chain_read)
+        self._chain_read += len(line)
+        self._unsealed.append((seq, leaf))
+        self.head, self.last_pos = chained, pos
+        if len(self._unsealed) >= self.checkpoint_every:
+            self.seal_locked()
+
+    def seal_locked(self) -> Optional[Dict[str, Any]]:
+        """Seal every unsealed entry into a new checkpoint; None if there is nothing to seal."""
+        self.refresh()
+        self._truncate_torn(self.checkpoints_path, self._cp_read)
+        if not self._unsealed:
+            return None
+        start, end = self.sealed_through, self.size
+        prev = self.checkpoints[-1] if self.checkpoints else None
+        cp: Dict[str, Any] = {
+            "index": len(self.checkpoints),
+            "seq_start": start,
+            "seq_end": end,
+            "merkle_root": merkle_root([leaf for _, leaf in self._unsealed]).hex(),
+            "chain_hash": self.head.hex(),
+            "prev_checkpoint_hash": prev["checkpoint_hash"] if prev else None,
+        }
+        cp["checkpoint_hash"] = _checkpoint_hash(cp)
+        line = (json.dumps(cp, sort_keys=True) + "\n").encode("utf-8")
+        with self.checkpoints_path.open("ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+        self._cp_read += len(line)
+        self.checkpoints.append(cp)
+        self._unsealed = []
+        return cp
+
+    # -- proofs / verification --------------------------------------------------------------------
+    def prove(self, receipt_id: str) -> Optional[Dict[str, Any]]:
+        """Merkle inclusion proof of a receipt in its sealed checkpoint; None if unknown or not yet sealed."""
+        self.refresh()
+        seq = self._seq_of.get(receipt_id)
+        if seq is None or seq >= self.sealed_through:
+            return None
+        ends = [cp["seq_end"] for cp in self.checkpoints]
+        cp = self.checkpoints[bisect.bisect_right(ends, seq)]
+        leaves = [bytes.fromhex(parts[4]) for parts in self._read_lines(cp["seq_start"], cp["seq_end"])]
+        index = seq - cp["seq_start"]
+        return {
+            "receipt_id": receipt_id,
+            "seq": seq,
+            "leaf": leaves[index].hex(),
+            "path": merkle_path(leaves, index),
+            "checkpoint": {k: cp[k] for k in ("index", "seq_start", "seq_end", "merkle_root", "checkpoint_hash")},
+        }
+
+    def verify(self, log: "ReceiptLog", full: bool = False) -> Dict[str, Any]:
+        """Check checkpoint links, then re-read and re-hash receipts after the last sealed checkpoint
+        (or all of them with full=True, also recomputing every checkpoint's Merkle root)."""
+        self.refresh()
+        errors: List[str] = []
+        prev_hash: Optional[str] = None
+        for cp in self.checkpoints:
+            if cp.get("prev_checkpoint_hash") != prev_hash or _checkpoint_hash(cp) != cp.get("checkpoint_hash"):
+                errors.append(f"checkpoint {cp.get('index')} link/hash mismatch")
+            prev_hash = cp.get("checkpoint_hash")
+        start = 0 if full else self.sealed_through
+        prev = GENESIS
+        if start:
+            cp = self.checkpoints[-1]
+            anchor = self._read_lines(start - 1, start)[0]
+            if anchor[5] != cp["chain_hash"]:
+                errors.append(f"chain at seq {start - 1} does not match checkpoint {cp['index']}")
+            prev = bytes.fromhex(cp["chain_hash"])
+        leaves: List[bytes] = []
+        for parts in self._read_lines(start, self.size):
+            seq, rid, seg, off, leaf_hex, chain_hex = parts
+            try:
+                record = log.read_at(int(seg), int(off))
+            except (OSError, ValueError) as e:
+                errors.append(f"seq {seq} ({rid}): unreadable: {e}")
+                record = None
+            leaf = bytes.fromhex(leaf_hex)
+            if record is not None and leaf_hash(record) != leaf:
+                errors.append(f"seq {seq} ({rid}): receipt content does not match its leaf hash")
+            prev = chain_hash(prev, leaf)
+            if prev.hex() != chain_hex:
+                errors.append(f"seq {seq} ({rid}): chain hash mismatch")
+            leaves.append(leaf)
+        if full:
+            for cp in self.checkpoints:
+                if merkle_root(leaves[cp["seq_start"]:cp["seq_end"]]).hex() != cp["merkle_root"]:
+                    errors.append(f"checkpoint {cp['index']}: merkle root mismatch")
+        return {
+            "ok": not errors,
+            "checked": self.size - start,
+            "from_seq": start,
+            "entries": self.size,
+            "sealed_through": self.sealed_through,
+            "checkpoints": len(self.checkpoints),
+            "errors": errors,
+        }
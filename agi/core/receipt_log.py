@@ -0,0 +1,375 @@
+# agi/core/receipt_log.py
+"""Segmented append-only receipt log (v0.1d).
+Replaces one pretty-printed JSON file per receipt. Receipts are appended as framed, optionally
+zlib-compressed JSON records to size-rotated segment files; each segment has a sidecar index of
+receipt_id -> (offset, length) lines, loaded into memory so a read is one dict lookup plus one seek.
+
+Layout (LOG_DIR):
+    seg-000001.log   frames: length u32 | flags u8 | crc32 u32 | payload   (big-endian)
+    seg-000001.idx   "<receipt_id>\\t<offset>\\t<length>\\n" per frame
+
+Every append is also chained into the receipt ledger (chain.tsv / checkpoints.jsonl, see
+receipt_ledger.py), so the log can be verified incrementally and single receipts proven.
+
+Locators returned to callers are "receipt-log:<receipt_id>": they survive rotation, compaction and
+migration because they name the receipt, not a file position.
+
+CLI:
+    python -m agi.core.receipt_log migrate [--src agi/core/receipts] [--delete]
+    python -m agi.core.receipt_log get <receipt_id | locator>
+    python -m agi.core.receipt_log stats
+    python -m agi.core.receipt_log verify [--full]
+    python -m agi.core.receipt_log seal
+    python -m agi.core.receipt_log prove <receipt_id | locator>
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import json
+import os
+import struct
+import sys
+import threading
+import zlib
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from .receipt_ledger import ReceiptLedger, verify_proof
+
+try:  # cross-process append lock (triad_batch --processes); thread lock only where unavailable
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None  # type: ignore[assignment]
+
+LOG_DIR = Path(__file__).resolve().parent / "receipt_log"
+LEGACY_DIR = Path(__file__).resolve().parent / "receipts"
+LOCATOR_PREFIX = "receipt-log:"
+
+FRAME = struct.Struct(">IBI")  # payload length, flags, crc32 of the stored payload
+FLAG_ZLIB = 0x01
+
+@dataclass(frozen=True)
+class LogConfig:
+    segment_bytes: int = 64 * 1024 * 1024  # rotate once the active segment reaches this size
+    compress_level: int = 0                # zlib level for payloads; 0 = store uncompressed
+    fsync: bool = False                    # fsync segment + index after every append
+    checkpoint_every: int = 1024           # ledger entries per sealed Merkle checkpoint
+
+def log_config_from_env() -> LogConfig:
+    return LogConfig(
+        segment_bytes=int(float(os.getenv("SOVEREIGN_RECEIPT_LOG_SEGMENT_MB", "64")) * 1024 * 1024),
+        compress_level=int(os.getenv("SOVEREIGN_RECEIPT_LOG_COMPRESS", "0")),
+        fsync=os.getenv("SOVEREIGN_RECEIPT_LOG_FSYNC", "0") == "1",
+        checkpoint_every=int(os.getenv("SOVEREIGN_RECEIPT_CHECKPOINT_EVERY", "1024")),
+    )
+
+def locator(receipt_id: str) -> str:
+    return f"{LOCATOR_PREFIX}{receipt_id}"
+
+def _receipt_id(ref: str) -> str:
+    return ref[len(LOCATOR_PREFIX):] if ref.startswith(LOCATOR_PREFIX) else ref
+
+def _seg_name(n: int) -> str:
+    return f"seg-{n:06d}"
+
+class ReceiptLog:
+    def __init__(self, root: Path = LOG_DIR, cfg: Optional[LogConfig] = None):
+        self.root = root
+        self.cfg = cfg or log_config_from_env()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._index: Dict[str, Tuple[int, int, int]] = {}  # receipt_id -> (segment, offset, length)
+        self._idx_read: Dict[int, int] = {}                # segment -> bytes of its .idx already loaded
+        self._seg_end: Dict[int, int] = {}                 # segment -> end of its last indexed frame
+        self._last: Optional[Tuple[int, int]] = None      # newest indexed (segment, offset)
+        self._refresh()
+        self.ledger = ReceiptLedger(self.root, self.cfg.checkpoint_every)
+
+    # -- paths / segments -------------------------------------------------------------------------
+    def _log_path(self, seg: int) -> Path:
+        return self.root / f"{_seg_name(seg)}.log"
+
+    def _idx_path(self, seg: int) -> Path:
+        return self.root / f"{_seg_name(seg)}.idx"
+
+    def segments(self) -> List[int]:
+        return sorted(int(p.stem.split("-")[1]) for p in self.root.glob("seg-*.log"))
+
+    # -- index ------------------------------------------------------------------------------------
+    def _refresh(self) -> None:
+        """Load index lines appended since the last refresh (by this or another process)."""
+        for seg in self.segments():
+            path = self._idx_path(seg)
+            start = self._idx_read.get(seg, 0)
+            try:
+                if path.stat().st_size <= start:
+                    continue
+            except FileNotFoundError:
+                continue
+            with path.open("rb") as f:
+                f.seek(start)
+                data = f.read()
+            complete = data.rfind(b"\n") + 1  # ignore a line still being written
+            for line in data[:complete].splitlines():
+                rid, off, length = line.decode("utf-8").split("\t")
+                self._index[rid] = (seg, int(off), int(length))
+                self._seg_end[seg] = max(self._seg_end.get(seg, 0), int(off) + FRAME.size + int(length))
+                self._last = max(self._last or (seg, int(off)), (seg, int(off)))
+            self._idx_read[seg] = start + complete
+
+    def _recover(self, seg: int) -> None:
+        """Re-index frames written after the last index line (crash between the two appends) and
+        drop a torn trailing frame."""
+        path = self._log_path(seg)
+        end = path.stat().st_size
+        pos = self._seg_end.get(seg, 0)
+        if pos >= end:
+            return
+        lines: List[bytes] = []
+        with path.open("rb") as f:
+            while pos + FRAME.size <= end:
+                f.seek(pos)
+                length, flags, crc = FRAME.unpack(f.read(FRAME.size))
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                rid = str(json.loads(self._decode(payload, flags)).get("receipt_id"))
+                self._index[rid] = (seg, pos, length)
+                self._seg_end[seg] = pos + FRAME.size + length
+                self._last = max(self._last or (seg, pos), (seg, pos))
+                lines.append(f"{rid}\t{pos}\t{length}\n".encode("utf-8"))
+                pos += FRAME.size + length
+        if pos < end:
+            with path.open("r+b") as f:
+                f.truncate(pos)
+        if lines:
+            with self._idx_path(seg).open("ab") as f:
+                f.write(b"".join(lines))
+            self._idx_read[seg] = self._idx_path(seg).stat().st_size
+
+    # -- codec ------------------------------------------------------------------------------------
+    def _encode(self, record: Dict[str, Any]) -> Tuple[bytes, int]:
+        raw = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if self.cfg.compress_level > 0:
+            packed = zlib.compress(raw, self.cfg.compress_level)
+            if len(packed) < len(raw):
+                return packed, FLAG_ZLIB
+        return raw, 0
+
+    @staticmethod
+    def _decode(payload: bytes, flags: int) -> str:
+        if flags & FLAG_ZLIB:
+            payload = zlib.decompress(payload)
+        return payload.decode("utf-8")
+
+    # -- append / read ----------------------------------------------------------------------------
+    @contextlib.contextmanager
+    def exclusive(self) -> Iterator[None]:
+        """Thread lock plus an flock on the log directory (shared with other processes), with the
+        in-memory index and ledger brought up to date."""
+        with self._lock:
+            lock_fd = os.open(self.root / ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+                self._refresh()
+                segs = self.segments()
+                if segs:
+                    self._truncate_torn_idx(segs[-1])
+                    self._recover(segs[-1])
+                self._catch_up_ledger()
+                yield
+            finally:
+                os.close(lock_fd)  # releases the flock
+
+    def _truncate_torn_idx(self, seg: int) -> None:
+        path = self._idx_path(seg)
+        if path.exists() and path.stat().st_size > self._idx_read.get(seg, 0):
+            with path.open("r+b") as f:
+                f.truncate(self._idx_read.get(seg, 0))
+
+    def _catch_up_ledger(self) -> None:
+        # Chain frames indexed but not yet in the ledger: a crash between the two appends, or a
+        # log written before the ledger existed.
+        self.ledger.refresh()
+        if self.ledger.last_pos == self._last:
+            return
+        for pos in sorted((seg, off) for seg, off, _ in self._index.values()):
+            if self.ledger.last_pos is None or pos > self.ledger.last_pos:
+                record = self.read_at(*pos)
+                self.ledger.append_locked(str(record.get("receipt_id")), pos, record, self.cfg.fsync)
+
+    def append(self, record: Dict[str, Any]) -> str:
+        """Append one receipt dict (must carry receipt_id) and chain it; returns its locator."""
+        rid = str(record["receipt_id"])
+        payload, flags = self._encode(record)
+        frame = FRAME.pack(len(payload), flags, zlib.crc32(payload)) + payload
+        with self.exclusive():
+            segs = self.segments()
+            seg = segs[-1] if segs else 1
+            log_path = self._log_path(seg)
+            if log_path.exists() and log_path.stat().st_size >= self.cfg.segment_bytes:
+                seg += 1
+                log_path = self._log_path(seg)
+            with log_path.open("ab") as f:
+                offset = f.tell()
+                f.write(frame)
+                f.flush()
+                if self.cfg.fsync:
+                    os.fsync(f.fileno())
+            with self._idx_path(seg).open("ab") as f:
+                f.write(f"{rid}\t{offset}\t{len(payload)}\n".encode("utf-8"))
+                f.flush()
+                if self.cfg.fsync:
+                    os.fsync(f.fileno())
+            self._index[rid] = (seg, offset, len(payload))
+            self._seg_end[seg] = offset + len(frame)
+            self._idx_read[seg] = self._idx_path(seg).stat().st_size
+            self._last = (seg, offset)
+            self.ledger.append_locked(rid, (seg, offset), json.loads(self._decode(payload, flags)), self.cfg.fsync)
+        return locator(rid)
+
+    def seal(self) -> Optional[Dict[str, Any]]:
+        """Seal unsealed ledger entries into a checkpoint now (e.g. before an audit or a backup)."""
+        with self.exclusive():
+            return self.ledger.seal_locked()
+
+    def verify(self, full: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+        return self.ledger.verify(self, full=full)
+
+    def prove(self, ref: str) -> Optional[Dict[str, Any]]:
+        return self.ledger.prove(_receipt_id(ref))
+
+    def read_at(self, seg: int, offset: int) -> Dict[str, Any]:
+        with self._log_path(seg).open("rb") as f:
+            f.seek(offset)
+            length, flags, crc = FRAME.unpack(f.read(FRAME.size))
+            payload = f.read(length)
+        if zlib.crc32(payload) != crc:
+            raise ValueError(f"Corrupt receipt frame at {_seg_name(seg)}:{offset}")
+        return json.loads(self._decode(payload, flags))
+
+    def get(self, ref: str) -> Optional[Dict[str, Any]]:
+        """Receipt by id or locator; None if unknown."""
+        rid = _receipt_id(ref)
+        with self._lock:
+            loc = self._index.get(rid)
+            if loc is None:
+                self._refresh()
+                loc = self._index.get(rid)
+        if loc is None:
+            return None
+        return self.read_at(loc[0], loc[1])
+
+    def __contains__(self, ref: str) -> bool:
+        with self._lock:
+            self._refresh()
+            return _receipt_id(ref) in self._index
+
+    def iter_records(self, start: Optional[Tuple[int, int]] = None) -> Iterator[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        """Every stored receipt in append order as ((segment, offset), record), optionally resuming
+        after position `start`."""
+        with self._lock:
+            self._refresh()
+            positions = sorted((seg, off) for seg, off, _ in self._index.values())
+        for pos in positions:
+            if start is not None and pos <= start:
+                continue
+            yield pos, self.read_at(*pos)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            self._refresh()
+            segs = self.segments()
+            return {
+                "root": str(self.root),
+                "receipts": len(self._index),
+                "segments": len(segs),
+                "bytes": sum(self._log_path(s).stat().st_size for s in segs),
+                "compress_level": self.cfg.compress_level,
+                "segment_bytes": self.cfg.segment_bytes,
+                "ledger_entries": self.ledger.size,
+                "sealed_through": self.ledger.sealed_through,
+                "checkpoints": len(self.ledger.checkpoints),
+            }
+
+_LOG: Optional[ReceiptLog] = None
+_LOG_LOCK = threading.Lock()
+
+def get_log() -> ReceiptLog:
+    global _LOG
+    with _LOG_LOCK:
+        if _LOG is None:
+            _LOG = ReceiptLog()
+        return _LOG
+
+def migrate(src: Path = LEGACY_DIR, delete: bool = False, log: Optional[ReceiptLog] = None) -> Dict[str, int]:
+    """Import legacy per-receipt JSON files (oldest first); receipts already in the log are skipped."""
+    log = log or get_log()
+    counts = {"imported": 0, "skipped": 0, "failed": 0}
+    files = sorted(src.glob("*.json"), key=lambda p: p.stat().st_mtime) if src.exists() else []
+    for path in files:
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+            record.setdefault("receipt_id", path.stem)
+        except (OSError, ValueError) as e:
+            print(f"[RECEIPT_LOG] skipped unreadable {path.name}: {e}")
+            counts["failed"] += 1
+            continue
+        if str(record["receipt_id"]) in log:
+            counts["skipped"] += 1
+        else:
+            log.append(record)
+            counts["imported"] += 1
+        if delete:
+            path.unlink()
+    return counts
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Segmented receipt log tools")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    m = sub.add_parser("migrate", help="import legacy per-receipt JSON files")
+    m.add_argument("--src", type=Path, default=LEGACY_DIR)
+    m.add_argument("--delete", action="store_true", help="remove each file once it is in the log")
+    g = sub.add_parser("get", help="print one receipt")
+    g.add_argument("ref", help="receipt_id or receipt-log: locator")
+    sub.add_parser("stats", help="segment / receipt counts")
+    v = sub.add_parser("verify", help="check the hash chain since the last checkpoint")
+    v.add_argument("--full", action="store_true", help="re-verify every receipt and checkpoint")
+    sub.add_parser("seal", help="seal unsealed receipts into a Merkle checkpoint")
+    pr = sub.add_parser("prove", help="print a Merkle inclusion proof")
+    pr.add_argument("ref", help="receipt_id or receipt-log: locator")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "migrate":
+        print(json.dumps(migrate(args.src, args.delete)))
+    elif args.cmd == "get":
+        record = get_log().get(args.ref)
+        if record is None:
+            print(f"[RECEIPT_LOG] not found: {args.ref}", file=sys.stderr)
+            return 1
+        print(json.dumps(record, indent=2, ensure_ascii=False))
+    elif args.cmd == "verify":
+        report = get_log().verify(full=args.full)
+        print(json.dumps(report, indent=2))
+        return 0 if report["ok"] else 2
+    elif args.cmd == "seal":
+        print(json.dumps(get_log().seal()))
+    elif args.cmd == "prove":
+        log = get_log()
+        proof = log.prove(args.ref)
+        if proof is None:
+            print(f"[RECEIPT_LOG] no sealed checkpoint covers {args.ref} (run seal)", file=sys.stderr)
+            return 1
+        proof["valid"] = verify_proof(proof, log.get(args.ref))
+        print(json.dumps(proof, indent=2))
+    else:
+        print(json.dumps(get_log().stats(), indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
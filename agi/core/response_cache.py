@@ -0,0 +1,185 @@
+# agi/core/response_cache.py
+"""Deterministic response cache for temperature-0 model calls (v0.1d).
+Two tiers: in-process LRU in front of an on-disk SQLite table, both with TTL; the disk tier is
+size-bounded. Every entry is namespaced by a fingerprint of the model stack + policy files, so
+editing model_stack.yaml or SOVEREIGN_MODEL_POLICY.md invalidates everything cached before.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+ROOT_DIR = Path(__file__).resolve().parent
+DB_PATH = ROOT_DIR / "response_cache.sqlite"
+REPO_ROOT = ROOT_DIR.parent.parent
+EVICT_EVERY_PUTS = 64  # amortise the TTL/size sweep over many inserts
+FINGERPRINT_FILES = [
+    "SOVEREIGN_MODEL_POLICY.md",
+    "agi/core/model_stack.yaml",
+]
+
+@dataclass(frozen=True)
+class CacheConfig:
+    enabled: bool = True
+    memory_entries: int = 512
+    disk_entries: int = 50_000
+    ttl_s: int = 7 * 24 * 3600
+
+def config_from_dict(raw: Optional[Dict[str, Any]]) -> CacheConfig:
+    base = asdict(CacheConfig())
+    for k, v in (raw or {}).items():
+        if k in base:
+            base[k] = v
+    return CacheConfig(**base)
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def cache_key(provider: str, model_id: str, prompt: str, system_prompt: Optional[str], params: Dict[str, Any]) -> str:
+    parts = {
+        "provider": provider,
+        "model_id": model_id,
+        "prompt_hash": _sha256(prompt),
+        "system_hash": _sha256(system_prompt or ""),
+        "params": params,
+    }
+    return _sha256(json.dumps(parts, sort_keys=True))
+
+_FP_LOCK = threading.Lock()
+_FP_STATS: Tuple[Tuple[int, int], ...] = ()
+_FP_VALUE: str = ""
+
+def stack_fingerprint(root: Path = REPO_ROOT) -> str:
+    """Hash of the files that define model routing + policy; only re-hashed when their stat changes."""
+    global _FP_STATS, _FP_VALUE
+    paths = [root / rel for rel in FINGERPRINT_FILES]
+    stats = tuple((p.stat().st_size, p.stat().st_mtime_ns) if p.exists() else (-1, -1) for p in paths)
+    with _FP_LOCK:
+        if stats != _FP_STATS or not _FP_VALUE:
+            h = hashlib.sha256()
+            for p in paths:
+                h.update(p.read_bytes() if p.exists() else b"")
+            _FP_STATS, _FP_VALUE = stats, h.hexdigest()
+        return _FP_VALUE
+
+class ResponseCache:
+    def __init__(self, cfg: CacheConfig, path: Path = DB_PATH):
+        self.cfg = cfg
+        self.path = path
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._namespace: Optional[str] = None
+        self._puts_since_evict = 0
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                namespace TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_hit REAL NOT NULL,
+                payload TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_last_hit ON responses(last_hit)")
+        self._conn.commit()
+
+    def _check_namespace(self, namespace: str) -> None:
+        # Caller holds the lock. A new fingerprint drops every entry from older stacks/policies.
+        if namespace == self._namespace:
+            return
+        self._memory.clear()
+        self._conn.execute("DELETE FROM responses WHERE namespace != ?", (namespace,))
+        self._conn.commit()
+        self._namespace = namespace
+
+    def get(self, key: str, namespace: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        with self._lock:
+            self._check_namespace(namespace)
+            hit = self._memory.get(key)
+            if hit is not None:
+                created_at, payload = hit
+                if now - created_at <= self.cfg.ttl_s:
+                    self._memory.move_to_end(key)
+                    return dict(payload, cache_tier="memory")
+                del self._memory[key]
+            row = self._conn.execute("SELECT created_at, payload FROM responses WHERE cache_key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            created_at, raw = row
+            if now - created_at > self.cfg.ttl_s:
+                self._conn.execute("DELETE FROM responses WHERE cache_key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET last_hit = ? WHERE cache_key = ?", (now, key))
+            self._conn.commit()
+            payload = json.loads(raw)
+            self._remember(key, created_at, payload)
+            return dict(payload, cache_tier="disk")
+
+    def put(self, key: str, namespace: str, payload: Dict[str, Any]) -> None:
+        now = time.time()
+        with self._lock:
+            self._check_namespace(namespace)
+            self._remember(key, now, payload)
+            self._conn.execute(
+                """
+                INSERT INTO responses (cache_key, namespace, created_at, last_hit, payload)
+                VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(cache_key) DO UPDATE SET payload=excluded.payload, created_at=excluded.created_at, last_hit=excluded.last_hit
+                """,
+                (key, namespace, now, now, json.dumps(payload, ensure_ascii=False)),
+            )
+            self._puts_since_evict += 1
+            if self._puts_since_evict >= EVICT_EVERY_PUTS:
+                self._evict(now)
+                self._puts_since_evict = 0
+            self._conn.commit()
+
+    def _remember(self, key: str, created_at: float, payload: Dict[str, Any]) -> None:
+        self._memory[key] = (created_at, payload)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cfg.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, now: float) -> None:
+        self._conn.execute("DELETE FROM responses WHERE created_at < ?", (now - self.cfg.ttl_s,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()
+        overflow = count - self.cfg.disk_entries
+        if overflow > 0:
+            self._conn.execute(
+                "DELETE FROM responses WHERE cache_key IN (SELECT cache_key FROM responses ORDER BY last_hit ASC LIMIT ?)",
+                (overflow,),
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+_CACHE: Optional[ResponseCache] = None
+_CACHE_LOCK = threading.Lock()
+
+def get_cache(raw_cfg: Optional[Dict[str, Any]] = None) -> Optional[ResponseCache]:
+    """Process-wide cache, or None when disabled in model_stack.yaml."""
+    global _CACHE
+    cfg = config_from_dict(raw_cfg)
+    if not cfg.enabled:
+        return None
+    with _CACHE_LOCK:
+        if _CACHE is None:
+            _CACHE = ResponseCache(cfg)
+        elif _CACHE.cfg != cfg:
+            _CACHE.cfg = cfg
+        return _CACHE
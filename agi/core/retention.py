@@ -0,0 +1,340 @@
+# agi/core/retention.py
+"""Retention, archival and compaction for sovereign_model.sqlite (v0.1d).
+Cold answers (older than max_age_days, beyond max_rows, or the oldest while the database exceeds
+max_db_mb) move, together with their audit receipts and assistant messages, into gzip JSONL
+archive shards; the rows are then deleted from the hot database and the freed pages released with
+bounded incremental vacuum steps.
+
+Every shard is recorded in ARCHIVE_DIR/MANIFEST.jsonl with its sha256, row counts, time range and
+a sha256 per archived audit receipt. Manifest entries are hash-linked, so verify_archive() can
+prove no shard or entry was altered, dropped or reordered.
+
+Usage:
+    python -m agi.core.retention run [--max-age-days 90] [--max-rows N] [--max-db-mb N] [--dry-run]
+    python -m agi.core.retention vacuum [--pages N] [--convert]
+    python -m agi.core.retention verify
+    python -m agi.core.retention find <receipt_id | answer_id>
+"""
+from __future__ import annotations
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from .receipt import DB_PATH, flush_sink
+from .receipt_log import get_log
+
+ARCHIVE_DIR = Path(__file__).resolve().parent / "archive"
+MANIFEST_NAME = "MANIFEST.jsonl"
+
+@dataclass(frozen=True)
+class RetentionPolicy:
+    max_age_days: Optional[float] = 90.0  # archive answers created before now - max_age_days
+    max_rows: Optional[int] = None        # keep at most this many answers hot
+    max_db_mb: Optional[float] = None     # archive oldest batches while live pages exceed this
+    batch_size: int = 1000                # answers per shard
+    vacuum_pages: int = 4096              # pages released per incremental vacuum step
+
+def policy_from_env() -> RetentionPolicy:
+    def opt(name: str, cast: Any, default: Any) -> Any:
+        raw = os.getenv(name)
+        if raw is None:
+            return default
+        return None if raw.lower() in ("", "none", "off") else cast(raw)
+
+    base = RetentionPolicy()
+    return RetentionPolicy(
+        max_age_days=opt("SOVEREIGN_RETENTION_MAX_AGE_DAYS", float, base.max_age_days),
+        max_rows=opt("SOVEREIGN_RETENTION_MAX_ROWS", int, base.max_rows),
+        max_db_mb=opt("SOVEREIGN_RETENTION_MAX_DB_MB", float, base.max_db_mb),
+        batch_size=int(os.getenv("SOVEREIGN_RETENTION_BATCH", str(base.batch_size))),
+        vacuum_pages=int(os.getenv("SOVEREIGN_RETENTION_VACUUM_PAGES", str(base.vacuum_pages))),
+    )
+
+def _connect(db_path: Path) -> sqlite3.Connection:
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+def _sha256_file(path: Path) -> str:
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _entry_hash(entry: Dict[str, Any]) -> str:
+    body = {k: v for k, v in entry.items() if k != "entry_hash"}
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(",", ":")).encode("utf-8")).hexdigest()
+
+def read_manifest(archive_dir: Path = ARCHIVE_DIR) -> Iterator[Dict[str, Any]]:
+    path = archive_dir / MANIFEST_NAME
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def _last_entry(archive_dir: Path) -> Optional[Dict[str, Any]]:
+    last = None
+    for last in read_manifest(archive_dir):
+        pass
+    return last
+
+def live_bytes(conn: sqlite3.Connection) -> int:
+    page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+    pages = conn.execute("PRAGMA page_count").fetchone()[0]
+    free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return (pages - free) * page_size
+
+def _cold_batch(conn: sqlite3.Connection, policy: RetentionPolicy, now: float) -> List[sqlite3.Row]:
+    """Next oldest batch that some policy wants out of the hot database (empty when none)."""
+    limit = policy.batch_size
+    reasons = []
+    if policy.max_age_days is not None:
+        cutoff = time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(now - policy.max_age_days * 86400))
+        aged = conn.execute("SELECT COUNT(*) FROM (SELECT 1 FROM sovereign_answers WHERE created_at < ? LIMIT ?)", (cutoff, limit)).fetchone()[0]
+        reasons.append(aged)
+    if policy.max_rows is not None:
+        total = conn.execute("SELECT COUNT(*) FROM sovereign_answers").fetchone()[0]
+        reasons.append(max(0, total - policy.max_rows))
+    if policy.max_db_mb is not None and live_bytes(conn) > policy.max_db_mb * 1024 * 1024:
+        reasons.append(limit)
+    n = min(max(reasons, default=0), limit)
+    if n <= 0:
+        return []
+    return conn.execute(
+        "SELECT rowid AS _rowid, * FROM sovereign_answers ORDER BY created_at, rowid LIMIT ?", (n,)
+    ).fetchall()
+
+def _write_shard(archive_dir: Path, conn: sqlite3.Connection, rows: List[sqlite3.Row]) -> Dict[str, Any]:
+    """Write answers + their messages to a new shard; returns the (unlinked) manifest entry."""
+    answer_ids = [r["answer_id"] for r in rows]
+    first, last = rows[0]["created_at"], rows[-1]["created_at"]
+    name = f"answers-{first.replace(':', '').replace('-', '')}-{hashlib.sha256(''.join(answer_ids).encode()).hexdigest()[:12]}.jsonl.gz"
+    final = archive_dir / name
+    tmp = final.with_suffix(".tmp")
+    receipts: Dict[str, str] = {}
+    n_messages = 0
+    with gzip.open(tmp, "wt", encoding="utf-8") as out:
+        for r in rows:
+            row = {k: r[k] for k in r.keys() if k != "_rowid"}
+            if row.get("audit_receipt"):
+                receipts[row["receipt_id"]] = hashlib.sha256(row["audit_receipt"].encode("utf-8")).hexdigest()
+            out.write(json.dumps({"table": "sovereign_answers", "row": row}, ensure_ascii=False) + "\n")
+        for i in range(0, len(answer_ids), 500):
+            chunk = answer_ids[i:i + 500]
+            for m in conn.execute(
+                f"SELECT * FROM assistant_messages WHERE answer_id IN ({','.join('?' * len(chunk))}) ORDER BY id", chunk
+            ):
+                out.write(json.dumps({"table": "assistant_messages", "row": dict(m)}, ensure_ascii=False) + "\n")
+                n_messages += 1
+    with tmp.open("rb") as f:
+        os.fsync(f.fileno())
+    os.replace(tmp, final)
+    return {
+        "shard": name,
+        "sha256": _sha256_file(final),
+        "answers": len(rows),
+        "messages": n_messages,
+        "created_from": first,
+        "created_to": last,
+        "answer_ids": answer_ids,
+        "receipts": receipts,  # receipt_id -> sha256 of its audit_receipt JSON as stored
+        "archived_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+def _append_manifest(archive_dir: Path, entry: Dict[str, Any]) -> Dict[str, Any]:
+    prev = _last_entry(archive_dir)
+    entry["seq"] = prev["seq"] + 1 if prev else 0
+    entry["prev_entry_hash"] = prev["entry_hash"] if prev else None
+    entry["entry_hash"] = _entry_hash(entry)
+    with (archive_dir / MANIFEST_NAME).open("a", encoding="utf-8") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+    return entry
+
+def incremental_vacuum(conn: sqlite3.Connection, pages: int) -> int:
+    """Release up to `pages` free pages; returns how many were released (0 unless auto_vacuum=INCREMENTAL)."""
+    before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # executescript steps the pragma to completion; a plain execute() releases a single page.
+    conn.executescript(f"PRAGMA incremental_vacuum({int(pages)});")
+    return before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+
+def convert_to_incremental(db_path: Path = DB_PATH) -> None:
+    """One-off full VACUUM switching an existing database to auto_vacuum=INCREMENTAL."""
+    flush_sink(db_path)
+    conn = _connect(db_path)
+    try:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+def run_retention(policy: Optional[RetentionPolicy] = None, db_path: Path = DB_PATH, archive_dir: Path = ARCHIVE_DIR,
+                  dry_run: bool = False, max_batches: Optional[int] = None) -> Dict[str, Any]:
+    """Archive cold batches until every policy is satisfied, then take one incremental vacuum step.
+    Each batch is: shard written + fsynced, manifest entry appended, then rows deleted in one
+    transaction, so a crash can at worst leave rows that are both archived and still hot (the next
+    run re-archives them into a new shard; nothing is lost)."""
+    policy = policy or policy_from_env()
+    archive_dir.mkdir(parents=True, exist_ok=True)
+    flush_sink(db_path)
+    conn = _connect(db_path)
+    report: Dict[str, Any] = {"policy": asdict(policy), "shards": [], "answers": 0, "messages": 0, "vacuumed_pages": 0}
+    now = time.time()
+    try:
+        seen_batches = 0
+        while max_batches is None or seen_batches < max_batches:
+            rows = _cold_batch(conn, policy, now)
+            if not rows:
+                break
+            seen_batches += 1
+            if dry_run:
+                report["answers"] += len(rows)
+                break
+            entry = _append_manifest(archive_dir, _write_shard(archive_dir, conn, rows))
+            ids = entry["answer_ids"]
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for i in range(0, len(ids), 500):
+                    chunk = ids[i:i + 500]
+                    marks = ",".join("?" * len(chunk))
+                    conn.execute(f"DELETE FROM assistant_messages WHERE answer_id IN ({marks})", chunk)
+                    conn.execute(f"DELETE FROM sovereign_answers WHERE answer_id IN ({marks})", chunk)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            report["shards"].append(entry["shard"])
+            report["answers"] += entry["answers"]
+            report["messages"] += entry["messages"]
+        if not dry_run:
+            report["vacuumed_pages"] = incremental_vacuum(conn, policy.vacuum_pages)
+        report["live_bytes"] = live_bytes(conn)
+    finally:
+        conn.close()
+    return report
+
+def verify_archive(archive_dir: Path = ARCHIVE_DIR) -> Dict[str, Any]:
+    """Check manifest links and every shard's sha256."""
+    errors: List[str] = []
+    prev_hash: Optional[str] = None
+    n = 0
+    for n, entry in enumerate(read_manifest(archive_dir), 1):
+        if entry.get("prev_entry_hash") != prev_hash or _entry_hash(entry) != entry.get("entry_hash"):
+            errors.append(f"manifest entry {entry.get('seq')}: link/hash mismatch")
+        prev_hash = entry.get("entry_hash")
+        shard = archive_dir / entry["shard"]
+        if not shard.exists():
+            errors.append(f"{entry['shard']}: missing")
+        elif _sha256_file(shard) != entry["sha256"]:
+            errors.append(f"{entry['shard']}: sha256 mismatch")
+    return {"ok": not errors, "shards": n, "errors": errors}
+
+def find_archived(ref: str, archive_dir: Path = ARCHIVE_DIR) -> Optional[Dict[str, Any]]:
+    """An archived answer (by receipt_id or answer_id) with its messages; the audit receipt is
+    checked against the hash recorded in the manifest and paired with its ledger proof."""
+    for entry in read_manifest(archive_dir):
+        if ref not in entry["receipts"] and ref not in entry["answer_ids"]:
+            continue
+        answer: Optional[Dict[str, Any]] = None
+        messages: List[Dict[str, Any]] = []
+        with gzip.open(archive_dir / entry["shard"], "rt", encoding="utf-8") as f:
+            for line in f:
+                rec = json.loads(line)
+                row = rec["row"]
+                if rec["table"] == "sovereign_answers" and ref in (row["answer_id"], row["receipt_id"]):
+                    answer = row
+                elif rec["table"] == "assistant_messages" and answer is not None and row["answer_id"] == answer["answer_id"]:
+                    messages.append(row)
+        if answer is None:
+            return None
+        audit = answer.get("audit_receipt")
+        expected = entry["receipts"].get(answer["receipt_id"])
+        verified = expected is not None and audit is not None and hashlib.sha256(audit.encode("utf-8")).hexdigest() == expected
+        # The receipt log is never pruned, so the ledger can still prove the original receipt.
+        proof = get_log().prove(answer["receipt_id"])
+        return {"answer": answer, "messages": messages, "shard": entry["shard"], "audit_verified": verified, "ledger_proof": proof}
+    return None
+
+class RetentionScheduler(threading.Thread):
+    """Background retention: one run (bounded to `max_batches` shards) every `interval_s`."""
+
+    def __init__(self, policy: Optional[RetentionPolicy] = None, interval_s: float = 3600.0, max_batches: int = 10):
+        super().__init__(name="retention", daemon=True)
+        self.policy = policy
+        self.interval_s = interval_s
+        self.max_batches = max_batches
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            try:
+                run_retention(self.policy, max_batches=self.max_batches)
+            except Exception as e:  # keep the schedule; report and retry next tick
+                print(f"[RETENTION] run failed: {e}")
+
+    def stop(self) -> None:
+        self._stop_event.set()
+
+def start_scheduler(policy: Optional[RetentionPolicy] = None, interval_s: float = 3600.0, max_batches: int = 10) -> RetentionScheduler:
+    scheduler = RetentionScheduler(policy, interval_s, max_batches)
+    scheduler.start()
+    return scheduler
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Retention / archival for sovereign_model.sqlite")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    r = sub.add_parser("run", help="archive cold rows and take one incremental vacuum step")
+    base = policy_from_env()
+    r.add_argument("--max-age-days", type=float, default=base.max_age_days)
+    r.add_argument("--max-rows", type=int, default=base.max_rows)
+    r.add_argument("--max-db-mb", type=float, default=base.max_db_mb)
+    r.add_argument("--batch-size", type=int, default=base.batch_size)
+    r.add_argument("--max-batches", type=int)
+    r.add_argument("--dry-run", action="store_true")
+    v = sub.add_parser("vacuum", help="release free pages")
+    v.add_argument("--pages", type=int, default=base.vacuum_pages)
+    v.add_argument("--convert", action="store_true", help="one-off full VACUUM to enable incremental vacuum")
+    sub.add_parser("verify", help="check the archive manifest and shard hashes")
+    f = sub.add_parser("find", help="print an archived answer")
+    f.add_argument("ref", help="receipt_id or answer_id")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "run":
+        policy = RetentionPolicy(args.max_age_days, args.max_rows, args.max_db_mb, args.batch_size, base.vacuum_pages)
+        print(json.dumps(run_retention(policy, dry_run=args.dry_run, max_batches=args.max_batches), indent=2))
+    elif args.cmd == "vacuum":
+        if args.convert:
+            convert_to_incremental()
+        conn = _connect(DB_PATH)
+        try:
+            print(json.dumps({"vacuumed_pages": incremental_vacuum(conn, args.pages), "live_bytes": live_bytes(conn)}))
+        finally:
+            conn.close()
+    elif args.cmd == "verify":
+        report = verify_archive()
+        print(json.dumps(report, indent=2))
+        return 0 if report["ok"] else 2
+    else:
+        found = find_archived(args.ref)
+        if found is None:
+            print(f"[RETENTION] not archived: {args.ref}")
+            return 1
+        print(json.dumps(found, indent=2, ensure_ascii=False))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,7 +1,7 @@
 # agi/core/roles/interpreter.py
 from __future__ import annotations
-from typing import Dict, Any
-from ..model_runner import run_model_for_task
+from typing import Callable, Dict, Any, Optional
+from ..model_runner import run_model_for_task, run_model_for_task_async
 
 def build_interpreter_prompt(question: str, raw_answer: str) -> str:
     return (
@@ -14,7 +14,12 @@ def build_interpreter_prompt(question: str, raw_answer: str) -> str:
         "Explain this for a non-technical person."
     )
 
-def run_interpreter(question: str, raw_answer: str, context: Dict[str, Any]) -> Dict[str, Any]:
+def run_interpreter(question: str, raw_answer: str, context: Dict[str, Any], on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
     prompt = build_interpreter_prompt(question, raw_answer)
-    explained_answer = run_model_for_task(task_type="explanation", prompt=prompt)
-    return {"role": "interpreter", "prompt": prompt, "explained_answer": explained_answer}
+    result = run_model_for_task(task_type="explanation", prompt=prompt, sensitivity=context.get("sensitivity", "normal"), on_chunk=on_chunk)
+    return {"role": "interpreter", "prompt": prompt, "explained_answer": result.get("text", "")}
+
+async def run_interpreter_async(question: str, raw_answer: str, context: Dict[str, Any]) -> Dict[str, Any]:
+    prompt = build_interpreter_prompt(question, raw_answer)
+    result = await run_model_for_task_async(task_type="explanation", prompt=prompt, sensitivity=context.get("sensitivity", "normal"))
+    return {"role": "interpreter", "prompt": prompt, "explained_answer": result.get("text", "")}
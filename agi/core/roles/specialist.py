@@ -1,7 +1,8 @@
 # agi/core/roles/specialist.py
 from __future__ import annotations
-from typing import Dict, Any
-from ..model_runner import run_model_for_task
+from typing import Callable, Dict, Any, Optional
+from ..model_runner import run_model_for_task, run_model_for_task_async
+from ..policy_engine import StreamScanner, get_engine
 
 def build_specialist_prompt(question: str, context: Dict[str, Any]) -> str:
     return (
@@ -12,12 +13,49 @@ def build_specialist_prompt(question: str, context: Dict[str, Any]) -> str:
         f"Question:\n{question}\n"
     )
 
-def run_specialist(question: str, context: Dict[str, Any]) -> Dict[str, Any]:
-    prompt = build_specialist_prompt(question, context)
-    result = run_model_for_task(task_type="governance", prompt=prompt)
+def _specialist_output(prompt: str, result: Dict[str, Any]) -> Dict[str, Any]:
     answer_text = result.get("text", "")
     return {
         "role": "specialist",
         "answer": answer_text,
         "meta": {"prompt": prompt, "model_key": result.get("model_key"), "provider": result.get("provider")},
+        "receipt": result.get("receipt"),
     }
+
+def _stream_guard(on_chunk: Optional[Callable[[str], None]]) -> Optional[StreamScanner]:
+    # Only a streaming caller gets the early stop: it is the one that would otherwise show a refused
+    # answer as it is generated. Blocking calls keep the blocking path (cache, hedging) and are
+    # checked by the validator on the full text.
+    return get_engine().stream_scanner() if on_chunk is not None else None
+
+def _guarded_output(prompt: str, result: Dict[str, Any], scanner: Optional[StreamScanner]) -> Dict[str, Any]:
+    out = _specialist_output(prompt, result)
+    if scanner is not None and scanner.blocked:
+        out["aborted"] = True
+        out["abort_hits"] = [{"code": h.code, "pattern": h.pattern, "start": h.start, "end": h.end} for h in scanner.hits if h.action == "block"]
+    return out
+
+def run_specialist(question: str, context: Dict[str, Any], on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    prompt = build_specialist_prompt(question, context)
+    scanner = _stream_guard(on_chunk)
+    result = run_model_for_task(
+        task_type="governance",
+        prompt=prompt,
+        sensitivity=context.get("sensitivity", "normal"),
+        on_chunk=on_chunk,
+        stop_when=scanner.feed if scanner is not None else None,
+    )
+    return _guarded_output(prompt, result, scanner)
+
+async def run_specialist_async(question: str, context: Dict[str, Any], on_chunk: Optional[Callable[[str], None]] = None) -> Dict[str, Any]:
+    """Async run_specialist; `on_chunk` is called from the model worker thread."""
+    prompt = build_specialist_prompt(question, context)
+    scanner = _stream_guard(on_chunk)
+    result = await run_model_for_task_async(
+        task_type="governance",
+        prompt=prompt,
+        sensitivity=context.get("sensitivity", "normal"),
+        on_chunk=on_chunk,
+        stop_when=scanner.feed if scanner is not None else None,
+    )
+    return _guarded_output(prompt, result, scanner)
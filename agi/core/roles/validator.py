@@ -1,17 +1,13 @@
 # agi/core/roles/validator.py
 from __future__ import annotations
 from typing import Dict, Any, List
-import re
-
-HARD_REFUSALS = [
-    r"\bmake\s+a\s+bomb\b",
-    r"\bcredit\s+card\s+fraud\b",
-    r"\bhack\s+.*server\b",
-    r"\bkill\b",
-    r"\bmanufacture\s+drugs\b",
-]
-PROFESSIONAL_CLAIMS = [r"\bi am a (doctor|lawyer|attorney|certified|surgeon)\b"]
-UNCERTAINTY_WORDS = ["maybe", "possibly", "unclear", "unknown"]
+
+from ..policy_engine import DEFAULT_RULE_SETS, Hit, get_engine
+
+# Built-in defaults; live rule sets come from policy_rules.yaml via the policy engine.
+HARD_REFUSALS = DEFAULT_RULE_SETS["HARD_REFUSAL"]["patterns"]
+PROFESSIONAL_CLAIMS = DEFAULT_RULE_SETS["PROFESSIONAL_MISREPRESENTATION"]["patterns"]
+UNCERTAINTY_WORDS = DEFAULT_RULE_SETS["UNCERTAINTY"]["patterns"]
 
 REFUSAL_TEMPLATE = (
     "I must decline providing that assistance under the Sovereign policy. "
@@ -19,32 +15,32 @@ REFUSAL_TEMPLATE = (
 )
 
 
-def scan_patterns(text: str, patterns: List[str]) -> List[str]:
-    hits = []
-    for pat in patterns:
-        if re.search(pat, text, flags=re.IGNORECASE):
-            hits.append(pat)
-    return hits
-
+def _violations_from_hits(hits: List[Hit], rule_order: Dict[Any, int]) -> List[Dict[str, Any]]:
+    # One violation per rule code (rule-set order), listing distinct patterns plus every hit offset.
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for h in sorted(hits, key=lambda h: (rule_order[(h.code, h.pattern)], h.start)):
+        if h.action == "qualifier":
+            continue
+        v = grouped.setdefault(h.code, {"code": h.code, "action": h.action, "pats": [], "offsets": []})
+        if h.pattern not in v["pats"]:
+            v["pats"].append(h.pattern)
+        v["offsets"].append([h.start, h.end])
+    return [{"code": v["code"], "patterns": ",".join(v["pats"]), "action": v["action"], "offsets": v["offsets"]} for v in grouped.values()]
 
 def run_validator(specialist_out: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     raw = specialist_out.get("answer", "")
     answer = raw if isinstance(raw, str) else str(raw)
-    violations: List[Dict[str, str]] = []
-    hard_hits = scan_patterns(answer, HARD_REFUSALS)
-    if hard_hits:
-        violations.append({"code": "HARD_REFUSAL", "patterns": ",".join(hard_hits)})
-    prof_hits = scan_patterns(answer, PROFESSIONAL_CLAIMS)
-    if prof_hits:
-        violations.append({"code": "PROFESSIONAL_MISREPRESENTATION", "patterns": ",".join(prof_hits)})
+    engine = get_engine()
+    hits = engine.scan(answer)  # single pass over every rule set
+    violations: List[Dict[str, Any]] = _violations_from_hits(hits, engine.rule_order)
 
     # Overconfidence: if answer lacks uncertainty words AND is short disclaimers free when question seems broad
     # Heuristic minimal for v0.1b
-    if not any(w in answer.lower() for w in UNCERTAINTY_WORDS) and len(answer.split()) > 120:
+    if not any(h.action == "qualifier" for h in hits) and len(answer.split()) > 120:
         # If no qualifiers for a long answer mark potential overconfidence
         violations.append({"code": "POTENTIAL_OVERCERTAINTY", "patterns": "none"})
 
-    policy_ok = len([v for v in violations if v["code"] == "HARD_REFUSAL"]) == 0
+    policy_ok = not any(v.get("action") == "block" for v in violations)
     safe_answer = answer
     if not policy_ok:
         safe_answer = REFUSAL_TEMPLATE
@@ -55,4 +51,6 @@ def run_validator(specialist_out: Dict[str, Any], context: Dict[str, Any]) -> Di
         "violations": violations,
         "original": answer,
         "answer": safe_answer,
+        "rules_version": engine.version,
+        "aborted_stream": bool(specialist_out.get("aborted")),
     }
@@ -0,0 +1,66 @@
+# agi/core/singleflight.py
+"""Single-flight call coalescing (v0.1d).
+Concurrent calls with the same key share one execution: the first caller (leader) runs the work,
+later callers (followers) wait for and receive the same result or exception. Works for threads
+and asyncio tasks alike; an in-flight call is a concurrent.futures.Future either side can wait on.
+"""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import Future
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, Future] = {}
+
+    def _claim(self, key: Hashable) -> Tuple[Future, bool]:
+        with self._lock:
+            fut = self._calls.get(key)
+            if fut is not None:
+                return fut, False
+            fut = self._calls[key] = Future()
+            return fut, True
+
+    def _settle(self, key: Hashable, fut: Future, result: Any = None, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._calls.pop(key, None)  # later arrivals start a fresh execution
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+    def do(self, key: Hashable, fn: Callable[[], Any], join: bool = True) -> Tuple[Any, bool]:
+        """(result, shared): shared is True when this caller joined another caller's execution.
+        With join=False the caller never waits on others: it leads if the key is free and otherwise
+        runs its own unshared execution."""
+        fut, leader = self._claim(key)
+        if not leader:
+            if not join:
+                return fn(), False
+            return fut.result(), True
+        try:
+            result = fn()
+        except BaseException as e:
+            self._settle(key, fut, error=e)
+            raise
+        self._settle(key, fut, result)
+        return result, False
+
+    async def do_async(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        fut, leader = self._claim(key)
+        if not leader:
+            return await asyncio.wrap_future(fut), True
+        try:
+            result = await fn()
+        except BaseException as e:
+            self._settle(key, fut, error=e)
+            raise
+        self._settle(key, fut, result)
+        return result, False
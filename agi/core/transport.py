@@ -0,0 +1,160 @@
+# agi/core/transport.py
+"""Pooled provider transports for the model runner (v0.1d).
+One shared keep-alive connection pool per provider, reused by every generate() call.
+Pool sizing / keep-alive / timeouts come from the `transport` section of model_stack.yaml.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, asdict
+from typing import Any, Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Optional Anthropic import (remote provider)
+try:
+    import anthropic  # type: ignore
+    import httpx  # type: ignore  # shipped as an anthropic dependency
+except Exception:  # pragma: no cover
+    anthropic = None  # fallback
+    httpx = None
+
+@dataclass(frozen=True)
+class TransportConfig:
+    pool_size: int = 8
+    keep_alive: bool = True
+    timeout_s: float = 120.0
+    base_url: Optional[str] = None
+
+DEFAULT_CONFIGS: Dict[str, TransportConfig] = {
+    "ollama": TransportConfig(base_url="http://localhost:11434"),
+    "anthropic": TransportConfig(timeout_s=60.0),
+}
+
+def config_from_dict(provider: str, raw: Optional[Dict[str, Any]]) -> TransportConfig:
+    base = asdict(DEFAULT_CONFIGS.get(provider, TransportConfig()))
+    for k, v in (raw or {}).items():
+        if k in base:
+            base[k] = v
+    return TransportConfig(**base)
+
+class HttpTransport:
+    """requests.Session with a bounded urllib3 pool; tracks connection reuse."""
+
+    def __init__(self, provider: str, cfg: TransportConfig):
+        self.provider = provider
+        self.cfg = cfg
+        self.session = requests.Session()
+        self._adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cfg.pool_size)
+        self.session.mount("http://", self._adapter)
+        self.session.mount("https://", self._adapter)
+        if not cfg.keep_alive:
+            self.session.headers["Connection"] = "close"
+        self._lock = threading.Lock()
+        self._seen_connections: Dict[int, int] = {}
+        self.requests_sent = 0
+        self.connections_opened = 0
+
+    def post(self, path: str, payload: Dict[str, Any], timeout_s: Optional[float] = None, stream: bool = False) -> Tuple[requests.Response, Dict[str, Any]]:
+        url = (self.cfg.base_url or "").rstrip("/") + path
+        resp = self.session.post(url, json=payload, timeout=timeout_s or self.cfg.timeout_s, stream=stream)
+        pool = getattr(resp.raw, "_pool", None)
+        with self._lock:
+            # Best-effort under concurrency: a parallel call may open a connection in between.
+            opened = 0
+            if pool is not None:
+                opened = max(pool.num_connections - self._seen_connections.get(id(pool), 0), 0)
+                self._seen_connections[id(pool)] = pool.num_connections
+            self.requests_sent += 1
+            self.connections_opened += opened
+            stats = {
+                "pool": self.provider,
+                "connection_reused": opened == 0,
+                "pool_size": self.cfg.pool_size,
+                "pool_requests": self.requests_sent,
+                "pool_connections_opened": self.connections_opened,
+            }
+        return resp, stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pool_size": self.cfg.pool_size, "requests": self.requests_sent, "connections_opened": self.connections_opened}
+
+    def close(self) -> None:
+        self.session.close()
+
+class AnthropicTransport:
+    """One long-lived Anthropic client (and its httpx pool) per API key."""
+
+    def __init__(self, cfg: TransportConfig):
+        self.cfg = cfg
+        self._clients: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.requests_sent = 0
+        self.clients_built = 0
+
+    def client(self, api_key: str) -> Tuple[Any, Dict[str, Any]]:
+        if anthropic is None:
+            raise RuntimeError("Anthropic library not available")
+        with self._lock:
+            client = self._clients.get(api_key)
+            reused = client is not None
+            if client is None:
+                keepalive = self.cfg.pool_size if self.cfg.keep_alive else 0
+                limits = httpx.Limits(max_connections=self.cfg.pool_size, max_keepalive_connections=keepalive)
+                client = anthropic.Anthropic(
+                    api_key=api_key,
+                    timeout=self.cfg.timeout_s,
+                    http_client=httpx.Client(limits=limits, timeout=self.cfg.timeout_s),
+                )
+                self._clients[api_key] = client
+                self.clients_built += 1
+            self.requests_sent += 1
+            stats = {
+                "pool": "anthropic",
+                "client_reused": reused,
+                "pool_size": self.cfg.pool_size,
+                "pool_requests": self.requests_sent,
+            }
+        return client, stats
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"pool_size": self.cfg.pool_size, "requests": self.requests_sent, "clients_built": self.clients_built}
+
+    def close(self) -> None:
+        with self._lock:
+            for c in self._clients.values():
+                try:
+                    c.close()
+                except Exception:
+                    pass
+            self._clients.clear()
+
+_REGISTRY: Dict[str, Any] = {}
+_REGISTRY_LOCK = threading.Lock()
+
+def get_transport(provider: str, raw_cfg: Optional[Dict[str, Any]] = None) -> Any:
+    """Return the shared transport for `provider`, rebuilding it only if its config changed."""
+    cfg = config_from_dict(provider, raw_cfg)
+    with _REGISTRY_LOCK:
+        current = _REGISTRY.get(provider)
+        if current is not None and current.cfg == cfg:
+            return current
+        if current is not None:
+            current.close()
+        transport = AnthropicTransport(cfg) if provider == "anthropic" else HttpTransport(provider, cfg)
+        _REGISTRY[provider] = transport
+        return transport
+
+def transport_stats() -> Dict[str, Dict[str, Any]]:
+    with _REGISTRY_LOCK:
+        items = list(_REGISTRY.items())
+    return {name: t.stats() for name, t in items}
+
+def close_all() -> None:
+    with _REGISTRY_LOCK:
+        for t in _REGISTRY.values():
+            t.close()
+        _REGISTRY.clear()
@@ -0,0 +1,149 @@
+# agi/core/triad_batch.py
+"""Batch triad runner (v0.1d).
+Runs many questions through specialist -> validator -> arbiter (-> interpreter) on a bounded
+thread or process pool and streams one JSONL result line per question as each finishes.
+
+Usage:
+    python -m agi.core.triad_batch questions.jsonl -o results.jsonl --mode raw --workers 8
+
+Input lines are either JSON strings or objects with "question" and optional "id", "mode",
+"sensitivity", "parent_receipt_id". Use "-" for stdin / stdout. Malformed lines and items without a
+question come back as status="error" rows with their index; the rest of the batch still runs.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, Optional, Set, TextIO, Union
+
+from .receipt import init_db
+from .triad_harness import ResponseMode, run_triad
+
+BatchItem = Union[str, Dict[str, Any]]
+
+class MalformedItem(ValueError):
+    """An input line that could not be parsed; reported as an error row instead of aborting the batch."""
+
+def _normalise(index: int, item: Union[BatchItem, MalformedItem], mode: ResponseMode, sensitivity: str) -> Dict[str, Any]:
+    """Job dict for _run_one, or a finished status="error" row when the item is unusable."""
+    if isinstance(item, str):
+        item = {"question": item}
+    error = None
+    if isinstance(item, MalformedItem):
+        error, item = str(item), {}
+    elif not isinstance(item, dict):
+        error, item = f"Batch item {index} is not a string or object", {}
+    elif not item.get("question"):
+        error = f"Batch item {index} has no 'question'"
+    if error is not None:
+        return {"index": index, "id": item.get("id", index), "mode": item.get("mode", mode), "status": "error", "error": error}
+    return {
+        "index": index,
+        "id": item.get("id", index),
+        "question": item["question"],
+        "mode": item.get("mode", mode),
+        "sensitivity": item.get("sensitivity", sensitivity),
+        "parent_receipt_id": item.get("parent_receipt_id"),
+    }
+
+def _run_one(job: Dict[str, Any]) -> Dict[str, Any]:
+    # Module-level so it pickles for ProcessPoolExecutor.
+    out: Dict[str, Any] = {"index": job["index"], "id": job["id"], "mode": job["mode"]}
+    try:
+        res = run_triad(job["question"], mode=job["mode"], parent_receipt_id=job["parent_receipt_id"], sensitivity=job["sensitivity"])
+    except Exception as e:  # one bad question must not sink the batch
+        out.update({"status": "error", "error": str(e)})
+        return out
+    out.update({
+        "status": "ok",
+        "answer_id": res["answer_id"],
+        "receipt_id": res["receipt_id"],
+        "policy_ok": res["policy_ok"],
+        "violations": res["violations"],
+        "answer": res["answer"],
+        "receipt_path": res["receipt_path"],
+    })
+    return out
+
+def run_triad_batch(
+    questions: Iterable[BatchItem],
+    mode: ResponseMode = "raw",
+    workers: int = 4,
+    sensitivity: str = "normal",
+    use_processes: bool = False,
+    max_pending: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """Yield one result dict per question in completion order.
+    `questions` is consumed lazily: at most `max_pending` (default 2 x workers) jobs are queued or
+    running at once, so arbitrarily large inputs run in bounded memory.
+    """
+    if workers < 1:
+        raise ValueError("workers must be >= 1")
+    limit = max_pending or workers * 2
+    pool: Executor = ProcessPoolExecutor(max_workers=workers) if use_processes else ThreadPoolExecutor(max_workers=workers, thread_name_prefix="triad")
+    pending: Set[Future] = set()
+    source = iter(questions)
+    exhausted = False
+    index = 0
+    with pool:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < limit:
+                try:
+                    item = next(source)
+                except StopIteration:
+                    exhausted = True
+                    break
+                job = _normalise(index, item, mode, sensitivity)
+                index += 1
+                if "status" in job:
+                    yield job
+                    continue
+                pending.add(pool.submit(_run_one, job))
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                yield fut.result()
+
+def read_questions(stream: TextIO) -> Iterator[Union[BatchItem, MalformedItem]]:
+    for lineno, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except json.JSONDecodeError as e:
+            yield MalformedItem(f"Line {lineno} is not valid JSON: {e}")
+
+def main(argv: Optional[list] = None) -> int:
+    ap = argparse.ArgumentParser(description="Run a JSONL file of questions through the Sovereign triad.")
+    ap.add_argument("input", help="JSONL questions file, or - for stdin")
+    ap.add_argument("-o", "--output", default="-", help="JSONL results file, or - for stdout")
+    ap.add_argument("--mode", default="raw", choices=["raw", "explained", "discussion"])
+    ap.add_argument("--sensitivity", default="normal", choices=["normal", "high"])
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--max-pending", type=int, default=None, help="in-flight bound (default 2 x workers)")
+    ap.add_argument("--processes", action="store_true", help="use a process pool instead of threads")
+    args = ap.parse_args(argv)
+
+    init_db()
+    src = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    failures = 0
+    try:
+        for res in run_triad_batch(read_questions(src), mode=args.mode, workers=args.workers, sensitivity=args.sensitivity,
+                                   use_processes=args.processes, max_pending=args.max_pending):
+            failures += res["status"] != "ok"
+            dst.write(json.dumps(res, ensure_ascii=False) + "\n")
+            dst.flush()
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
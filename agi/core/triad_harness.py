@@ -1,12 +1,15 @@
 # agi/core/triad_harness.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, Literal, Optional
-import time, json, hashlib, uuid
+from typing import Callable, Dict, Any, List, Literal, Optional
+import asyncio, time, json, hashlib, uuid
+from dataclasses import asdict
 
 from .roles import validator, arbiter, specialist, interpreter
 from .assistant_channel import get_assistant_system_prompt
-from .receipt import SovereignReceipt, write_receipt_json, store_answer_and_receipt, init_db
+from .receipt import SovereignReceipt, write_receipt, store_answer_and_receipt, init_db
+from .policy_engine import get_engine
+from .singleflight import SingleFlight
 try:
     from .drift_detector import detect_drift
 except ImportError:
@@ -14,34 +17,43 @@ except ImportError:
         return []
 
 ResponseMode = Literal["raw", "explained", "discussion"]
+ChunkCallback = Callable[[str, str], None]  # (role, text chunk)
 ROOT_DIR = Path(__file__).resolve().parent
+DRIFT_ROOT = ROOT_DIR.parent.parent  # FILES_TO_TRACK are repo-root relative (see drift_detector baseline)
 DEFAULT_POLICY_VERSION = "v0.1c"
 DEFAULT_MODEL_ID = "stack-routed"
 
 def _hash_text(text: str) -> str:
     return hashlib.sha256(text.encode("utf-8")).hexdigest()
 
-def run_triad(question: str, mode: ResponseMode = "raw", parent_receipt_id: Optional[str] = None, sensitivity: str = "normal") -> Dict[str, Any]:
-    context: Dict[str, Any] = {
+def _new_context(question: str, sensitivity: str) -> Dict[str, Any]:
+    return {
         "policy_version": DEFAULT_POLICY_VERSION,
         "model_id": DEFAULT_MODEL_ID,
         "question": question,
+        "sensitivity": sensitivity,
     }
-    drifts = detect_drift(ROOT_DIR)
-    drift_flag = len(drifts) > 0
-
-    # Specialist invocation (now returns receipt metadata inside result['receipt'])
-    spec_out = specialist.run_specialist(question, context)
-    val_out = validator.run_validator(spec_out, context)
-    arb_out = arbiter.run_arbiter(spec_out, val_out, context)
 
+def _finalise_triad(
+    question: str,
+    mode: ResponseMode,
+    parent_receipt_id: Optional[str],
+    context: Dict[str, Any],
+    drifts: List[Dict],
+    spec_out: Dict[str, Any],
+    val_out: Dict[str, Any],
+    arb_out: Dict[str, Any],
+    interp_out: Optional[Dict[str, Any]],
+    coalesced: Optional[Dict[str, Any]] = None,
+) -> Dict[str, Any]:
+    """Build the receipt from the role outputs, persist it and shape the caller-facing result."""
+    drift_flag = len(drifts) > 0
     raw_answer_obj = arb_out.get("final_answer", "")
     raw_answer = raw_answer_obj if isinstance(raw_answer_obj, str) else str(raw_answer_obj)
 
     explained_answer: Optional[str] = None
     interpreter_prompt_hash: Optional[str] = None
-    if mode == "explained":
-        interp_out = interpreter.run_interpreter(question, raw_answer, context)
+    if mode == "explained" and interp_out is not None:
         exp_obj = interp_out.get("explained_answer", raw_answer)
         explained_answer = exp_obj if isinstance(exp_obj, str) else str(exp_obj)
         interpreter_prompt_hash = _hash_text(interp_out.get("prompt", ""))
@@ -75,16 +87,23 @@ def run_triad(question: str, mode: ResponseMode = "raw", parent_receipt_id: Opti
         timestamp=ts,
     )
 
-    receipt_path = write_receipt_json(receipt)
-
     visible_answer = explained_answer if (mode in ("explained", "discussion") and explained_answer) else raw_answer
 
-    # Enrich receipt JSON with validator + arbiter + model forensic metadata
-    enriched = json.loads(Path(receipt_path).read_text(encoding="utf-8"))
-    enriched["validator"] = {"policy_ok": val_out.get("policy_ok", True), "violations": val_out.get("violations", [])}
-    enriched["arbiter_status"] = arb_out.get("status", "OK")
-    enriched["calls"] = {"specialist": spec_out.get("meta", {}), "specialist_receipt": spec_out.get("receipt")}
-    Path(receipt_path).write_text(json.dumps(enriched, indent=2), encoding="utf-8")
+    # Enrich receipt with validator + arbiter + model forensic metadata in memory, then write once
+    enrichment = {
+        "validator": {
+            "policy_ok": val_out.get("policy_ok", True),
+            "violations": val_out.get("violations", []),
+            "rules_version": val_out.get("rules_version"),
+            "aborted_stream": val_out.get("aborted_stream", False),
+        },
+        "arbiter_status": arb_out.get("status", "OK"),
+        "calls": {"specialist": spec_out.get("meta", {}), "specialist_receipt": spec_out.get("receipt")},
+    }
+    if coalesced is not None:
+        enrichment["coalesced"] = coalesced
+    enriched = dict(asdict(receipt), **enrichment)
+    receipt_path = write_receipt(receipt, extra=enrichment)
 
     # Persist answer with full audit receipt
     store_answer_and_receipt(
@@ -102,10 +121,104 @@ def run_triad(question: str, mode: ResponseMode = "raw", parent_receipt_id: Opti
         "receipt_id": receipt_id,
         "violations": val_out.get("violations", []),
         "policy_ok": val_out.get("policy_ok", True),
-        "receipt_path": str(receipt_path),
+        "receipt_path": receipt_path,  # receipt-log locator (read_receipt / receipt_log get)
         "receipt": enriched,
     }
 
+def _role_chunks(on_chunk: Optional[ChunkCallback], role: str) -> Optional[Callable[[str], None]]:
+    if on_chunk is None:
+        return None
+    return lambda piece: on_chunk(role, piece)
+
+_INFLIGHT = SingleFlight()
+
+def _coalesce_key(question: str, mode: ResponseMode, sensitivity: str, context: Dict[str, Any]) -> tuple:
+    # Exact text: a follower's receipt carries its own question, so it must be the question the leader answered.
+    return (_hash_text(question), mode, sensitivity, context["policy_version"], get_engine().version)
+
+def _follow(question: str, mode: ResponseMode, parent_receipt_id: Optional[str], context: Dict[str, Any], shared: tuple) -> Dict[str, Any]:
+    """A follower's own answer/receipt over the leader's role outputs, parented to the leader's receipt."""
+    outputs, leader = shared
+    coalesced = {"leader_receipt_id": leader["receipt_id"], "requested_parent_receipt_id": parent_receipt_id}
+    return _finalise_triad(question, mode, leader["receipt_id"], context, *outputs, coalesced=coalesced)
+
+def run_triad(
+    question: str,
+    mode: ResponseMode = "raw",
+    parent_receipt_id: Optional[str] = None,
+    sensitivity: str = "normal",
+    on_chunk: Optional[ChunkCallback] = None,
+    coalesce: bool = True,
+) -> Dict[str, Any]:
+    """Run specialist -> validator -> arbiter (-> interpreter).
+    `on_chunk(role, text)` streams partial specialist/interpreter output; specialist chunks are
+    pre-validation, the returned answer is the authoritative (arbitrated) one.
+    With `coalesce`, identical concurrent requests (same question text, mode, sensitivity, policy
+    and rules version) share one pipeline run; each still gets its own answer_id and receipt, whose
+    parent is the receipt of the run it joined.
+    """
+    context = _new_context(question, sensitivity)
+
+    def lead() -> tuple:
+        drifts = detect_drift(DRIFT_ROOT)
+
+        # Specialist invocation (now returns receipt metadata inside result['receipt'])
+        spec_out = specialist.run_specialist(question, context, on_chunk=_role_chunks(on_chunk, "specialist"))
+        val_out = validator.run_validator(spec_out, context)
+        arb_out = arbiter.run_arbiter(spec_out, val_out, context)
+
+        interp_out: Optional[Dict[str, Any]] = None
+        if mode == "explained":
+            raw_answer = str(arb_out.get("final_answer", ""))
+            interp_out = interpreter.run_interpreter(question, raw_answer, context, on_chunk=_role_chunks(on_chunk, "interpreter"))
+
+        outputs = (drifts, spec_out, val_out, arb_out, interp_out)
+        return outputs, _finalise_triad(question, mode, parent_receipt_id, context, *outputs)
+
+    if not coalesce:
+        return lead()[1]
+    # A streaming caller may lead, but never joins a run whose chunks it would miss.
+    shared, joined = _INFLIGHT.do(_coalesce_key(question, mode, sensitivity, context), lead, join=on_chunk is None)
+    return _follow(question, mode, parent_receipt_id, context, shared) if joined else shared[1]
+
+async def run_triad_async(
+    question: str,
+    mode: ResponseMode = "raw",
+    parent_receipt_id: Optional[str] = None,
+    sensitivity: str = "normal",
+    coalesce: bool = True,
+) -> Dict[str, Any]:
+    """Async run_triad: model calls go through generate_async (per-provider limits);
+    drift checks and receipt/SQLite persistence run in worker threads so the loop never blocks.
+    Coalesces with identical in-flight sync and async runs like run_triad."""
+    context = _new_context(question, sensitivity)
+
+    async def lead() -> tuple:
+        drifts = await asyncio.to_thread(detect_drift, DRIFT_ROOT)
+
+        spec_out = await specialist.run_specialist_async(question, context)
+        val_out = validator.run_validator(spec_out, context)
+        arb_out = arbiter.run_arbiter(spec_out, val_out, context)
+
+        interp_out: Optional[Dict[str, Any]] = None
+        if mode == "explained":
+            raw_answer = str(arb_out.get("final_answer", ""))
+            interp_out = await interpreter.run_interpreter_async(question, raw_answer, context)
+
+        outputs = (drifts, spec_out, val_out, arb_out, interp_out)
+        return outputs, await asyncio.to_thread(_finalise_triad, question, mode, parent_receipt_id, context, *outputs)
+
+    if not coalesce:
+        return (await lead())[1]
+    shared, joined = await _INFLIGHT.do_async(_coalesce_key(question, mode, sensitivity, context), lead)
+    if not joined:
+        return shared[1]
+    return await asyncio.to_thread(_follow, question, mode, parent_receipt_id, context, shared)
+
+async def run_triads_async(questions: List[str], mode: ResponseMode = "raw", sensitivity: str = "normal") -> List[Dict[str, Any]]:
+    """Run many triads concurrently on one loop; results keep the input order."""
+    return await asyncio.gather(*(run_triad_async(q, mode=mode, sensitivity=sensitivity) for q in questions))
+
 if __name__ == "__main__":
     init_db()
     print(json.dumps(run_triad("Explain lawful property acquisition strategies", mode="explained"), indent=2))
@@ -1,18 +1,42 @@
-from itertools import permutations
+from typing import Iterator, List, Optional
 from mesh.topology import Topology
-from mesh.router import validate_path
+
+
+def iter_valid_paths(topo: Topology, hops: int = 3, critical: bool = True, start: Optional[str] = None) -> Iterator[List[str]]:
+    """Lazily yield every path of `hops` pods that validate_path(topo, path, critical) accepts.
+
+    Depth-first over the compiled adjacency: a pod already on the path is never revisited
+    (Sudoku), walks stop as soon as a pod has no unvisited successor, and node/domain masks are
+    carried down the walk so the critical diversity rule is a popcount at the leaf. Paths come out
+    in pod-declaration order.
+    """
+    if hops < 1 or (critical and hops < 3):
+        return
+    ct = topo.compiled()
+    if start is not None and start not in ct.index:
+        return
+    starts = [ct.index[start]] if start is not None else range(len(ct))
+    succ, node_bit, domain_bit, ids = ct.succ, ct.node_bit, ct.domain_bit, ct.ids
+
+    path: List[int] = []
+
+    def walk(i: int, visited: int, nodes: int, domains: int) -> Iterator[List[str]]:
+        path.append(i)
+        if len(path) == hops:
+            if not critical or (nodes.bit_count() >= 2 and domains.bit_count() >= 2):
+                yield [ids[p] for p in path]
+        else:
+            for j in succ[i]:
+                if not visited >> j & 1:
+                    yield from walk(j, visited | 1 << j, nodes | node_bit[j], domains | domain_bit[j])
+        path.pop()
+
+    for s in starts:
+        yield from walk(s, 1 << s, node_bit[s], domain_bit[s])
 
 
 def enumerate_valid_triples():
-    topo = Topology()
-    pods = topo.all_pods()
-    valid = []
-    for a, b, c in permutations(pods, 3):
-        path = [a, b, c]
-        check = validate_path(topo, path, critical=True)
-        if check.valid:
-            valid.append(path)
-    return valid
+    return list(iter_valid_paths(Topology(), hops=3, critical=True))
 
 
 if __name__ == "__main__":
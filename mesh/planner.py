@@ -0,0 +1,269 @@
+"""Route planning over mesh.topology.Topology.
+
+plan_route() finds a legal path between two pods: one validate_path(critical=True) accepts
+(no repeated pod, every hop an edge, >= 3 pods, >= 2 nodes and >= 2 domains), either the shortest
+or the one with the highest resonance (distinct nodes + distinct domains, as in mesh.vortex;
+spiral_bonus is always 0 on a path without repeats), shorter paths winning ties.
+
+Shortest: the source pod fixes the first node and domain, so diversity is just two flags. A BFS
+over (pod, node flag, domain flag, min(length, 3)) finds the shortest legal *walk* in O(12 * E).
+If that walk repeats no pod it is the answer; otherwise an exact search over (pod, visited set)
+takes over, starting at the walk's length. Highest resonance always uses the exact search,
+memoized on (pod, visited set) and pruned by reverse BFS distance to the target. The exact
+search is exponential in the worst case; pass max_pods to bound it on large meshes.
+
+route_table() precomputes every (source, target) pair and is rebuilt whenever the fingerprint
+of the topology's current pods and edges changes; no manual invalidation is needed.
+
+    python -m mesh.planner node0_property node1_evidence [--objective resonance] [--table]
+"""
+import argparse
+import threading
+import weakref
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from mesh.topology import CompiledTopology, Topology
+
+SHORTEST = "shortest"
+RESONANCE = "resonance"
+OBJECTIVES = (SHORTEST, RESONANCE)
+
+
+@dataclass(frozen=True)
+class Route:
+    path: Tuple[str, ...]
+    hops: int       # pods on the path, as VortexSimulationResult.hops
+    nodes: int
+    domains: int
+
+    @property
+    def resonance(self) -> int:
+        return self.nodes + self.domains
+
+
+def _route(ct: CompiledTopology, path: List[int]) -> Route:
+    return Route(tuple(ct.decode(path)), len(path), ct.node_variety(path), ct.domain_variety(path))
+
+
+def _distances_to(ct: CompiledTopology, target: int) -> List[int]:
+    """Fewest hops from every pod to `target` (reverse BFS); -1 when unreachable."""
+    pred: List[List[int]] = [[] for _ in range(len(ct))]
+    for i, row in enumerate(ct.succ):
+        for j in row:
+            pred[j].append(i)
+    dist = [-1] * len(ct)
+    dist[target] = 0
+    queue = deque([target])
+    while queue:
+        v = queue.popleft()
+        for u in pred[v]:
+            if dist[u] < 0:
+                dist[u] = dist[v] + 1
+                queue.append(u)
+    return dist
+
+
+def _shortest_walks(ct: CompiledTopology, source: int) -> Dict[int, List[int]]:
+    """Shortest diversity-satisfying walk (>= 3 pods) from `source` to every reachable target.
+    State: (pod, other node seen, other domain seen, min(pods, 3)); walks may repeat pods."""
+    n0, d0 = ct.node_of[source], ct.domain_of[source]
+    start = (source, False, False, 1)
+    parent: Dict[Tuple[int, bool, bool, int], Optional[Tuple[int, bool, bool, int]]] = {start: None}
+    found: Dict[int, Tuple[int, bool, bool, int]] = {}
+    queue = deque([start])
+    while queue:
+        state = queue.popleft()
+        v, nf, df, length = state
+        for w in ct.succ[v]:
+            nxt = (w, nf or ct.node_of[w] != n0, df or ct.domain_of[w] != d0, min(length + 1, 3))
+            if nxt in parent:
+                continue
+            parent[nxt] = state
+            if nxt[1] and nxt[2] and nxt[3] == 3 and w != source and w not in found:
+                found[w] = nxt
+            queue.append(nxt)
+    walks: Dict[int, List[int]] = {}
+    for target, state in found.items():
+        walk: List[int] = []
+        node: Optional[Tuple[int, bool, bool, int]] = state
+        while node is not None:
+            walk.append(node[0])
+            node = parent[node]
+        walks[target] = walk[::-1]
+    return walks
+
+
+def _legal(ct: CompiledTopology, path: List[int]) -> bool:
+    return len(path) >= 3 and ct.node_variety(path) >= 2 and ct.domain_variety(path) >= 2
+
+
+def _exact_shortest(ct: CompiledTopology, source: int, target: int, min_pods: int, max_pods: int) -> Optional[List[int]]:
+    """Iterative deepening over simple paths of exactly k pods, k = min_pods..max_pods.
+    Dead (pod, visited) states are memoized per depth."""
+    dist = _distances_to(ct, target)
+    if dist[source] < 0:
+        return None
+    for k in range(max(min_pods, 3), max_pods + 1):
+        dead = set()
+        path = [source]
+
+        def dfs(v: int, visited: int) -> bool:
+            if len(path) == k:
+                return v == target and _legal(ct, path)
+            if v == target or (v, visited) in dead:
+                return False
+            for w in ct.succ[v]:
+                if visited >> w & 1 or dist[w] < 0 or len(path) + 1 + dist[w] > k:
+                    continue
+                path.append(w)
+                if dfs(w, visited | 1 << w):
+                    return True
+                path.pop()
+            dead.add((v, visited))
+            return False
+
+        if dfs(source, 1 << source):
+            return path
+    return None
+
+
+def _best_resonance(ct: CompiledTopology, source: int, target: int, max_pods: int) -> Optional[List[int]]:
+    """Simple path maximizing (resonance, -pods); memoized on (pod, visited)."""
+    dist = _distances_to(ct, target)
+    if source == target or dist[source] < 0:
+        return None
+    ceiling = len(ct.node_names) + len(ct.domain_names)
+    memo: Dict[Tuple[int, int], Optional[Tuple[Tuple[int, int], List[int]]]] = {}
+
+    def best(v: int, visited: int, length: int, nodes: int, domains: int) -> Optional[Tuple[Tuple[int, int], List[int]]]:
+        # Best (score, suffix) completing a path that ends at v; (v, visited) fixes everything else.
+        if v == target:
+            n, d = nodes.bit_count(), domains.bit_count()
+            return ((n + d, -length), [v]) if length >= 3 and n >= 2 and d >= 2 else None
+        key = (v, visited)
+        if key in memo:
+            return memo[key]
+        bound = (ceiling, -max(3, length + dist[v]))  # full diversity at the shortest reachable length
+        result = None
+        for w in ct.succ[v]:
+            if visited >> w & 1 or dist[w] < 0 or length + 1 + dist[w] > max_pods:
+                continue
+            sub = best(w, visited | 1 << w, length + 1, nodes | ct.node_bit[w], domains | ct.domain_bit[w])
+            if sub is not None and (result is None or sub[0] > result[0]):
+                result = (sub[0], [v] + sub[1])
+                if result[0] == bound:
+                    break
+        memo[key] = result
+        return result
+
+    found = best(source, 1 << source, 1, ct.node_bit[source], ct.domain_bit[source])
+    return found[1] if found else None
+
+
+def _plan_indices(ct: CompiledTopology, source: int, target: int, objective: str, max_pods: Optional[int],
+                  walks: Optional[Dict[int, List[int]]] = None) -> Optional[List[int]]:
+    limit = len(ct) if max_pods is None else min(max_pods, len(ct))
+    if source == target:
+        return None
+    if objective == RESONANCE:
+        return _best_resonance(ct, source, target, limit)
+    walk = (walks if walks is not None else _shortest_walks(ct, source)).get(target)
+    if walk is None or len(walk) > limit:
+        return None
+    if len(set(walk)) == len(walk):
+        return walk
+    return _exact_shortest(ct, source, target, len(walk), limit)
+
+
+def plan_route(topology: Topology, source: str, target: str, objective: str = SHORTEST,
+               max_pods: Optional[int] = None) -> Optional[Route]:
+    """Best legal critical path from source to target, or None if there is none (within max_pods)."""
+    if objective not in OBJECTIVES:
+        raise ValueError(f"objective must be one of {OBJECTIVES}")
+    ct = topology.compiled()
+    if source not in ct.index or target not in ct.index:
+        return None
+    path = _plan_indices(ct, ct.index[source], ct.index[target], objective, max_pods)
+    if path is None:
+        return None
+    return _route(ct, path)
+
+
+class RouteTable:
+    """All-pairs routes for one topology snapshot, keyed by its fingerprint."""
+
+    def __init__(self, topology: Topology, objective: str = SHORTEST, max_pods: Optional[int] = None):
+        if objective not in OBJECTIVES:
+            raise ValueError(f"objective must be one of {OBJECTIVES}")
+        ct = topology.compiled()
+        self.fingerprint = ct.fingerprint
+        self.objective = objective
+        self.max_pods = max_pods
+        self._routes: Dict[Tuple[str, str], Route] = {}
+        for s in range(len(ct)):
+            walks = _shortest_walks(ct, s) if objective == SHORTEST else None
+            targets = walks.keys() if walks is not None else range(len(ct))
+            for t in targets:
+                path = _plan_indices(ct, s, t, objective, max_pods, walks)
+                if path is not None:
+                    self._routes[(ct.ids[s], ct.ids[t])] = _route(ct, path)
+
+    def get(self, source: str, target: str) -> Optional[Route]:
+        return self._routes.get((source, target))
+
+    def __len__(self) -> int:
+        return len(self._routes)
+
+    def items(self):
+        return self._routes.items()
+
+
+# Tables live as long as their topology: topology -> {(objective, max_pods): RouteTable}.
+_TABLES_LOCK = threading.Lock()
+_TABLES: "weakref.WeakKeyDictionary[Topology, Dict[Tuple[str, Optional[int]], RouteTable]]" = weakref.WeakKeyDictionary()
+
+
+def route_table(topology: Topology, objective: str = SHORTEST, max_pods: Optional[int] = None) -> RouteTable:
+    """Cached RouteTable for this topology, valid for the fingerprint of its current pods and
+    edges: any edit to either is seen by topology.compiled() and the next lookup rebuilds."""
+    key = (objective, max_pods)
+    fingerprint = topology.fingerprint
+    with _TABLES_LOCK:
+        table = _TABLES.get(topology, {}).get(key)
+        if table is not None and table.fingerprint == fingerprint:
+            return table
+    table = RouteTable(topology, objective, max_pods)
+    with _TABLES_LOCK:
+        _TABLES.setdefault(topology, {})[key] = table
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Plan a legal critical route between two pods")
+    ap.add_argument("source", nargs="?")
+    ap.add_argument("target", nargs="?")
+    ap.add_argument("--objective", choices=OBJECTIVES, default=SHORTEST)
+    ap.add_argument("--max-pods", type=int)
+    ap.add_argument("--table", action="store_true", help="print the all-pairs route table")
+    args = ap.parse_args(argv)
+
+    topo = Topology()
+    if args.table:
+        for (s, t), route in sorted(route_table(topo, args.objective, args.max_pods).items()):
+            print(f"{s:>16} -> {t:<16} resonance={route.resonance} {' -> '.join(route.path)}")
+        return 0
+    if not (args.source and args.target):
+        ap.error("source and target are required unless --table is given")
+    route = plan_route(topo, args.source, args.target, args.objective, args.max_pods)
+    if route is None:
+        print(f"No legal critical route {args.source} -> {args.target}")
+        return 1
+    print(" -> ".join(route.path))
+    print(f"hops={route.hops} nodes={route.nodes} domains={route.domains} resonance={route.resonance}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
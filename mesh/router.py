@@ -1,6 +1,22 @@
 from dataclasses import dataclass
-from typing import List, Set
-from .topology import Topology, Pod
+from typing import List, Sequence, Tuple
+from .topology import Topology
+
+try:  # optional: vectorized batch validation
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+# Bit k of a batch CVF mask stands for CVF_CODES[k]; decode_cvf() gives RouteCheck.cvf_codes.
+CVF_CODES = (
+    "CVF.TOPOLOGY_INVALID_POD",
+    "CVF.TOPOLOGY_SUDOKU_VIOLATION",
+    "CVF.TOPOLOGY_INVALID_PATH",
+    "CVF.TOPOLOGY_INSUFFICIENT_PODS",
+    "CVF.TOPOLOGY_MISSING_NODE_VARIETY",
+    "CVF.TOPOLOGY_MISSING_DOMAIN_VARIETY",
+)
+_CVF_BIT = {code: 1 << k for k, code in enumerate(CVF_CODES)}
 
 @dataclass
 class RouteCheck:
@@ -9,29 +25,29 @@ class RouteCheck:
     reason: str | None = None
 
 
-def _pods_for(topology: Topology, path: List[str]) -> List[Pod]:
-    return [topology.pods[p] for p in path]
-
-
 def validate_path(topology: Topology, path: List[str], critical: bool = False) -> RouteCheck:
     cvfs: List[str] = []
+    ct = topology.compiled()
 
     # 0) existence
+    ix: List[int] = []
     for pid in path:
-        if pid not in topology.pods:
+        i = ct.index.get(pid)
+        if i is None:
             cvfs.append("CVF.TOPOLOGY_INVALID_POD")
             return RouteCheck(False, cvfs, f"Unknown pod {pid}")
+        ix.append(i)
 
     # 1) Sudoku: no repeats
-    if len(path) != len(set(path)):
+    if len(ix) != len(set(ix)):
         cvfs.append("CVF.TOPOLOGY_SUDOKU_VIOLATION")
         return RouteCheck(False, cvfs, "Repeated pod in path")
 
-    # 2) edges legal
-    for a, b in zip(path, path[1:]):
-        if b not in topology.neighbors(a):
+    # 2) edges legal (O(1) bitset test per hop)
+    for k in range(len(ix) - 1):
+        if not ct.has_edge(ix[k], ix[k + 1]):
             cvfs.append("CVF.TOPOLOGY_INVALID_PATH")
-            return RouteCheck(False, cvfs, f"Illegal edge {a} -> {b}")
+            return RouteCheck(False, cvfs, f"Illegal edge {path[k]} -> {path[k + 1]}")
 
     if not critical:
         return RouteCheck(True, cvfs)
@@ -41,15 +57,99 @@ def validate_path(topology: Topology, path: List[str], critical: bool = False) -
         cvfs.append("CVF.TOPOLOGY_INSUFFICIENT_PODS")
         return RouteCheck(False, cvfs, "Critical path has fewer than 3 pods")
 
-    pods = _pods_for(topology, path)
-    nodes: Set[str] = {p.node for p in pods}
-    domains: Set[str] = {p.domain for p in pods}
-
-    if len(nodes) < 2:
+    if ct.node_variety(ix) < 2:
         cvfs.append("CVF.TOPOLOGY_MISSING_NODE_VARIETY")
-    if len(domains) < 2:
+    if ct.domain_variety(ix) < 2:
         cvfs.append("CVF.TOPOLOGY_MISSING_DOMAIN_VARIETY")
 
     if cvfs:
         return RouteCheck(False, cvfs, "Critical path missing diversity")
     return RouteCheck(True, cvfs)
+
+
+def decode_cvf(mask: int) -> List[str]:
+    return [code for k, code in enumerate(CVF_CODES) if mask >> k & 1]
+
+
+def encode_paths(topology: Topology, paths: Sequence[Sequence[str]]):
+    """Equal-length pod-id paths -> (m, L) int array of pod indices; unknown pods become -1."""
+    index = topology.compiled().index
+    return np.array([[index.get(p, -1) for p in path] for path in paths], dtype=np.intp).reshape(len(paths), -1)
+
+
+def validate_paths_batch(topology: Topology, paths, critical: bool = False) -> Tuple["np.ndarray", "np.ndarray"]:
+    """Validate many equal-length paths at once.
+
+    `paths` is an (m, L) array of pod indices (CompiledTopology numbering; anything outside
+    0..n-1 is an unknown pod). Returns (valid, cvf): a bool vector and a uint8 vector of CVF bit
+    masks (see CVF_CODES / decode_cvf). Row r agrees exactly with validate_path on that path:
+    the same first failing check decides, and only the diversity check can set two bits.
+    """
+    if np is None:
+        raise RuntimeError("validate_paths_batch needs numpy (pip install numpy)")
+    ct = topology.compiled()
+    adjacency, node_of, domain_of = ct.arrays()
+    n = len(ct)
+    idx = np.asarray(paths)
+    if idx.ndim != 2:
+        raise ValueError("paths must be a 2-D array of pod indices")
+    m, length = idx.shape
+    cvf = np.zeros(m, dtype=np.uint8)
+    valid = np.zeros(m, dtype=bool)
+    if m == 0:
+        return valid, cvf
+
+    # Rows are worked column-major (one contiguous vector per hop position, int32 when the flat
+    # adjacency index fits). Every check is computed for all remaining rows, then the first
+    # failing one in validate_path's order decides the code.
+    dtype = np.int32 if n * n < 2 ** 31 else np.intp
+    alive = None  # mask over `rows` of paths still valid, when failed rows were not compacted away
+    # 0) existence
+    if length == 0 or (idx.min() >= 0 and idx.max() < n):
+        rows = np.arange(m)
+        cols = np.ascontiguousarray(idx.T, dtype=dtype)
+    else:
+        known = ((idx >= 0) & (idx < n)).all(axis=1)
+        cvf[~known] = _CVF_BIT["CVF.TOPOLOGY_INVALID_POD"]
+        rows = np.flatnonzero(known)
+        cols = np.ascontiguousarray(idx[rows].T, dtype=dtype)
+
+    if length > 1:
+        # 1) Sudoku: pairwise column compares for short paths, a sort for long ones
+        if length <= 8:
+            repeat = np.zeros(len(rows), dtype=bool)
+            for a in range(length):
+                for b in range(a + 1, length):
+                    repeat |= cols[a] == cols[b]
+        else:
+            ordered = np.sort(cols, axis=0)
+            repeat = (ordered[1:] == ordered[:-1]).any(axis=0)
+        # 2) every hop an edge: one gather into the flattened adjacency matrix
+        legal = np.take(adjacency.ravel(), cols[:-1] * n + cols[1:]).all(axis=0)
+        cvf[rows[repeat]] = _CVF_BIT["CVF.TOPOLOGY_SUDOKU_VIOLATION"]
+        cvf[rows[~legal & ~repeat]] = _CVF_BIT["CVF.TOPOLOGY_INVALID_PATH"]
+        keep = legal & ~repeat
+        # Compact only when most rows failed; otherwise masking is cheaper than copying.
+        if keep.sum() * 2 < len(keep):
+            rows, cols = rows[keep], cols[:, keep]
+        elif not keep.all():
+            alive = keep
+
+    ok = alive
+    if critical:
+        if length < 3:
+            # 3) critical requires >= 3 distinct pods (same length for every row)
+            cvf[rows if alive is None else rows[alive]] = _CVF_BIT["CVF.TOPOLOGY_INSUFFICIENT_PODS"]
+            return valid, cvf
+        nodes = node_of[cols]
+        domains = domain_of[cols]
+        no_node = ~(nodes != nodes[0]).any(axis=0)
+        no_domain = ~(domains != domains[0]).any(axis=0)
+        if alive is not None:
+            no_node &= alive
+            no_domain &= alive
+        cvf[rows[no_node]] |= _CVF_BIT["CVF.TOPOLOGY_MISSING_NODE_VARIETY"]
+        cvf[rows[no_domain]] |= _CVF_BIT["CVF.TOPOLOGY_MISSING_DOMAIN_VARIETY"]
+        ok = ~(no_node | no_domain) if alive is None else alive & ~(no_node | no_domain)
+    valid[rows if ok is None else rows[ok]] = True
+    return valid, cvf
@@ -1,8 +1,15 @@
+import hashlib
+import json
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 import yaml
 
+try:  # optional: array views for batch validation
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
 TOPOLOGY_PATH = Path("config/topology.yaml")
 
 @dataclass(frozen=True)
@@ -11,14 +18,129 @@ class Pod:
     node: str
     domain: str
 
+class CompiledTopology:
+    """Integer-indexed view of a Topology.
+
+    Pods are numbered 0..n-1 in declaration order; nodes and domains get their own small integer
+    ids. Each adjacency row is a Python int used as a bitset (bit j set <=> edge i -> j), so an edge
+    test is a shift and a mask, and node/domain variety is the popcount of an OR of one-bit masks.
+    """
+
+    def __init__(self, pods: Dict[str, Pod], edges: Dict[str, List[str]]):
+        self.ids: List[str] = list(pods)
+        self.index: Dict[str, int] = {pid: i for i, pid in enumerate(self.ids)}
+        self.node_names: List[str] = []
+        self.domain_names: List[str] = []
+        node_ix: Dict[str, int] = {}
+        domain_ix: Dict[str, int] = {}
+        self.node_of: List[int] = []
+        self.domain_of: List[int] = []
+        for pid in self.ids:
+            pod = pods[pid]
+            if pod.node not in node_ix:
+                node_ix[pod.node] = len(self.node_names); self.node_names.append(pod.node)
+            if pod.domain not in domain_ix:
+                domain_ix[pod.domain] = len(self.domain_names); self.domain_names.append(pod.domain)
+            self.node_of.append(node_ix[pod.node])
+            self.domain_of.append(domain_ix[pod.domain])
+        self.node_bit: List[int] = [1 << n for n in self.node_of]
+        self.domain_bit: List[int] = [1 << d for d in self.domain_of]
+
+        self.adj: List[int] = [0] * len(self.ids)
+        for src, dsts in edges.items():
+            i = self.index.get(src)
+            if i is None:
+                continue
+            for dst in dsts:
+                j = self.index.get(dst)
+                if j is not None:
+                    self.adj[i] |= 1 << j
+        # Successor lists in pod order, for walks that visit every neighbour.
+        self.succ: List[List[int]] = [[j for j in range(len(self.ids)) if row >> j & 1] for row in self.adj]
+        self.fingerprint = _fingerprint(pods, self.adj, self.ids)
+        self._arrays = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def has_edge(self, a: int, b: int) -> bool:
+        return bool(self.adj[a] >> b & 1)
+
+    def node_variety(self, path: Iterable[int]) -> int:
+        mask = 0
+        for i in path:
+            mask |= self.node_bit[i]
+        return mask.bit_count()
+
+    def domain_variety(self, path: Iterable[int]) -> int:
+        mask = 0
+        for i in path:
+            mask |= self.domain_bit[i]
+        return mask.bit_count()
+
+    def arrays(self):
+        """(adjacency, node_of, domain_of) as NumPy arrays: a dense (n, n) bool matrix and two int
+        lookup vectors. Built on first use; needs numpy."""
+        if np is None:
+            raise RuntimeError("array views need numpy (pip install numpy)")
+        if self._arrays is None:
+            n = len(self.ids)
+            adjacency = np.zeros((n, n), dtype=bool)
+            for i, row in enumerate(self.succ):
+                adjacency[i, row] = True
+            # Smallest integer type that holds the ids: the lookups are gathers, so narrower is faster.
+            node_of = np.asarray(self.node_of, dtype=np.min_scalar_type(max(len(self.node_names) - 1, 0)))
+            domain_of = np.asarray(self.domain_of, dtype=np.min_scalar_type(max(len(self.domain_names) - 1, 0)))
+            self._arrays = (adjacency, node_of, domain_of)
+        return self._arrays
+
+    def encode(self, path: Iterable[str]) -> List[int]:
+        return [self.index[p] for p in path]
+
+    def decode(self, path: Iterable[int]) -> List[str]:
+        return [self.ids[i] for i in path]
+
+def _fingerprint(pods: Dict[str, Pod], adj: List[int], ids: List[str]) -> str:
+    """Content hash of pods and (deduplicated) edges; equal for equal graphs."""
+    body = {
+        "pods": [[pid, pods[pid].node, pods[pid].domain] for pid in ids],
+        "edges": [[ids[i], ids[j]] for i, row in enumerate(adj) for j in range(len(ids)) if row >> j & 1],
+    }
+    return hashlib.sha256(json.dumps(body, separators=(",", ":")).encode("utf-8")).hexdigest()
+
 class Topology:
-    def __init__(self, path: Path = TOPOLOGY_PATH):
-        raw = yaml.safe_load(path.read_text(encoding="utf-8"))
+    def __init__(self, path: Path = TOPOLOGY_PATH, raw: Optional[Dict[str, Any]] = None):
+        if raw is None:
+            raw = yaml.safe_load(path.read_text(encoding="utf-8"))
         self.pods: Dict[str, Pod] = {p["id"]: Pod(id=p["id"], node=p["node"], domain=p["domain"]) for p in raw["pods"]}
         self.edges: Dict[str, List[str]] = {}
         for e in raw.get("edges", []):
             src = e["from"]; dst = e["to"]
             self.edges.setdefault(src, []).append(dst)
+        self._compiled: Optional[Tuple[Dict[str, Pod], Dict[str, List[str]], CompiledTopology]] = None
+
+    def compiled(self) -> CompiledTopology:
+        """Integer/bitset form. Reused while pods and edges still equal the snapshot it was built
+        from (two C-level dict comparisons), so edits to either are picked up on the next call."""
+        cached = self._compiled
+        if cached is None or self.pods != cached[0] or self.edges != cached[1]:
+            pods = dict(self.pods)
+            edges = {src: list(dsts) for src, dsts in self.edges.items()}
+            cached = self._compiled = (pods, edges, CompiledTopology(pods, edges))
+        return cached[2]
+
+    def invalidate(self) -> None:
+        """Drop the compiled form; compiled() also notices edits on its own."""
+        self._compiled = None
+
+    @property
+    def fingerprint(self) -> str:
+        return self.compiled().fingerprint
+
+    def has_edge(self, a: str, b: str) -> bool:
+        ct = self.compiled()
+        i = ct.index.get(a); j = ct.index.get(b)
+        return i is not None and j is not None and ct.has_edge(i, j)
 
     def neighbors(self, pod_id: str) -> List[str]:
         return self.edges.get(pod_id, [])
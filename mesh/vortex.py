@@ -1,9 +1,9 @@
-import yaml, random
+import yaml, random, threading
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass
 
-TOPO = yaml.safe_load(Path("config/topology_vortex.yaml").read_text())
+TOPOLOGY_PATH = Path("config/topology_vortex.yaml")
 
 @dataclass
 class Pod:
@@ -11,19 +11,40 @@ class Pod:
     node: str
     domain: str
 
-PODS: Dict[str, Pod] = {p["id"]: Pod(**p) for p in TOPO["pods"]}
-ALL = list(PODS.keys())
+# Loaded on first use (not at import) and re-read when the file's stat changes.
+_LOCK = threading.Lock()
+_LOADED: Optional[Tuple[Tuple[int, int, int], Dict[str, Pod], List[str]]] = None
+
+def _topology() -> Tuple[Dict[str, Pod], List[str]]:
+    global _LOADED
+    st = TOPOLOGY_PATH.stat()
+    key = (st.st_size, st.st_mtime_ns, st.st_ino)
+    with _LOCK:
+        if _LOADED is None or _LOADED[0] != key:
+            topo = yaml.safe_load(TOPOLOGY_PATH.read_text(encoding="utf-8"))
+            pods = {p["id"]: Pod(**p) for p in topo["pods"]}
+            _LOADED = (key, pods, list(pods))
+        return _LOADED[1], _LOADED[2]
+
+def __getattr__(name: str):
+    # PODS / ALL stay importable as module attributes, resolved lazily.
+    if name == "PODS":
+        return _topology()[0]
+    if name == "ALL":
+        return _topology()[1]
+    raise AttributeError(name)
 
 def neighbors(pod_id: str) -> List[str]:
-    return [p for p in ALL if p != pod_id]
+    return [p for p in _topology()[1] if p != pod_id]
 
 def validate_path(path: List[str], critical: bool = True) -> Dict:
     if not path:
         return {"valid": False, "reason": "empty"}
     if critical and len(path) < 3:
         return {"valid": False, "reason": "too short"}
-    nodes = {PODS[p].node for p in path}
-    domains = {PODS[p].domain for p in path}
+    pods = _topology()[0]
+    nodes = {pods[p].node for p in path}
+    domains = {pods[p].domain for p in path}
     spiral = sum(1 for i in range(len(path)-2) if path[i] == path[i+2])
     resonance = len(nodes) + len(domains) + spiral
     valid = (not critical) or (len(path) >= 3 and (len(nodes) >= 3 or len(domains) >= 3))
@@ -37,7 +58,7 @@ def validate_path(path: List[str], critical: bool = True) -> Dict:
     }
 
 def random_vortex_path(start: str, length: int = 5) -> List[str]:
-    if start not in PODS:
+    if start not in _topology()[0]:
         raise ValueError(f"Unknown start pod {start}")
     path = [start]
     for _ in range(length - 1):
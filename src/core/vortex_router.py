@@ -1,8 +1,8 @@
 from __future__ import annotations
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, fields
+from typing import Any, Dict, List, Sequence
 from core.vortex_feature_flags import FEATURE_VORTEX
-from core.vortex_topology import VortexTopology
+from core.vortex_topology import VortexTopology, get_vortex_topology
 
 @dataclass
 class VortexSimulationResult:
@@ -20,26 +20,45 @@ class VortexSimulationResult:
 def _current_mesh_health() -> str:
     return "UNKNOWN"
 
-def simulate_vortex_path(pod_path: List[str], critical: bool) -> VortexSimulationResult:
-    topo = VortexTopology.from_default_config()
+def _simulate(topo: VortexTopology, pod_path: Sequence[str], critical: bool, mesh_health: str) -> VortexSimulationResult:
     if not pod_path:
-        return VortexSimulationResult(False, critical, "Empty path", 0, 0, 0, 0, False, _current_mesh_health(), bool(critical))
+        return VortexSimulationResult(False, critical, "Empty path", 0, 0, 0, 0, False, mesh_health, bool(critical))
 
     for pid in pod_path:
         if not topo.has_pod(pid):
-            return VortexSimulationResult(False, critical, f"Unknown pod '{pid}'", 0, 0, len(pod_path), 0, False, _current_mesh_health(), bool(critical))
+            return VortexSimulationResult(False, critical, f"Unknown pod '{pid}'", 0, 0, len(pod_path), 0, False, mesh_health, bool(critical))
 
     hops = len(pod_path)
     nodes = {topo.node_of(p) for p in pod_path}
     domains = {topo.domain_of(p) for p in pod_path}
     spiral_bonus = sum(1 for i in range(len(pod_path)-2) if pod_path[i] == pod_path[i+2])
     meets_3_resonance = hops >= 3 and (len(nodes) >= 3 or len(domains) >= 3)
-    mesh_health = _current_mesh_health()
     would_reject = bool(critical and not meets_3_resonance)
 
     return VortexSimulationResult(True, critical, None, len(nodes), len(domains), hops, spiral_bonus, meets_3_resonance, mesh_health, would_reject)
 
 
+def simulate_vortex_path(pod_path: List[str], critical: bool) -> VortexSimulationResult:
+    return _simulate(get_vortex_topology(), pod_path, critical, _current_mesh_health())
+
+
+RESULT_COLUMNS = tuple(f.name for f in fields(VortexSimulationResult))
+
+
+def simulate_vortex_paths(paths: Sequence[Sequence[str]], critical: bool) -> Dict[str, List[Any]]:
+    """Simulate many paths against one topology snapshot and one mesh-health reading.
+    Returns columns: {field of VortexSimulationResult: [value per path]}."""
+    topo = get_vortex_topology()
+    mesh_health = _current_mesh_health()
+    columns: Dict[str, List[Any]] = {name: [] for name in RESULT_COLUMNS}
+    appenders = [columns[name].append for name in RESULT_COLUMNS]
+    for path in paths:
+        result = _simulate(topo, path, critical, mesh_health)
+        for append, name in zip(appenders, RESULT_COLUMNS):
+            append(getattr(result, name))
+    return columns
+
+
 def enforce_vortex_constraints(pod_path: List[str], critical: bool) -> List[str]:
     if not FEATURE_VORTEX:
         return []
@@ -1,7 +1,9 @@
 from __future__ import annotations
+import hashlib
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 import yaml
 
 VORTEX_TOPOLOGY_PATH = Path("config/topology_vortex.yaml")
@@ -16,18 +18,24 @@ class VortexTopology:
     """Minimal topology view for Vortex simulation.
     Fully connected: every pod can reach every other.
     """
-    def __init__(self, pods: Dict[str, Pod]):
+    def __init__(self, pods: Dict[str, Pod], file_hash: Optional[str] = None):
         self._pods = pods
         self._ids: List[str] = list(pods.keys())
+        self.file_hash = file_hash
 
     @classmethod
-    def from_default_config(cls) -> "VortexTopology":
-        raw = yaml.safe_load(VORTEX_TOPOLOGY_PATH.read_text(encoding="utf-8"))
+    def from_dict(cls, raw: Dict[str, Any], file_hash: Optional[str] = None) -> "VortexTopology":
         pods: Dict[str, Pod] = {}
-        for p in raw.get("pods", []):
+        for p in (raw or {}).get("pods", []):
             pod = Pod(id=p["id"], node=p["node"], domain=p["domain"])
             pods[pod.id] = pod
-        return cls(pods=pods)
+        return cls(pods=pods, file_hash=file_hash)
+
+    @classmethod
+    def from_default_config(cls) -> "VortexTopology":
+        """Always re-reads the file; hot paths should use get_vortex_topology()."""
+        data = VORTEX_TOPOLOGY_PATH.read_bytes()
+        return cls.from_dict(yaml.safe_load(data), hashlib.sha256(data).hexdigest())
 
     def all_pods(self) -> List[str]:
         return list(self._ids)
@@ -40,3 +48,30 @@ class VortexTopology:
 
     def domain_of(self, pod_id: str) -> str:
         return self._pods[pod_id].domain
+
+# Process-wide cache: path -> ((size, mtime_ns, inode), topology). A stat change triggers a re-read,
+# but the YAML is only re-parsed when the content hash actually differs.
+_CACHE_LOCK = threading.Lock()
+_CACHE: Dict[str, Tuple[Tuple[int, int, int], VortexTopology]] = {}
+
+def get_vortex_topology(path: Optional[Path] = None) -> VortexTopology:
+    path = path or VORTEX_TOPOLOGY_PATH
+    st = path.stat()
+    key = (st.st_size, st.st_mtime_ns, st.st_ino)
+    sp = str(path)
+    with _CACHE_LOCK:
+        hit = _CACHE.get(sp)
+        if hit is not None and hit[0] == key:
+            return hit[1]
+        data = path.read_bytes()
+        file_hash = hashlib.sha256(data).hexdigest()
+        if hit is not None and hit[1].file_hash == file_hash:
+            topo = hit[1]  # touched, not changed
+        else:
+            topo = VortexTopology.from_dict(yaml.safe_load(data), file_hash)
+        _CACHE[sp] = (key, topo)
+        return topo
+
+def clear_vortex_topology_cache() -> None:
+    with _CACHE_LOCK:
+        _CACHE.clear()
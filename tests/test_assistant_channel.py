@@ -0,0 +1,45 @@
+import random
+import sqlite3
+
+from agi.core import assistant_channel, receipt
+from agi.core.assistant_channel import _prompt_tokens, build_assistant_prompt
+
+
+def _message(rng):
+    kind = rng.choice(("short", "long", "mixed"))
+    if kind == "short":
+        words = ["a"] * rng.randint(1, 300)
+    elif kind == "long":
+        words = ["x" * rng.randint(1, 30) for _ in range(rng.randint(1, 300))]
+    else:
+        words = ["y" * rng.choice((1, 1, 12)) for _ in range(rng.randint(1, 300))]
+    return " ".join(words)
+
+
+def test_windowed_prompt_never_exceeds_budget():
+    rng = random.Random(0)
+    for _ in range(1500):
+        thread = [{"role": rng.choice(("user", "assistant")), "message": _message(rng)} for _ in range(rng.randint(0, 6))]
+        fixed = build_assistant_prompt("system", "answer", [], "question?", max_prompt_tokens=0)
+        budget = _prompt_tokens(fixed) + rng.randint(0, 400)
+        prompt = build_assistant_prompt("system", "answer", thread, "question?", max_prompt_tokens=budget)
+        assert _prompt_tokens(prompt) <= budget
+
+
+def test_thread_cache_reloads_after_an_outside_write(tmp_path, monkeypatch):
+    db = tmp_path / "answers.sqlite"
+    monkeypatch.setattr(receipt, "DB_PATH", db)
+    monkeypatch.setattr(assistant_channel, "DB_PATH", db)
+    monkeypatch.setattr(assistant_channel, "_THREADS", assistant_channel.ThreadCache())
+    receipt.init_db()
+
+    def outside_write(message):  # another process: straight to SQLite, bypassing this cache
+        conn = sqlite3.connect(db)
+        conn.execute("INSERT INTO assistant_messages (answer_id, receipt_id, role, message, created_at) VALUES ('a1', 'r1', 'user', ?, 'now')", (message,))
+        conn.commit()
+        conn.close()
+
+    outside_write("first")
+    assert [m["message"] for m in assistant_channel.list_thread_messages("a1")] == ["first"]
+    outside_write("second")
+    assert [m["message"] for m in assistant_channel.list_thread_messages("a1")] == ["first", "second"]
@@ -0,0 +1,140 @@
+import math
+import random
+from itertools import permutations
+
+import pytest
+
+from mesh import vortex
+from mesh.enumerate_paths import iter_valid_paths
+from mesh.planner import RESONANCE, SHORTEST, plan_route, route_table
+from mesh.router import decode_cvf, validate_path, validate_paths_batch
+from mesh.topology import Topology
+
+
+def _random_topology(seed, n_nodes=3, n_domains=3, density=0.35):
+    rng = random.Random(seed)
+    pods = [{"id": f"n{n}_d{d}", "node": f"n{n}", "domain": f"d{d}"} for n in range(n_nodes) for d in range(n_domains)]
+    edges = [{"from": a["id"], "to": b["id"]} for a in pods for b in pods if a is not b and rng.random() < density]
+    return Topology(raw={"pods": pods, "edges": edges})
+
+
+def _brute_force(topo, hops, critical):
+    return [list(p) for p in permutations(topo.all_pods(), hops) if validate_path(topo, list(p), critical).valid]
+
+
+def test_iter_valid_paths_matches_brute_force():
+    for seed in range(6):
+        topo = _random_topology(seed)
+        for hops in (1, 2, 3, 4):
+            for critical in (True, False):
+                assert list(iter_valid_paths(topo, hops, critical)) == _brute_force(topo, hops, critical)
+
+
+def test_iter_valid_paths_from_start_on_default_topology():
+    topo = Topology()
+    expected = [p for p in _brute_force(topo, 3, True) if p[0] == "node0_property"]
+    assert expected
+    assert list(iter_valid_paths(topo, 3, True, start="node0_property")) == expected
+    assert list(iter_valid_paths(topo, 3, True, start="missing")) == []
+
+
+def test_validation_sees_live_topology_edits():
+    topo = _random_topology(1, density=0.0)
+    a, b, c = "n0_d0", "n1_d1", "n2_d2"
+    assert not validate_path(topo, [a, b, c], critical=True).valid
+    topo.edges.setdefault(a, []).append(b)
+    topo.edges.setdefault(b, []).append(c)
+    assert validate_path(topo, [a, b, c], critical=True).valid
+    topo.edges[b].remove(c)
+    assert not validate_path(topo, [a, b, c], critical=True).valid
+    del topo.pods[c]
+    assert validate_path(topo, [a, b, c]).cvf_codes == ["CVF.TOPOLOGY_INVALID_POD"]
+
+
+def test_validate_paths_batch_matches_route_check():
+    np = pytest.importorskip("numpy")
+    rng = np.random.default_rng(0)
+    for seed in range(4):
+        topo = _random_topology(seed, density=0.6)
+        n = len(topo.pods)
+        ids = topo.all_pods()
+        walks = [[ids.index(p) for p in path] for path in iter_valid_paths(topo, 4, critical=False)]
+        for length in (0, 1, 2, 3, 4, 10):
+            batches = [rng.integers(-1, n + 1, size=(500, length))]
+            if length == 4 and walks:  # mostly-legal rows, some with a pod swapped out
+                mixed = np.array(walks)
+                mixed[::3, 2] = rng.integers(0, n, size=len(mixed[::3]))
+                batches.append(mixed)
+            for paths in batches:
+                for critical in (True, False):
+                    valid, cvf = validate_paths_batch(topo, paths, critical)
+                    for row, ok, mask in zip(paths.tolist(), valid, cvf):
+                        check = validate_path(topo, [ids[i] if 0 <= i < n else f"missing{i}" for i in row], critical)
+                        assert (check.valid, check.cvf_codes) == (bool(ok), decode_cvf(int(mask)))
+
+
+def test_plan_route_is_optimal_and_table_tracks_topology():
+    for seed in range(12):
+        topo = _random_topology(seed, n_domains=2 + seed % 2, density=(0.15, 0.25, 0.4, 0.7)[seed % 4])
+        ct = topo.compiled()
+        best = {}
+        for hops in range(3, len(ct) + 1):
+            for path in iter_valid_paths(topo, hops, critical=True):
+                ix = ct.encode(path)
+                score = (ct.node_variety(ix) + ct.domain_variety(ix), -hops)
+                entry = best.setdefault((path[0], path[-1]), {"shortest": hops, "resonance": score})
+                entry["resonance"] = max(entry["resonance"], score)
+        for source in ct.ids:
+            for target in ct.ids:
+                expected = best.get((source, target))
+                shortest = plan_route(topo, source, target, SHORTEST)
+                richest = plan_route(topo, source, target, RESONANCE)
+                if expected is None:
+                    assert shortest is None and richest is None
+                    continue
+                assert validate_path(topo, list(shortest.path), critical=True).valid
+                assert validate_path(topo, list(richest.path), critical=True).valid
+                assert shortest.hops == expected["shortest"]
+                assert (richest.resonance, -richest.hops) == expected["resonance"]
+        assert dict(route_table(topo).items()) == {k: plan_route(topo, *k) for k in best}
+
+    topo = Topology()
+    table = route_table(topo)
+    assert route_table(topo) is table
+    topo.edges.setdefault("node1_evidence", []).append("node1_ops")
+    topo.edges.setdefault("node1_ops", []).append("node2_ops")
+    rebuilt = route_table(topo)
+    assert rebuilt is not table and rebuilt.fingerprint != table.fingerprint
+    assert table.get("node1_evidence", "node2_ops") is None
+    assert rebuilt.get("node1_evidence", "node2_ops").path == ("node1_evidence", "node1_ops", "node2_ops")
+    topo.edges["node1_ops"].remove("node2_ops")
+    assert route_table(topo).get("node1_evidence", "node2_ops") is None
+
+
+def test_vortex_sim_is_seeded_and_matches_scalar_paths():
+    pytest.importorskip("numpy")
+    from mesh.vortex_sim import simulate
+
+    starts = vortex.ALL[:2]
+    kwargs = dict(samples=6000, lengths=(1, 2, 3, 5), starts=starts, seed=11, chunk=2500)
+    report = simulate(workers=1, **kwargs)
+    assert simulate(workers=2, **kwargs) == report
+    assert simulate(workers=1, **{**kwargs, "seed": 12}) != report
+
+    rng_state = random.getstate()
+    random.seed(3)
+    try:
+        for cell in report["cells"]:
+            if cell["length"] < 3:
+                assert cell["would_reject_rate"] == 1.0
+                continue
+            checks = [vortex.validate_path(vortex.random_vortex_path(cell["start"], cell["length"])) for _ in range(3000)]
+            n, m = len(checks), cell["samples"]
+            rate = sum(not c["valid"] for c in checks) / n
+            p = cell["would_reject_rate"]
+            assert abs(rate - p) <= 4 * math.sqrt(max(p * (1 - p), 1 / m) * (1 / n + 1 / m)) + 1e-9
+            mean = sum(c["resonance"] for c in checks) / n
+            std = cell["resonance"]["std"]
+            assert abs(mean - cell["resonance"]["mean"]) <= 4 * std * math.sqrt(1 / n + 1 / m) + 1e-3
+    finally:
+        random.setstate(rng_state)
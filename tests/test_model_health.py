@@ -0,0 +1,25 @@
+from agi.core.model_health import HealthTable, config_from_dict
+from agi.core.model_runner import load_model_stack
+
+
+def test_shipped_stack_demotes_a_slow_candidate():
+    cfg = config_from_dict(load_model_stack().get("health"))
+    assert cfg.slow_ms is not None
+    table = HealthTable(cfg)
+    for _ in range(cfg.min_samples):
+        table.record("local_large", cfg.slow_ms * 2, True)
+        table.record("local_small", cfg.slow_ms / 10, True)
+    assert table.rank(["local_large", "local_small"]) == (["local_small", "local_large"], [])
+    assert table.rank(["local_small", "local_large"]) == (["local_small", "local_large"], [])
+
+
+def test_slow_demotion_waits_for_min_samples_and_can_be_disabled():
+    cfg = config_from_dict({"slow_ms": 1000, "min_samples": 3})
+    table = HealthTable(cfg)
+    for _ in range(2):
+        table.record("slow", 5000, True)
+    assert table.rank(["slow", "fast"])[0] == ["slow", "fast"]
+    table.record("slow", 5000, True)
+    assert table.rank(["slow", "fast"])[0] == ["fast", "slow"]
+    table.configure(config_from_dict({"slow_ms": None, "min_samples": 3}))
+    assert table.rank(["slow", "fast"])[0] == ["slow", "fast"]
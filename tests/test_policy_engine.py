@@ -0,0 +1,111 @@
+import os
+import random
+import re
+import time
+
+import pytest
+
+from agi.core.policy_engine import DEFAULT_RULE_SETS, PolicyEngine, get_engine
+from agi.core.roles.validator import HARD_REFUSALS, PROFESSIONAL_CLAIMS, run_validator
+
+SAMPLES = [
+    "",
+    "A calm answer about property law.",
+    "I am a lawyer and you should hack the main server to kill the process.",
+    "Maybe we make a bomb? Possibly credit card fraud. KILL it.",
+    "The skill of killing time is unclear.",
+]
+
+
+def _legacy_hits(text, patterns):
+    return [p for p in patterns if re.search(p, text, flags=re.IGNORECASE)]
+
+
+def test_single_pass_scan_matches_per_pattern_search():
+    engine = PolicyEngine(DEFAULT_RULE_SETS)
+    for text in SAMPLES:
+        found = {(h.code, h.pattern) for h in engine.scan(text)}
+        for code, spec in DEFAULT_RULE_SETS.items():
+            expected = set(_legacy_hits(text, spec["patterns"]))
+            assert {p for c, p in found if c == code} == expected
+
+
+def test_validator_reports_codes_and_offsets():
+    text = SAMPLES[2]
+    out = run_validator({"answer": text}, {})
+    assert out["policy_ok"] is False
+    codes = [v["code"] for v in out["violations"]]
+    assert codes[:2] == ["HARD_REFUSAL", "PROFESSIONAL_MISREPRESENTATION"]
+    hard = out["violations"][0]
+    assert hard["patterns"] == ",".join(_legacy_hits(text, HARD_REFUSALS))
+    assert out["violations"][1]["patterns"] == ",".join(_legacy_hits(text, PROFESSIONAL_CLAIMS))
+    for start, end in hard["offsets"]:
+        assert 0 <= start < end <= len(text)
+
+
+def test_stream_scanner_waits_for_word_boundary():
+    scanner = get_engine().stream_scanner()
+    assert scanner.feed("the skill of kill") is False
+    assert scanner.feed("ing time") is False
+    assert scanner.feed(" then kill") is False
+    assert scanner.feed(" it") is True
+    assert [h.pattern for h in scanner.hits if h.action == "block"] == [r"\bkill\b"]
+
+
+def _legacy_validator_scan(text):
+    # What run_validator did before the engine: one search per pattern plus a lowercase word check.
+    hard = _legacy_hits(text, HARD_REFUSALS)
+    prof = _legacy_hits(text, PROFESSIONAL_CLAIMS)
+    qualified = any(w in text.lower() for w in DEFAULT_RULE_SETS["UNCERTAINTY"]["patterns"])
+    return hard, prof, qualified
+
+
+class _CountingPattern:
+    def __init__(self, rx):
+        self.rx = rx
+        self.calls = 0
+
+    def finditer(self, *args):
+        self.calls += 1
+        return self.rx.finditer(*args)
+
+
+def test_scan_prefilter_skips_rules_whose_literal_lead_is_absent():
+    leads = [lead for lead, _ in PolicyEngine(DEFAULT_RULE_SETS)._leads]
+    assert sum(bool(lead) for lead in leads) > len(leads) // 2
+    for text in SAMPLES + ["Ownership \u201cclaims\u201d are unclear; maybe KILL the job.", "a \u017fecret kill"]:
+        engine = PolicyEngine(DEFAULT_RULE_SETS)
+        counters = engine._compiled = [_CountingPattern(rx) for rx in engine._compiled]
+        found = [(h.code, h.pattern, h.start, h.end) for h in engine.scan(text)]
+        expected = sorted(((r.code, r.pattern, m.start(), m.end()) for r, c in zip(engine.rules, counters)
+                           for m in c.rx.finditer(text)), key=lambda h: h[2])
+        assert found == expected
+        folds = "\u017f" in text  # re.IGNORECASE folds it to "s", lower() does not: no prefilter
+        for (lead, pure), c in zip(engine._leads, counters):
+            if folds or not lead:
+                assert c.calls == 1
+            elif lead not in text.lower() or pure:
+                assert c.calls == 0
+            else:
+                assert c.calls == 1
+
+
+def _best_ms(fn, repeat=15):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+
+@pytest.mark.skipif(not os.getenv("SOVEREIGN_BENCH"), reason="wall-clock benchmark; set SOVEREIGN_BENCH=1 to run")
+def test_scan_is_no_slower_than_per_pattern_baseline():
+    engine = PolicyEngine(DEFAULT_RULE_SETS)
+    rng = random.Random(0)
+    words = "the sovereign node answers property law questions with care and evidence \u201cownership\u201d".split()
+    for text in (
+        " ".join(rng.choice(words) for _ in range(2000)),
+        " ".join(rng.choice(words + ["kill", "maybe"]) for _ in range(2000)),
+    ):
+        assert _best_ms(lambda: engine.scan(text)) <= _best_ms(lambda: _legacy_validator_scan(text))